@@ -0,0 +1,169 @@
+import re
+from collections.abc import Mapping
+
+# Splits a normalized `Address` into street, city, state code and ZIP. The address is
+# split into words with one precompiled pattern, and then walked backwards from the end: an
+# optional "USA", an optional ZIP, then the state, which may be spelled out, as in
+# "Fairbanks, Alaska". The city is the run of words just before the state, back to a comma
+# or a word with digits, and the street is everything before that.
+#
+# The fields are only a best effort: an address like "123 Main St Springfield IL" has no
+# comma to separate the street from the city, so the whole of "Main St Springfield" is
+# taken as the city.
+
+ADDRESS_FIELDS = ("street", "city", "state", "zip")
+
+STATE_CODES_BY_NAME = {
+    "Alabama": "AL",
+    "Alaska": "AK",
+    "Arizona": "AZ",
+    "Arkansas": "AR",
+    "California": "CA",
+    "Colorado": "CO",
+    "Connecticut": "CT",
+    "Delaware": "DE",
+    "District of Columbia": "DC",
+    "Florida": "FL",
+    "Georgia": "GA",
+    "Hawaii": "HI",
+    "Idaho": "ID",
+    "Illinois": "IL",
+    "Indiana": "IN",
+    "Iowa": "IA",
+    "Kansas": "KS",
+    "Kentucky": "KY",
+    "Louisiana": "LA",
+    "Maine": "ME",
+    "Maryland": "MD",
+    "Massachusetts": "MA",
+    "Michigan": "MI",
+    "Minnesota": "MN",
+    "Mississippi": "MS",
+    "Missouri": "MO",
+    "Montana": "MT",
+    "Nebraska": "NE",
+    "Nevada": "NV",
+    "New Hampshire": "NH",
+    "New Jersey": "NJ",
+    "New Mexico": "NM",
+    "New York": "NY",
+    "North Carolina": "NC",
+    "North Dakota": "ND",
+    "Ohio": "OH",
+    "Oklahoma": "OK",
+    "Oregon": "OR",
+    "Pennsylvania": "PA",
+    "Rhode Island": "RI",
+    "South Carolina": "SC",
+    "South Dakota": "SD",
+    "Tennessee": "TN",
+    "Texas": "TX",
+    "Utah": "UT",
+    "Vermont": "VT",
+    "Virginia": "VA",
+    "Washington": "WA",
+    "West Virginia": "WV",
+    "Wisconsin": "WI",
+    "Wyoming": "WY",
+    "Puerto Rico": "PR",
+    "Guam": "GU",
+    "Virgin Islands": "VI",
+}
+
+# Both names and codes, casefolded, mapped to the code.
+_STATE_CODES = {
+    **{code.casefold(): code for code in STATE_CODES_BY_NAME.values()},
+    **{name.casefold(): code for name, code in STATE_CODES_BY_NAME.items()},
+}
+_MAX_STATE_WORDS = max(len(state.split()) for state in _STATE_CODES)
+
+# Splits an address into words and the separators between them, which alternate, so that
+# slices of the parts can be joined back into the original text.
+_SEPARATOR = re.compile(r"([\s,]+)")
+_ZIP = re.compile(r"(\d{5})(?:-\d{4})?\.?")
+# A code run into its ZIP, as in "IL-61063".
+_CODE_AND_ZIP = re.compile(r"([A-Za-z]{2})-?(\d{5})(?:-\d{4})?\.?")
+_CITY_WORD = re.compile(r"[^\W\d_](?:[^\W\d_]|[.'-])*")
+_COUNTRY = frozenset(["us", "usa"])
+
+
+def address_fields(center: Mapping[str, str | int]) -> dict[str, str]:
+    # A center's structured address fields. Centers scraped before the address was split
+    # up only have `Address`, so it is parsed here instead.
+    if "state" not in center:
+        return parse_address(str(center.get("Address", "")))
+    return {field: str(center[field]) for field in ADDRESS_FIELDS if field in center}
+
+
+def parse_address(address: str) -> dict[str, str]:
+    # Returns whichever of `ADDRESS_FIELDS` could be found. The address is split once,
+    # and then each word is at most a dictionary lookup or a match of a short pattern.
+    parts = _SEPARATOR.split(address)
+    words = parts[::2]
+    found = _state_at(words, len(words))
+    if found is None:
+        # Text after the ZIP is usually a note, as in "Norwich, CT 06360 and the Order
+        # of Interbeing", so fall back on the first state that is followed by a ZIP.
+        for i, word in enumerate(words):
+            if _ZIP.fullmatch(word) and (found := _state_at(words, i + 1)):
+                break
+        else:
+            return {}
+    state_start, state, zip_code = found
+
+    # Skip a repeated state, as in "Chicago IL IL".
+    while state_start and _state_code(words[state_start - 1]) == state:
+        state_start -= 1
+    # The city may be separated from the state by a comma, but not split by one.
+    city_start = state_start
+    while city_start and _CITY_WORD.fullmatch(words[city_start - 1]):
+        city_start -= 1
+        if city_start and "," in parts[2 * city_start - 1]:
+            break
+
+    fields: dict[str, str] = {}
+    street = "".join(parts[: 2 * city_start]).rstrip(" ,")
+    if street:
+        fields["street"] = street
+    if city_start < state_start:
+        fields["city"] = "".join(parts[2 * city_start : 2 * state_start - 1]).rstrip(
+            "."
+        )
+    fields["state"] = state
+    if zip_code:
+        fields["zip"] = zip_code
+    return fields
+
+
+def _state_at(words: list[str], end: int) -> tuple[int, str, str | None] | None:
+    # Looks for a state, optionally followed by a ZIP and the country, ending just before
+    # `words[end]`. Returns the index of the state's first word, its code, and the ZIP.
+    while end and (not words[end - 1] or _normalize(words[end - 1]) in _COUNTRY):
+        end -= 1
+    if end and (match := _CODE_AND_ZIP.fullmatch(words[end - 1])):
+        if state := _state_code(match[1]):
+            return end - 1, state, match[2]
+    zip_code = None
+    if end and (zip_match := _ZIP.fullmatch(words[end - 1])):
+        zip_code = zip_match[1]
+        end -= 1
+    for length in range(min(_MAX_STATE_WORDS, end), 0, -1):
+        state = _state_code(" ".join(words[end - length : end]))
+        if state is None:
+            continue
+        # A lowercase code is only trusted before a ZIP, since "in", "or", "me" and so on
+        # are also words.
+        code = words[end - 1]
+        if length == 1 and len(code) == 2 and not zip_code and not code.isupper():
+            return None
+        return end - length, state, zip_code
+    return None
+
+
+def _state_code(text: str) -> str | None:
+    return _STATE_CODES.get(_normalize(text))
+
+
+def _normalize(text: str) -> str:
+    # So that "N.Y." and "ny" both match "NY".
+    return text.casefold().replace(".", "")
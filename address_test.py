@@ -0,0 +1,131 @@
+import pytest
+
+from address import address_fields, parse_address
+from scrape import parse_page
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        ("IL", {"state": "IL"}),
+        ("Chicago IL", {"city": "Chicago", "state": "IL"}),
+        (
+            "275 W. 96th Street, #4C New York, NY 10025",
+            {
+                "street": "275 W. 96th Street, #4C",
+                "city": "New York",
+                "state": "NY",
+                "zip": "10025",
+            },
+        ),
+        (
+            "6552 N Ashland apt 1, Chicago, Il 60626",
+            {
+                "street": "6552 N Ashland apt 1",
+                "city": "Chicago",
+                "state": "IL",
+                "zip": "60626",
+            },
+        ),
+        (
+            "4448 Pikes Landing Road (UUFF building), Fairbanks, Alaska",
+            {
+                "street": "4448 Pikes Landing Road (UUFF building)",
+                "city": "Fairbanks",
+                "state": "AK",
+            },
+        ),
+        (
+            "2999 Sunset Blvd., Suite 101 West Columbia, South Carolina 29169",
+            {
+                "street": "2999 Sunset Blvd., Suite 101",
+                "city": "West Columbia",
+                "state": "SC",
+                "zip": "29169",
+            },
+        ),
+        (
+            "110 Rustic Road, Centereach, N.Y. 11720-1234 U.S.A.",
+            {
+                "street": "110 Rustic Road",
+                "city": "Centereach",
+                "state": "NY",
+                "zip": "11720",
+            },
+        ),
+        (
+            "P.O. Box 123, Darien IL IL 60561",
+            {"street": "P.O. Box 123", "city": "Darien", "state": "IL", "zip": "60561"},
+        ),
+        (
+            "1200 W Iowa Avenue, Indianola, Iowa IA 50125",
+            {
+                "street": "1200 W Iowa Avenue",
+                "city": "Indianola",
+                "state": "IA",
+                "zip": "50125",
+            },
+        ),
+        (
+            "28 Fanning Avenue, Norwich, CT 06360 and the Order of Interbeing.",
+            {
+                "street": "28 Fanning Avenue",
+                "city": "Norwich",
+                "state": "CT",
+                "zip": "06360",
+            },
+        ),
+        (
+            "10076 Fish Hatchery Road, Pecatonica, IL-61063",
+            {
+                "street": "10076 Fish Hatchery Road",
+                "city": "Pecatonica",
+                "state": "IL",
+                "zip": "61063",
+            },
+        ),
+        ("Meets online, or in person", {}),
+        ("Boulder 80302", {}),
+        ("", {}),
+    ],
+)
+def test_parse_address(address: str, expected: dict[str, str]) -> None:
+    assert parse_address(address) == expected
+
+
+def test_address_fields() -> None:
+    assert address_fields(
+        {"name": "A", "page": 1, "Address": "Chicago, IL 60626", "state": "IL"}
+    ) == {"state": "IL"}
+    # Scraped before the address was split up.
+    assert address_fields({"name": "A", "page": 1, "Address": "Chicago, IL 60626"}) == {
+        "city": "Chicago",
+        "state": "IL",
+        "zip": "60626",
+    }
+    assert address_fields({"name": "A", "page": 1}) == {}
+
+
+def test_parse_page_adds_address_fields() -> None:
+    html = """<p class="entryName">Harmony Zen Center</p>
+<p class="entryDetail">
+<strong>Address:</strong> 4635 North Racine Avenue, Chicago, IL 60640<br>
+</p>
+<hr>
+<p class="entryName">Rigpa Chicago</p>
+<p class="entryDetail">
+<strong>Phone:</strong> (312) 555-0100<br>
+</p>
+<hr>"""
+    assert parse_page(html, page_number=7) == [
+        {
+            "name": "Harmony Zen Center",
+            "page": 7,
+            "Address": "4635 North Racine Avenue, Chicago, IL 60640",
+            "street": "4635 North Racine Avenue",
+            "city": "Chicago",
+            "state": "IL",
+            "zip": "60640",
+        },
+        {"name": "Rigpa Chicago", "page": 7, "Phone": "(312) 555-0100"},
+    ]
@@ -0,0 +1,18 @@
+import os
+import tempfile
+from pathlib import Path
+
+# Writes a whole file at once. The data goes to a temporary file in the same directory
+# first, which then replaces `path`, so that a crash never leaves a truncated file and a
+# reader always sees either the old contents or the new ones.
+
+
+def atomic_write(path: Path, data: str | bytes) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.encode() if isinstance(data, str) else data)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    os.replace(tmp, path)
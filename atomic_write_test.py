@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+from atomic_write import atomic_write
+
+
+def test_atomic_write(tmp_path: Path) -> None:
+    path = tmp_path / "out.json"
+    atomic_write(path, "old")
+    atomic_write(path, b"new")
+    assert path.read_text() == "new"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_atomic_write_keeps_the_old_file_on_failure(tmp_path: Path) -> None:
+    path = tmp_path / "out.json"
+    atomic_write(path, "old")
+    with pytest.raises(TypeError):
+        atomic_write(path, 1)  # type: ignore[arg-type]
+    assert path.read_text() == "old"
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,61 @@
+import argparse
+import timeit
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from address import parse_address
+from center_io import iter_centers
+from entries import normalize_address
+
+# Compares the per-address cost of `parse_address` with the chain of substitutions in
+# `normalize_address`, over every address in the scraped centers.
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    addresses = [
+        str(center["Address"])
+        for center in iter_centers(Path(args.input))
+        if "Address" in center
+    ]
+    parsed = sum(1 for address in addresses if parse_address(address))
+    print(
+        f"{len(addresses)} addresses, {parsed} ({parsed / len(addresses):.0%}) with "
+        "at least a state"
+    )
+    for label, function in [
+        ("normalize_address", normalize_address),
+        ("parse_address", parse_address),
+    ]:
+        cost = _per_address_cost(function, addresses, repeat=args.repeat)
+        print(f"{label:>20}: {cost * 1e6:.2f} µs per address")
+
+
+def _per_address_cost(
+    function: Callable[[str], object], addresses: list[str], *, repeat: int
+) -> float:
+    # The fastest of several runs, since slower runs are noise from the rest of the
+    # machine.
+    timer = timeit.Timer(lambda: [function(address) for address in addresses])
+    return min(timer.repeat(repeat=repeat, number=1)) / len(addresses)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json` or `.jsonl`.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=20,
+        help="How many times to time each function. The fastest run is reported.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
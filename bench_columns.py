@@ -0,0 +1,80 @@
+import argparse
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from center_io import iter_centers, write_centers
+from center_parquet import read_table
+
+# Compares reading a couple of columns, `Tradition` and `state`, from `.json` and from
+# `.parquet`. From JSON every center must be decoded to read any of it, while Parquet only
+# reads and decodes the two columns, without creating a Python object per value.
+#
+# `--scale` repeats the centers, to see how each format grows with the dataset.
+
+_COLUMNS = ["Tradition", "state"]
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    centers = list(iter_centers(Path(args.input))) * args.scale
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "centers.json"
+        parquet_path = Path(tmp) / "centers.parquet"
+        write_centers(json_path, centers)
+        write_centers(parquet_path, centers)
+        print(
+            f"{len(centers)} centers: .json is {json_path.stat().st_size / 1e6:.1f} MB, "
+            f".parquet is {parquet_path.stat().st_size / 1e6:.1f} MB"
+        )
+        timings = {
+            ".json, every center": lambda: [
+                [center.get(column) for column in _COLUMNS]
+                for center in iter_centers(json_path)
+            ],
+            ".parquet, every center": lambda: list(iter_centers(parquet_path)),
+            ".parquet, two columns": lambda: read_table(parquet_path, _COLUMNS),
+        }
+        baseline = None
+        for label, read in timings.items():
+            seconds = _fastest(read, repeat=args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"{label:>24}: {seconds * 1000:8.2f} ms "
+                f"({baseline / seconds:.1f}x the .json path)"
+            )
+
+
+def _fastest(read: Callable[[], object], *, repeat: int) -> float:
+    # The fastest of several runs, since slower runs are noise from the rest of the
+    # machine.
+    return min(timeit.Timer(read).repeat(repeat=repeat, number=1))
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="How many copies of the centers to read.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="How many times to time each read. The fastest run is reported.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
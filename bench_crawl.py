@@ -0,0 +1,144 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import ArgumentParser
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from center_io import iter_centers
+from replay import ReplayServer, add_replay_arguments, create_replay_server
+
+# Benchmarks the whole crawl: `scrape.py` is run, as it would be from the command line,
+# against `replay.py`'s stand-in for the directory, and the wall time, throughput, retries
+# and responses are reported. Any argument that isn't `bench_crawl.py`'s own is passed on
+# to `scrape.py`, e.g.
+#
+#   pants run bench_crawl.py -- --latency-ms 200 --error-rate 0.05 --concurrency 8
+#
+# The scrape runs in its own process, in a temporary directory, with the page cache off,
+# so that every page goes through the server, and nothing is left behind. The scraped
+# centers are compared with the replayed ones, so a change that makes crawling faster by
+# dropping pages doesn't look like a win.
+
+_SCRAPE = Path(__file__).with_name("scrape.py")
+
+
+@dataclass(frozen=True)
+class CrawlResult:
+    seconds: float
+    # The pages and centers in the output.
+    pages: int
+    centers: int
+    # Whether the output has the same centers, by name and page, as the replayed pages.
+    complete: bool
+    # The run report from `scrape.py --metrics-json`, see `metrics.py`.
+    report: dict[str, object]
+    # How many responses the server sent with each status code.
+    responses: dict[str, int]
+
+
+def run_crawl(
+    server: ReplayServer,
+    scrape_args: Sequence[str],
+    *,
+    expected: Sequence[tuple[str, int]],
+) -> CrawlResult:
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        command = [
+            sys.executable,
+            str(_SCRAPE),
+            "--base-url",
+            server.base_url,
+            "--cache-dir",
+            "",
+            "--metrics-json",
+            str(workdir / "metrics.json"),
+            *scrape_args,
+        ]
+        start = time.perf_counter()
+        process = subprocess.run(command, cwd=workdir, capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if process.returncode != 0:
+            raise RuntimeError(f"`scrape.py` failed:\n{process.stderr}")
+        centers = [
+            (str(center["name"]), int(center["page"]))
+            for center in iter_centers(workdir / "buddhist_centers.json")
+        ]
+        report = json.loads((workdir / "metrics.json").read_text())
+    return CrawlResult(
+        seconds=seconds,
+        pages=len({page for _, page in centers}),
+        centers=len(centers),
+        complete=centers == list(expected),
+        report=report,
+        responses=server.stats(),
+    )
+
+
+def format_result(result: CrawlResult) -> str:
+    report = result.report
+    summaries = report["summaries"]
+    assert isinstance(summaries, dict)
+    fetch, wait = summaries["fetch_seconds"], summaries["wait_seconds"]
+    lines = [
+        f"Crawled {result.pages} pages and {result.centers} centers in "
+        f"{result.seconds:.2f} s: {result.pages / result.seconds:.1f} pages/sec, "
+        f"{result.centers / result.seconds:.0f} centers/sec",
+        f"Requests: {report['requests']}, of which {report['retries']} retries. "
+        f"Failed pages: {report['errors']}. Server responses: {result.responses}",
+    ]
+    if fetch["count"]:
+        lines.append(
+            "Fetch: "
+            + ", ".join(f"{q} {fetch[q] * 1000:.0f} ms" for q in ("p50", "p95", "p99"))
+            + f". Waiting on the rate limiter and backoff: p95 {wait['p95'] * 1000:.0f}"
+            f" ms, {wait['sum']:.1f} s in all"
+        )
+    lines.append(
+        "Every replayed center was scraped."
+        if result.complete
+        else "The scraped centers differ from the replayed ones!"
+    )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    args, scrape_args = create_parser().parse_known_args()
+    server = create_replay_server(args, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    expected = [
+        (str(center["name"]), int(center["page"]))
+        for center in iter_centers(Path(args.input))
+    ]
+    try:
+        for run in range(1, args.repeat + 1):
+            result = run_crawl(server, scrape_args, expected=expected)
+            if args.repeat > 1:
+                print(f"Run {run}:")
+            print(format_result(result))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def create_parser() -> argparse.ArgumentParser:
+    # Abbreviations are off, so that e.g. `--concurrency` is never taken for one of ours.
+    parser = ArgumentParser(allow_abbrev=False)
+    add_replay_arguments(parser)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="How many times to crawl. Each run starts from an empty checkpoint.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
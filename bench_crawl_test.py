@@ -0,0 +1,35 @@
+import threading
+from pathlib import Path
+
+from bench_crawl import format_result, run_crawl
+from center_io import write_centers
+from replay import ReplayConfig, ReplayServer, load_pages
+
+
+def test_crawl_benchmark_smoke(tmp_path: Path) -> None:
+    source = tmp_path / "source.json"
+    centers: list[dict[str, str | int]] = [
+        {"name": f"Center {page}-{i}", "page": page, "Tradition": "Theravada"}
+        for page, count in [(1, 25), (2, 1)]
+        for i in range(count)
+    ]
+    write_centers(source, centers)
+    server = ReplayServer(
+        ("127.0.0.1", 0), load_pages(source), ReplayConfig(latency_ms=5)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        result = run_crawl(
+            server,
+            ["--max-requests-per-second", "0", "--parse-workers", "0"],
+            expected=[(str(c["name"]), int(c["page"])) for c in centers],
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(format_result(result))
+
+    assert (result.pages, result.centers) == (2, 26)
+    assert result.complete
+    assert result.report["requests"] == 2
+    assert result.responses == {"200": 2}
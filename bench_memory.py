@@ -0,0 +1,58 @@
+import argparse
+import gc
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+from center import Center
+from center_io import iter_centers
+
+# Compares the memory held by every scraped center as the dicts that `iter_centers` yields
+# with the same centers as compact `Center`s.
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    fp = Path(args.input)
+    as_dicts = _retained_bytes(lambda: list(iter_centers(fp)))
+    as_centers = _retained_bytes(
+        lambda: [Center.from_dict(center) for center in iter_centers(fp)]
+    )
+    count = sum(1 for _ in iter_centers(fp))
+    for label, size in [("dict", as_dicts), ("Center", as_centers)]:
+        print(
+            f"{label:>6}: {size / 1024 / 1024:.2f} MiB, {size / count:.0f} bytes per "
+            "center"
+        )
+    print(f"{count} centers, {as_centers / as_dicts:.0%} of the memory as `Center`s")
+
+
+def _retained_bytes(load: Callable[[], object]) -> int:
+    # The memory still held once loading is done, as opposed to the peak while decoding.
+    gc.collect()
+    tracemalloc.start()
+    try:
+        # Hold on to the result while measuring.
+        loaded = load()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del loaded
+    return size
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import argparse
+import cProfile
+import functools
+import pstats
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from corpus import iter_corpus
+from page_cache import PageCache
+from scrape import PARSERS, parse_page
+
+# Benchmarks the parse pipeline offline, over the corpus from `corpus.py`: real pages from
+# the page cache where there are any, else pages regenerated from `buddhist_centers.json`.
+#
+# For each parser, this reports centers/sec (the best of `--repeat` runs), the peak memory
+# of parsing the whole corpus, and the time spent in each of the pipeline's main functions.
+# Peak memory comes from `tracemalloc`, so it only counts Python objects, and not lxml's
+# tree. Function times are inclusive, so `extract_center_info` includes
+# `_determine_key_and_value_texts`, and are measured in a separate run, since timing every
+# call slows the pipeline down.
+
+# The functions to time, by module. Only modules that are already imported are timed,
+# so that the lxml backend stays optional.
+_TIMED_FUNCTIONS = {
+    "scrape": [
+        "extract_center_info",
+        "_determine_key_and_value_texts",
+        "normalize_value_texts",
+        "parse_address",
+    ],
+    "entries": ["normalize_address"],
+    "lxml_parser": [
+        "extract_center_info",
+        "_determine_key_and_value_texts",
+        "normalize_value_texts",
+    ],
+}
+
+
+@dataclass(frozen=True)
+class FunctionTime:
+    calls: int
+    seconds: float
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    parser: str
+    pages: int
+    centers: int
+    # The fastest of the uninstrumented runs.
+    seconds: float
+    peak_memory_bytes: int
+    function_times: dict[str, FunctionTime] = field(default_factory=dict)
+
+    @property
+    def centers_per_second(self) -> float:
+        return self.centers / self.seconds
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    cache_dir = Path(args.cache_dir) if args.cache_dir else None
+    cache = PageCache(cache_dir) if cache_dir and cache_dir.exists() else None
+    pages = list(iter_corpus(Path(args.input), cache=cache))[: args.pages]
+    parsers = PARSERS if args.parser == "all" else (args.parser,)
+    for parser in parsers:
+        result = run_benchmark(pages, parser=parser, repeat=args.repeat)
+        print(format_result(result))
+        if args.profile:
+            path = Path(f"{args.profile}.{parser}.prof")
+            stats = profile_parse(pages, parser=parser, path=path)
+            print(f"Wrote {path}. The top functions by cumulative time:")
+            stats.sort_stats("cumulative").print_stats(15)
+
+
+def run_benchmark(
+    pages: list[tuple[int, str]], *, parser: str, repeat: int = 5
+) -> BenchResult:
+    centers = _parse_all(pages, parser=parser)
+    seconds = min(
+        _time(lambda: _parse_all(pages, parser=parser)) for _ in range(repeat)
+    )
+    tracemalloc.start()
+    try:
+        _parse_all(pages, parser=parser)
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    with _timed_functions() as function_times:
+        _parse_all(pages, parser=parser)
+    return BenchResult(
+        parser=parser,
+        pages=len(pages),
+        centers=centers,
+        seconds=seconds,
+        peak_memory_bytes=peak_memory_bytes,
+        function_times=dict(function_times),
+    )
+
+
+def profile_parse(
+    pages: list[tuple[int, str]], *, parser: str, path: Path
+) -> pstats.Stats:
+    profiler = cProfile.Profile()
+    profiler.runcall(_parse_all, pages, parser=parser)
+    profiler.dump_stats(path)
+    return pstats.Stats(profiler)
+
+
+def format_result(result: BenchResult) -> str:
+    lines = [
+        f"{result.parser}: {result.centers} centers from {result.pages} pages in "
+        f"{result.seconds:.3f} s, {result.centers_per_second:,.0f} centers/sec, "
+        f"peak memory {result.peak_memory_bytes / 1024 / 1024:.1f} MiB"
+    ]
+    for name, function_time in sorted(
+        result.function_times.items(), key=lambda item: -item[1].seconds
+    ):
+        per_call = function_time.seconds / function_time.calls * 1e6
+        lines.append(
+            f"  {name:>42}: {function_time.seconds:8.3f} s, "
+            f"{function_time.calls:7} calls, {per_call:8.2f} µs/call"
+        )
+    return "\n".join(lines)
+
+
+def _parse_all(pages: list[tuple[int, str]], *, parser: str) -> int:
+    return sum(
+        len(parse_page(html, page_number=page_number, parser=parser))
+        for page_number, html in pages
+    )
+
+
+def _time(function: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+@contextmanager
+def _timed_functions() -> Iterator[dict[str, FunctionTime]]:
+    # Temporarily replaces each function in `_TIMED_FUNCTIONS` with a wrapper that times
+    # it. Callers look the functions up as module globals, so they call the wrappers.
+    times: dict[str, FunctionTime] = {}
+    originals: list[tuple[Any, str, Callable[..., Any]]] = []
+    for module_name, function_names in _TIMED_FUNCTIONS.items():
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        for function_name in function_names:
+            original = getattr(module, function_name)
+            originals.append((module, function_name, original))
+            setattr(
+                module,
+                function_name,
+                _timing_wrapper(original, f"{module_name}.{function_name}", times),
+            )
+    try:
+        yield times
+    finally:
+        for module, function_name, original in originals:
+            setattr(module, function_name, original)
+
+
+def _timing_wrapper(
+    function: Callable[..., Any], name: str, times: dict[str, FunctionTime]
+) -> Callable[..., Any]:
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            previous = times.get(name, FunctionTime(0, 0.0))
+            times[name] = FunctionTime(previous.calls + 1, previous.seconds + elapsed)
+
+    return wrapper
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, used to regenerate pages that aren't cached.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".page_cache",
+        help="Benchmark the real pages in this cache, where there are any. Pass an empty "
+        "string to only use regenerated pages.",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=(*PARSERS, "all"),
+        default="all",
+        help="Which parser to benchmark.",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        help="Only benchmark the first N pages of the corpus.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="How many times to parse the corpus. The fastest run is reported.",
+    )
+    parser.add_argument(
+        "--profile",
+        help="Also run each parser under cProfile, and write the stats to "
+        "`<PROFILE>.<parser>.prof`, e.g. for `snakeviz`.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import pytest
+
+from bench_parse import format_result, profile_parse, run_benchmark
+from corpus import iter_corpus
+from scrape import PARSERS
+
+_CORPUS = Path(__file__).with_name("buddhist_centers.json")
+
+
+@pytest.mark.parametrize("parser", PARSERS)
+def test_benchmark_smoke(parser: str, tmp_path: Path) -> None:
+    if parser == "lxml":
+        pytest.importorskip("lxml")
+    pages = list(iter_corpus(_CORPUS))[:2]
+    result = run_benchmark(pages, parser=parser, repeat=1)
+    print(format_result(result))
+
+    assert result.pages == 2
+    assert result.centers == 50
+    assert result.centers_per_second > 0
+    assert result.peak_memory_bytes > 0
+    extract = result.function_times[
+        (
+            "scrape.extract_center_info"
+            if parser == "html.parser"
+            else "lxml_parser.extract_center_info"
+        )
+    ]
+    assert extract.calls == result.centers
+    assert result.function_times["entries.normalize_address"].calls > 0
+
+    stats = profile_parse(pages, parser=parser, path=tmp_path / "parse.prof")
+    assert (tmp_path / "parse.prof").exists()
+    assert stats.get_stats_profile().func_profiles
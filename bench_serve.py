@@ -0,0 +1,190 @@
+import argparse
+import http.client
+import multiprocessing
+import random
+import threading
+import time
+from argparse import ArgumentParser
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+from center_io import iter_centers
+from metrics import summarize
+from query import words
+from serve import CenterService, create_server
+
+# Load-tests `serve.py` on localhost: `--concurrency` clients, each on its own kept-alive
+# connection, send queries drawn from the scraped centers as fast as they can for
+# `--seconds`, and the requests/sec and p50/p95/p99 latency are reported.
+#
+# Unless `--url` points at a running server, one is started in another process, so that
+# the clients don't compete with it for the GIL. The clients still share one process, so
+# on a fast server they, not the server, may be the bottleneck; compare the results with
+# `--concurrency 1`.
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    queries = _queries(Path(args.input), count=args.queries)
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname or "127.0.0.1", url.port or 80
+    else:
+        ready: multiprocessing.SimpleQueue[int] = multiprocessing.SimpleQueue()
+        server = multiprocessing.Process(
+            target=_serve, args=(args.input, args.cache_size, ready), daemon=True
+        )
+        server.start()
+        host, port = "127.0.0.1", ready.get()
+    try:
+        results = _load_test(
+            host,
+            port,
+            queries,
+            concurrency=args.concurrency,
+            seconds=args.seconds,
+            revalidate=args.revalidate,
+        )
+    finally:
+        if server is not None:
+            server.terminate()
+    latencies, statuses, elapsed = results
+    summary = summarize(latencies)
+    print(
+        f"{len(latencies)} requests over {len(queries)} distinct queries in "
+        f"{elapsed:.1f} s, {len(latencies) / elapsed:.0f} requests/sec"
+    )
+    print(f"statuses: {dict(sorted(statuses.items()))}")
+    if latencies:
+        print(
+            " ".join(
+                f"{key}: {summary[key] * 1000:.2f} ms"
+                for key in ("p50", "p95", "p99", "max")
+            )
+        )
+
+
+def _queries(source: Path, *, count: int) -> list[str]:
+    # A mix of the queries people ask: a state, a city, a tradition, a name, and some
+    # combinations, drawn from the centers so that they match something.
+    queries: set[str] = set()
+    for center in iter_centers(source):
+        state, city = center.get("state"), center.get("city")
+        tradition = words(str(center.get("Tradition", "")))
+        name = words(str(center["name"]))
+        if state:
+            queries.add(urlencode({"state": state}))
+            if city:
+                queries.add(urlencode({"state": state, "city": city}))
+            if tradition:
+                queries.add(urlencode({"state": state, "tradition": tradition[-1]}))
+        if tradition:
+            queries.add(urlencode({"tradition": tradition[-1], "limit": 20}))
+        if name:
+            queries.add(urlencode({"name": name[0]}))
+    ordered = sorted(queries)
+    random.Random(0).shuffle(ordered)
+    return ordered[:count]
+
+
+def _serve(
+    source: str, cache_size: int, ready: "multiprocessing.SimpleQueue[int]"
+) -> None:
+    service = CenterService(Path(source), cache_size=cache_size)
+    server = create_server(service, "127.0.0.1", 0)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def _load_test(
+    host: str,
+    port: int,
+    queries: list[str],
+    *,
+    concurrency: int,
+    seconds: float,
+    revalidate: bool,
+) -> tuple[list[float], dict[int, int], float]:
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    deadline = start + seconds
+
+    def client(number: int) -> None:
+        conn = http.client.HTTPConnection(host, port)
+        etags: dict[str, str] = {}
+        client_latencies = []
+        client_statuses: dict[int, int] = {}
+        # Each client starts at a different query, so they don't all ask the same thing.
+        i = number * len(queries) // concurrency
+        while time.perf_counter() < deadline:
+            query = queries[i % len(queries)]
+            i += 1
+            headers = {}
+            if revalidate and query in etags:
+                headers["If-None-Match"] = etags[query]
+            sent = time.perf_counter()
+            conn.request("GET", f"/centers?{query}", headers=headers)
+            response = conn.getresponse()
+            response.read()
+            client_latencies.append(time.perf_counter() - sent)
+            client_statuses[response.status] = (
+                client_statuses.get(response.status, 0) + 1
+            )
+            if etag := response.getheader("ETag"):
+                etags[query] = etag
+        conn.close()
+        with lock:
+            latencies.extend(client_latencies)
+            for status, count in client_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [
+        threading.Thread(target=client, args=(number,)) for number in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, time.perf_counter() - start
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers to serve, and to draw the queries from.",
+    )
+    parser.add_argument(
+        "--url",
+        help="Load-test the server already running at this URL, e.g. "
+        "`http://127.0.0.1:8000`, rather than starting one.",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=500,
+        help="How many distinct queries to cycle through.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="The started server's response cache size. `0` turns the cache off.",
+    )
+    parser.add_argument(
+        "--revalidate",
+        action="store_true",
+        help="Send back each query's last `ETag`, as a caching client would, so that "
+        "unchanged responses are `304 Not Modified` without a body.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import threading
+from pathlib import Path
+
+from bench_serve import _load_test, _queries
+from center_io import write_centers
+from serve import CenterService, create_server
+
+
+def test_load_test_smoke(tmp_path: Path) -> None:
+    source = tmp_path / "centers.json"
+    write_centers(
+        source,
+        [
+            {
+                "name": "Harmony Zen Center",
+                "page": 1,
+                "Tradition": "Mahayana, Rinzai/Soto Zen",
+                "city": "Chicago",
+                "state": "IL",
+            },
+            {"name": "Rigpa Online", "page": 2},
+        ],
+    )
+    queries = _queries(source, count=100)
+    assert len(queries) == 6
+
+    server = create_server(CenterService(source), "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        latencies, statuses, elapsed = _load_test(
+            "127.0.0.1",
+            server.server_address[1],
+            queries,
+            concurrency=2,
+            seconds=0.2,
+            revalidate=True,
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert set(statuses) == {200, 304}
+    assert sum(statuses.values()) == len(latencies)
+    assert elapsed >= 0.2
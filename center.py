@@ -0,0 +1,142 @@
+import sys
+from collections.abc import Iterator, Mapping
+
+from address import ADDRESS_FIELDS
+
+# A compact, read-only stand-in for the `dict` that `extract_center_info` returns, for when
+# every center is held in memory at once.
+#
+# Each center only stores its name, page and a tuple of its other values. The keys for
+# those values live in a tuple that is shared by every center with the same keys in the
+# same order, and every key string is interned, so a key like "Community Dharma Leader" is
+# stored once for the whole dataset rather than once per center.
+#
+# `Center.from_dict(center).to_dict() == center`, including the order of the keys, as long
+# as `name` and `page` come first, as they always do when scraped.
+
+# The keys that `extract_center_info` recognizes on the page.
+KNOWN_KEY_NAMES = frozenset(
+    [
+        "Abbot",
+        "Address",
+        "Affiliation",
+        "Community Dharma Leader",
+        "Community Dharma Leaders",
+        "Contact",
+        "Contacts",
+        "Contact person",
+        "Contact and Teacher",
+        "Deshi",
+        "Director",
+        "Directors",
+        "E-mail",
+        "Executive Director",
+        "Founder",
+        "Founders",
+        "Founder Teacher",
+        "Founder Teachers",
+        "Group Coordinator",
+        "Group Coordinators",
+        "Guiding Teacher",
+        "Guiding Teachers",
+        "Lama-in-residence",
+        "Notes and Events",
+        "Main Contact",
+        "Main Contacts",
+        "Phone",
+        "Practice Leader",
+        "Practice Leaders",
+        "Resident Teacher",
+        "Resident Teachers",
+        "Rev.",
+        "Roshi",
+        "Senior Facilitator",
+        "Senior Facilitators",
+        "Spiritual Advisor",
+        "Spiritual Advisors",
+        "Spiritual Director",
+        "Spiritual Directors",
+        "Spiritual Director and Teacher",
+        "Teacher",
+        "Teachers",
+        "Tradition",
+        "Website",
+        "Venerable",
+    ]
+)
+
+# Every key a scraped center can have, interned up front.
+_VOCABULARY = {
+    key: sys.intern(key) for key in ("name", "page", *KNOWN_KEY_NAMES, *ADDRESS_FIELDS)
+}
+
+# Values that many centers share, such as "Mahayana, Zen", are interned too.
+_SHARED_VALUE_KEYS = frozenset({"Tradition", "Affiliation", "city", "state"})
+
+_SHAPES: dict[tuple[str, ...], tuple[str, ...]] = {}
+
+
+class Center(Mapping[str, str | int]):
+    __slots__ = ("name", "page", "_keys", "_values")
+
+    name: str
+    page: int
+    _keys: tuple[str, ...]
+    _values: tuple[str | int, ...]
+
+    def __init__(self, name: str, page: int, details: Mapping[str, str | int]) -> None:
+        self.name = name
+        self.page = page
+        self._keys = _shape(tuple(details))
+        self._values = tuple(
+            (
+                sys.intern(value)
+                if key in _SHARED_VALUE_KEYS and isinstance(value, str)
+                else value
+            )
+            for key, value in details.items()
+        )
+
+    @classmethod
+    def from_dict(cls, center: Mapping[str, str | int]) -> "Center":
+        keys = list(center)
+        if keys[:2] != ["name", "page"]:
+            raise ValueError(f"Expected `name` and `page` to be the first keys: {keys}")
+        name, page = center["name"], center["page"]
+        assert isinstance(name, str) and isinstance(page, int)
+        return cls(name, page, {key: center[key] for key in keys[2:]})
+
+    def to_dict(self) -> dict[str, str | int]:
+        center: dict[str, str | int] = {"name": self.name, "page": self.page}
+        center.update(zip(self._keys, self._values))
+        return center
+
+    def __getitem__(self, key: str) -> str | int:
+        if key == "name":
+            return self.name
+        if key == "page":
+            return self.page
+        try:
+            return self._values[self._keys.index(key)]
+        except ValueError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        yield "name"
+        yield "page"
+        yield from self._keys
+
+    def __len__(self) -> int:
+        return 2 + len(self._keys)
+
+    def __repr__(self) -> str:
+        return f"Center({self.to_dict()!r})"
+
+
+def _shape(keys: tuple[str, ...]) -> tuple[str, ...]:
+    # Returns the shared tuple for `keys`, creating it the first time they are seen.
+    shape = _SHAPES.get(keys)
+    if shape is None:
+        shape = tuple(_VOCABULARY.get(key) or sys.intern(key) for key in keys)
+        shape = _SHAPES.setdefault(shape, shape)
+    return shape
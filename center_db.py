@@ -0,0 +1,170 @@
+import os
+import sqlite3
+from collections.abc import Iterable, Iterator
+from itertools import groupby
+from pathlib import Path
+from types import TracebackType
+
+from address import address_fields
+
+# Stores centers in SQLite, so that lookups and regional extracts are indexed queries
+# rather than a walk over the whole JSON file.
+#
+# `centers` has one row per center, with the columns that are queried: `name`, `page`,
+# `state` and `tradition`, each indexed. Every other field goes in `details`, one row per
+# key, in the center's original key order, so that exporting reproduces the scraped dicts
+# exactly.
+#
+# Each run of a page's centers is appended in a single transaction, so it is either fully
+# stored or not at all.
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS centers (
+    id INTEGER PRIMARY KEY,
+    page INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    state TEXT,
+    tradition TEXT COLLATE NOCASE,
+    UNIQUE (page, position)
+);
+CREATE INDEX IF NOT EXISTS centers_name ON centers (name);
+CREATE INDEX IF NOT EXISTS centers_state ON centers (state);
+CREATE INDEX IF NOT EXISTS centers_tradition ON centers (tradition);
+CREATE TABLE IF NOT EXISTS details (
+    center_id INTEGER NOT NULL REFERENCES centers (id),
+    position INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value NOT NULL,
+    PRIMARY KEY (center_id, position)
+) WITHOUT ROWID;
+"""
+
+# `page` is a column of `centers`, and always the second key after `name`.
+_COLUMN_KEYS = ("name", "page")
+
+
+class CenterDatabase:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "CenterDatabase":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def append_page(
+        self, page_number: int, centers: Iterable[dict[str, str | int]]
+    ) -> int:
+        # Adds `centers` after the page's existing centers, and returns how many there were.
+        with self._conn:
+            (first_position,) = self._conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM centers WHERE page = ?",
+                (page_number,),
+            ).fetchone()
+            position = first_position
+            for position, center in enumerate(centers, first_position):
+                cursor = self._conn.execute(
+                    "INSERT INTO centers (page, position, name, state, tradition) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        page_number,
+                        position,
+                        center["name"],
+                        address_fields(center).get("state"),
+                        center.get("Tradition"),
+                    ),
+                )
+                details = [(k, v) for k, v in center.items() if k not in _COLUMN_KEYS]
+                self._conn.executemany(
+                    "INSERT INTO details (center_id, position, key, value) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (cursor.lastrowid, i, key, value)
+                        for i, (key, value) in enumerate(details)
+                    ],
+                )
+                position += 1
+        return position - first_position
+
+    def iter_centers(self) -> Iterator[dict[str, str | int]]:
+        # Centers come out in page order, in the order they were scraped.
+        yield from self._select("", ())
+
+    def query(
+        self,
+        *,
+        name: str | None = None,
+        page: int | None = None,
+        state: str | None = None,
+        tradition: str | None = None,
+    ) -> list[dict[str, str | int]]:
+        # Every given field must match. `name` must match the whole name, ignoring case,
+        # while `tradition` only needs to match the start, e.g. `Theravada`.
+        conditions: list[str] = []
+        params: list[str | int] = []
+        if name is not None:
+            conditions.append("c.name = ?")
+            params.append(name)
+        if page is not None:
+            conditions.append("c.page = ?")
+            params.append(page)
+        if state is not None:
+            conditions.append("c.state = ?")
+            params.append(state.upper())
+        if tradition is not None:
+            # The NOCASE collation lets the index serve a case-insensitive `LIKE`.
+            conditions.append("c.tradition LIKE ? ESCAPE '\\'")
+            params.append(_escape_like(tradition) + "%")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return list(self._select(where, params))
+
+    def _select(
+        self, where: str, params: Iterable[str | int]
+    ) -> Iterator[dict[str, str | int]]:
+        rows = self._conn.execute(
+            "SELECT c.id, c.name, c.page, d.key, d.value FROM centers AS c "
+            f"LEFT JOIN details AS d ON d.center_id = c.id {where} "
+            "ORDER BY c.page, c.position, d.position",
+            tuple(params),
+        )
+        for _, center_rows in groupby(rows, lambda row: row[0]):
+            center: dict[str, str | int] | None = None
+            for _, name, page, key, value in center_rows:
+                if center is None:
+                    center = {"name": name, "page": page}
+                if key is not None:
+                    center[key] = value
+            assert center is not None
+            yield center
+
+
+def write_database(fp: Path, centers: Iterable[dict[str, str | int]]) -> int:
+    # Like `write_centers`, builds the database in a temporary file and only replaces `fp`
+    # once every center is written. A page that comes up again, e.g. in the nearest-first
+    # output of a radius query, goes after that page's earlier centers. Reading the
+    # database back gives the centers in page order.
+    tmp = fp.with_name(f".{fp.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    count = 0
+    with CenterDatabase(tmp) as db:
+        for page_number, page_centers in groupby(centers, lambda c: c["page"]):
+            assert isinstance(page_number, int)
+            count += db.append_page(page_number, page_centers)
+    os.replace(tmp, fp)
+    return count
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
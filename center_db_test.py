@@ -0,0 +1,94 @@
+import json
+from pathlib import Path
+
+from center_db import CenterDatabase
+from center_io import iter_centers, write_centers
+
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": "Chicago Zen Community",
+        "page": 1,
+        "Address": "Chicago IL",
+        "Tradition": "Mahayana, Rinzai Zen",
+    },
+    {
+        "name": "Harmony Zen Center",
+        "page": 1,
+        "street": "4635 North Racine Avenue",
+        "city": "Chicago",
+        "state": "IL",
+        "Tradition": "Mahayana, Rinzai/Soto Zen",
+        "Notes and Events": "a, [b]\n\n“c”",
+    },
+    {
+        "name": "Evanston Meditation Center",
+        "page": 2,
+        "Address": "1703 Orrington Avenue, Evanston IL 60201",
+        "Tradition": "Theravada, Vipassana",
+    },
+    {"name": "Rigpa Online", "page": 3},
+]
+
+_TRADITION_LIKE = "tradition LIKE ? ESCAPE '\\'"
+
+
+def test_export_matches_json(tmp_path: Path) -> None:
+    db_path = tmp_path / "centers.sqlite"
+    assert write_centers(db_path, iter(_CENTERS)) == len(_CENTERS)
+    assert list(iter_centers(db_path)) == _CENTERS
+
+    json_path = tmp_path / "centers.json"
+    write_centers(json_path, iter_centers(db_path))
+    assert json_path.read_text() == json.dumps(_CENTERS, indent=2)
+
+
+def test_query(tmp_path: Path) -> None:
+    write_centers(tmp_path / "centers.sqlite", _CENTERS)
+    with CenterDatabase(tmp_path / "centers.sqlite") as db:
+
+        def names(**kwargs: str | int) -> list[str | int]:
+            return [center["name"] for center in db.query(**kwargs)]  # type: ignore
+
+        assert names(state="il") == [
+            "Chicago Zen Community",
+            "Harmony Zen Center",
+            "Evanston Meditation Center",
+        ]
+        assert names(state="IL", tradition="mahayana") == [
+            "Chicago Zen Community",
+            "Harmony Zen Center",
+        ]
+        assert names(tradition="Mahayana, Rinzai Zen") == ["Chicago Zen Community"]
+        assert names(tradition="Mahayana%") == []
+        assert names(name="rigpa online") == ["Rigpa Online"]
+        assert names(page=2) == ["Evanston Meditation Center"]
+        assert len(names()) == len(_CENTERS)
+
+        for condition in ("name = ?", "page = ?", "state = ?", _TRADITION_LIKE):
+            plan = db._conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM centers WHERE {condition}", ("x",)
+            ).fetchall()
+            assert "USING" in str(plan) and "INDEX" in str(plan), condition
+
+
+def test_append_page(tmp_path: Path) -> None:
+    with CenterDatabase(tmp_path / "centers.sqlite") as db:
+        assert db.append_page(2, _CENTERS[2:3]) == 1
+        assert db.append_page(1, _CENTERS[:1]) == 1
+        assert db.append_page(1, _CENTERS[1:2]) == 1
+        assert list(db.iter_centers()) == _CENTERS[:3]
+        assert db._conn.execute("SELECT COUNT(*) FROM details").fetchone() == (
+            sum(len(center) - 2 for center in _CENTERS[:3]),
+        )
+
+
+def test_write_unordered(tmp_path: Path) -> None:
+    # A page that comes up again is added to, not replaced.
+    db_path = tmp_path / "centers.sqlite"
+    centers: list[dict[str, str | int]] = [
+        {"name": "A", "page": 1},
+        {"name": "B", "page": 2},
+        {"name": "C", "page": 1},
+    ]
+    assert write_centers(db_path, centers) == 3
+    assert list(iter_centers(db_path)) == [centers[0], centers[2], centers[1]]
@@ -0,0 +1,124 @@
+import json
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from center_db import CenterDatabase, write_database
+
+# Reads and writes centers one at a time, so that memory stays flat no matter how large the
+# directory gets.
+#
+# Four formats are supported, chosen by the file's suffix:
+#   * `.json`: a pretty-printed array, byte-for-byte what `json.dumps(centers, indent=2)`
+#     would produce.
+#   * `.jsonl`: JSON Lines, one center per line. Each line is flushed as soon as it is
+#     written, so consumers can start reading before the crawl ends.
+#   * `.sqlite`: a SQLite database with indexed columns, see `center_db.py`. It is read
+#     back in page order.
+#   * `.parquet`: a columnar file, or a partitioned directory, for analysis, see
+#     `center_parquet.py`. This needs `pyarrow`, an optional dependency.
+
+FORMATS = ("json", "jsonl", "sqlite", "parquet")
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+def output_path(stem: str, format: str) -> Path:
+    if format not in FORMATS:
+        raise ValueError(f"Unknown format `{format}`, expected one of {FORMATS}.")
+    return Path(f"{stem}.{format}")
+
+
+def write_centers(fp: Path, centers: Iterable[dict[str, str | int]]) -> int:
+    if fp.suffix == ".jsonl":
+        return _write_jsonl(fp, centers)
+    if fp.suffix == ".sqlite":
+        return write_database(fp, centers)
+    if fp.suffix == ".parquet":
+        import center_parquet
+
+        return center_parquet.write_parquet(fp, centers)
+    # A partially written array is useless, so write to a temporary file and only replace
+    # `fp` once the array is complete.
+    tmp = fp.with_name(f".{fp.name}.tmp")
+    count = _write_json_array(tmp, centers)
+    os.replace(tmp, fp)
+    return count
+
+
+def iter_centers(fp: Path) -> Iterator[dict[str, str | int]]:
+    if fp.suffix == ".jsonl":
+        with fp.open() as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    if fp.suffix == ".sqlite":
+        if not fp.exists():
+            raise FileNotFoundError(fp)
+        with CenterDatabase(fp) as db:
+            yield from db.iter_centers()
+        return
+    if fp.suffix == ".parquet":
+        import center_parquet
+
+        yield from center_parquet.iter_parquet(fp)
+        return
+    yield from _iter_json_array(fp)
+
+
+def _write_jsonl(fp: Path, centers: Iterable[dict[str, str | int]]) -> int:
+    count = 0
+    with fp.open("w") as f:
+        for center in centers:
+            f.write(json.dumps(center) + "\n")
+            f.flush()
+            count += 1
+    return count
+
+
+def _write_json_array(fp: Path, centers: Iterable[dict[str, str | int]]) -> int:
+    count = 0
+    with fp.open("w") as f:
+        for center in centers:
+            f.write("[\n" if count == 0 else ",\n")
+            f.write("  " + json.dumps(center, indent=2).replace("\n", "\n  "))
+            count += 1
+        f.write("\n]" if count else "[]")
+    return count
+
+
+def _iter_json_array(fp: Path) -> Iterator[dict[str, str | int]]:
+    # Decodes one element at a time from a JSON array, reading the file in chunks. Every
+    # element is an object, so a chunk that ends partway through one fails to decode,
+    # rather than decoding to something truncated.
+    decoder = json.JSONDecoder()
+    with fp.open() as f:
+        buffer = f.read(_READ_CHUNK_SIZE)
+        pos = _skip_separators(buffer, 0)
+        if not buffer.startswith("[", pos):
+            raise ValueError(f"{fp} does not contain a JSON array.")
+        pos += 1
+        eof = False
+        while True:
+            pos = _skip_separators(buffer, pos)
+            if buffer.startswith("]", pos):
+                return
+            try:
+                center, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = f.read(_READ_CHUNK_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+            yield center
+
+
+def _skip_separators(buffer: str, pos: int) -> int:
+    # Skips whitespace, plus the commas between array elements.
+    while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+        pos += 1
+    return pos
@@ -0,0 +1,54 @@
+import json
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+import center_io
+from center_io import iter_centers, write_centers
+
+_CENTERS: list[dict[str, str | int]] = [
+    {"name": "96th Street Sangha", "page": 1, "Address": "275 W. 96th Street"},
+    {"name": "Dzogchen Community", "page": 1, "Notes and Events": "a, [b]\n\n“c”"},
+    {"name": "Zen Center", "page": 2},
+]
+
+
+@pytest.mark.parametrize("suffix", [".json", ".jsonl"])
+def test_round_trip(tmp_path: Path, suffix: str) -> None:
+    fp = tmp_path / f"centers{suffix}"
+    assert write_centers(fp, iter(_CENTERS)) == len(_CENTERS)
+    assert list(iter_centers(fp)) == _CENTERS
+
+
+def test_json_matches_json_dumps(tmp_path: Path) -> None:
+    fp = tmp_path / "centers.json"
+    write_centers(fp, iter(_CENTERS))
+    assert fp.read_text() == json.dumps(_CENTERS, indent=2)
+
+    write_centers(fp, iter([]))
+    assert fp.read_text() == json.dumps([], indent=2)
+    assert list(iter_centers(fp)) == []
+
+
+def test_json_reader_handles_chunk_boundaries(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    fp = tmp_path / "centers.json"
+    fp.write_text(json.dumps(_CENTERS * 10, indent=2))
+    monkeypatch.setattr(center_io, "_READ_CHUNK_SIZE", 7)
+    assert list(iter_centers(fp)) == _CENTERS * 10
+
+
+def test_jsonl_is_readable_while_writing(tmp_path: Path) -> None:
+    fp = tmp_path / "centers.jsonl"
+
+    def centers() -> Iterator[dict[str, str | int]]:
+        for i, center in enumerate(_CENTERS):
+            # By the time the writer asks for the next center, the earlier ones must
+            # already be visible to readers.
+            assert len(fp.read_text().splitlines()) == i
+            yield center
+
+    write_centers(fp, centers())
+    assert list(iter_centers(fp)) == _CENTERS
@@ -0,0 +1,192 @@
+import os
+import shutil
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from address import ADDRESS_FIELDS
+from center import KNOWN_KEY_NAMES
+
+# Stores centers as Parquet, for analysis: each key is its own typed column, so reading a
+# few columns only reads those columns, straight into Arrow arrays without decoding a single
+# dict, and pandas, DuckDB or Polars can load the file as is.
+#
+# The schema is fixed: `name`, `page`, then every key in `KNOWN_KEY_NAMES` and
+# `ADDRESS_FIELDS`, with any other key in the `extra` map, so that every file has the same
+# columns however many centers have each key. Columns with few distinct values are
+# dictionary-encoded, so a column like `Tradition` stores each value once per row group and
+# reads back as a pandas categorical.
+#
+# Centers are written in row groups of `_ROW_GROUP_SIZE`, so memory stays flat. Unlike
+# `.json`, a center's keys come back in schema order rather than the order they were
+# scraped, and keys without a value are left out.
+#
+# With `partition_by`, the centers are written as a Hive-style directory instead, e.g.
+# `buddhist_centers.parquet/page=3/...`, so reading one page or state skips the others'
+# files entirely.
+
+PARTITION_COLUMNS = ("page", "state")
+
+_ROW_GROUP_SIZE = 10_000
+
+_DICTIONARY_KEYS = frozenset({"Tradition", "Affiliation", "city", "state"})
+
+_VALUE_KEYS = (*sorted(KNOWN_KEY_NAMES), *ADDRESS_FIELDS)
+
+_FIELDS: list[pa.Field] = [
+    pa.field("name", pa.string(), nullable=False),
+    pa.field("page", pa.int32(), nullable=False),
+]
+for key in _VALUE_KEYS:
+    if key in _DICTIONARY_KEYS:
+        _FIELDS.append(pa.field(key, pa.dictionary(pa.int32(), pa.string())))
+    else:
+        _FIELDS.append(pa.field(key, pa.string()))
+_FIELDS.append(pa.field("extra", pa.map_(pa.string(), pa.string())))
+
+SCHEMA = pa.schema(_FIELDS)
+
+_COLUMN_KEYS = frozenset(SCHEMA.names) - {"extra"}
+
+
+def write_parquet(
+    fp: Path,
+    centers: Iterable[dict[str, str | int]],
+    *,
+    partition_by: str | None = None,
+) -> int:
+    # Like `write_centers`, writes to a temporary file or directory and only replaces `fp`
+    # once every center is written.
+    if partition_by is not None and partition_by not in PARTITION_COLUMNS:
+        raise ValueError(
+            f"Unknown partition column `{partition_by}`, expected one of "
+            f"{PARTITION_COLUMNS}."
+        )
+    tmp = fp.with_name(f".{fp.name}.tmp")
+    _remove(tmp)
+    count = 0
+
+    def batches() -> Iterator[pa.RecordBatch]:
+        nonlocal count
+        for batch in _record_batches(centers):
+            count += batch.num_rows
+            yield batch
+
+    if partition_by is None:
+        with pq.ParquetWriter(tmp, SCHEMA) as writer:
+            for batch in batches():
+                writer.write_batch(batch)
+    else:
+        # An empty dataset is an empty directory.
+        tmp.mkdir()
+        ds.write_dataset(
+            batches(),
+            tmp,
+            schema=SCHEMA,
+            format="parquet",
+            partitioning=[partition_by],
+            partitioning_flavor="hive",
+            max_rows_per_group=_ROW_GROUP_SIZE,
+        )
+    if fp.is_dir():
+        # `os.replace` can't replace a directory that isn't empty.
+        shutil.rmtree(fp)
+    os.replace(tmp, fp)
+    return count
+
+
+def read_table(fp: Path, columns: Iterable[str] | None = None) -> pa.Table:
+    # Reads `columns`, or every column, of a file or partitioned directory in page order.
+    # This is the fast path: nothing is converted to Python objects.
+    if not fp.exists():
+        raise FileNotFoundError(fp)
+    if fp.is_file():
+        return pq.read_table(fp, columns=list(columns) if columns else None)
+    wanted = list(columns) if columns else SCHEMA.names
+    partition_by = _partition_column(fp)
+    if partition_by is None:
+        return SCHEMA.empty_table().select(wanted)
+    # The partition column is only in the directory names, so give its type rather than
+    # inferring it, which fails when every value is null. It is read as plain strings,
+    # since Arrow can't yet sort dictionaries with nulls, and encoded again at the end.
+    partition_type = SCHEMA.field(partition_by).type
+    if pa.types.is_dictionary(partition_type):
+        partition_type = partition_type.value_type
+    partitioning = ds.partitioning(
+        pa.schema([(partition_by, partition_type)]), flavor="hive"
+    )
+    dataset = ds.dataset(fp, format="parquet", partitioning=partitioning)
+    # Partitions are read in the order of their directory names, where `page=10` comes
+    # before `page=2`, so sort by page. The sort is stable, so centers keep their order
+    # within each page.
+    read = list(dict.fromkeys([*wanted, "page"]))
+    table = dataset.to_table(columns=read).sort_by("page").select(wanted)
+    return table.cast(pa.schema([SCHEMA.field(name) for name in wanted]))
+
+
+def iter_parquet(fp: Path) -> Iterator[dict[str, str | int]]:
+    if fp.is_file():
+        for batch in pq.ParquetFile(fp).iter_batches(batch_size=_ROW_GROUP_SIZE):
+            yield from _batch_centers(batch)
+    else:
+        for batch in read_table(fp).to_batches(max_chunksize=_ROW_GROUP_SIZE):
+            yield from _batch_centers(batch)
+
+
+def _record_batches(
+    centers: Iterable[dict[str, str | int]],
+) -> Iterator[pa.RecordBatch]:
+    iterator = iter(centers)
+    while chunk := list(islice(iterator, _ROW_GROUP_SIZE)):
+        columns: dict[str, list[object]] = {name: [] for name in SCHEMA.names}
+        for center in chunk:
+            for key in _COLUMN_KEYS:
+                columns[key].append(center.get(key))
+            extra = [(k, str(v)) for k, v in center.items() if k not in _COLUMN_KEYS]
+            columns["extra"].append(extra or None)
+        yield pa.RecordBatch.from_pydict(columns, schema=SCHEMA)
+
+
+def _batch_centers(batch: pa.RecordBatch) -> Iterator[dict[str, str | int]]:
+    # Fills in the centers a column at a time, and only where the column has a value, so
+    # that the many keys each center doesn't have cost nothing. Going in schema order
+    # keeps each center's keys in schema order.
+    centers: list[dict[str, str | int]] = [{} for _ in range(batch.num_rows)]
+    for name, column in zip(batch.schema.names, batch.columns):
+        if column.null_count == len(column):
+            continue
+        rows: Iterable[Any] = range(len(column))
+        if column.null_count:
+            rows = pc.indices_nonzero(column.is_valid()).to_pylist()
+            column = column.drop_null()
+        values: list[Any] = column.to_pylist()
+        if name == "extra":
+            for i, extra in zip(rows, values):
+                centers[i].update(extra)
+        else:
+            for i, value in zip(rows, values):
+                centers[i][name] = value
+    yield from centers
+
+
+def _partition_column(fp: Path) -> str | None:
+    # The column that a directory written by `write_parquet` is partitioned by, from its
+    # subdirectories' names, e.g. `page=3`. `None` if there are none, as when it is empty.
+    for child in fp.iterdir():
+        column, sep, _ = child.name.partition("=")
+        if sep and child.is_dir():
+            return column
+    return None
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink(missing_ok=True)
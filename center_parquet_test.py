@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+
+import center_parquet  # noqa: E402
+from center_io import iter_centers, write_centers  # noqa: E402
+from center_parquet import read_table, write_parquet  # noqa: E402
+
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": "Chicago Zen Community",
+        "page": 1,
+        "Address": "Chicago IL",
+        "Tradition": "Mahayana, Rinzai Zen",
+        "city": "Chicago",
+        "state": "IL",
+    },
+    {
+        "name": "Harmony Zen Center",
+        "page": 1,
+        "Notes and Events": "a, [b]\n\n“c”",
+        "Tradition": "Mahayana, Rinzai/Soto Zen",
+        "street": "4635 North Racine Avenue",
+        "city": "Chicago",
+        "state": "IL",
+        "Dharma Name": "Not a known key",
+    },
+    {"name": "Rigpa Online", "page": 2},
+]
+_CENTERS += [
+    {"name": f"Center {page}", "page": page, "Tradition": "Theravada"}
+    for page in range(3, 12)
+]
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    fp = tmp_path / "centers.parquet"
+    assert write_centers(fp, iter(_CENTERS)) == len(_CENTERS)
+    assert list(iter_centers(fp)) == _CENTERS
+
+    write_centers(fp, iter([]))
+    assert list(iter_centers(fp)) == []
+
+
+def test_columns_are_typed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(center_parquet, "_ROW_GROUP_SIZE", 5)
+    fp = tmp_path / "centers.parquet"
+    write_centers(fp, _CENTERS)
+
+    table = read_table(fp, ["page", "Tradition", "state"])
+    assert table.column_names == ["page", "Tradition", "state"]
+    assert table.schema.field("page").type == pa.int32()
+    assert pa.types.is_dictionary(table.schema.field("Tradition").type)
+    assert table.column("Tradition").to_pylist()[:3] == [
+        "Mahayana, Rinzai Zen",
+        "Mahayana, Rinzai/Soto Zen",
+        None,
+    ]
+    assert table.column("state").null_count == len(_CENTERS) - 2
+    assert read_table(fp, ["extra"]).column("extra").to_pylist()[1] == [
+        ("Dharma Name", "Not a known key")
+    ]
+
+    metadata = pa.parquet.ParquetFile(fp).metadata
+    assert metadata.num_row_groups == 3
+    assert metadata.schema.to_arrow_schema() == center_parquet.SCHEMA
+
+
+@pytest.mark.parametrize("partition_by", center_parquet.PARTITION_COLUMNS)
+def test_partitioned(tmp_path: Path, partition_by: str) -> None:
+    fp = tmp_path / "centers.parquet"
+    assert write_parquet(fp, _CENTERS, partition_by=partition_by) == len(_CENTERS)
+    assert fp.is_dir()
+    assert (fp / f"{partition_by}={_CENTERS[0][partition_by]}").is_dir()
+    # Centers come back in page order, even though `page=10` sorts before `page=3`.
+    assert list(iter_centers(fp)) == _CENTERS
+
+    table = read_table(fp, [partition_by, "name"])
+    assert table.schema == pa.schema(
+        [center_parquet.SCHEMA.field(partition_by), center_parquet.SCHEMA.field("name")]
+    )
+
+    # Rewriting replaces the whole directory.
+    write_parquet(fp, _CENTERS[2:3], partition_by=partition_by)
+    assert list(iter_centers(fp)) == _CENTERS[2:3]
+    write_parquet(fp, [], partition_by=partition_by)
+    assert list(iter_centers(fp)) == []
+    assert not list(tmp_path.glob(".*"))
+
+
+def test_unknown_partition_column(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Unknown partition column"):
+        write_parquet(tmp_path / "centers.parquet", _CENTERS, partition_by="name")
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from center import Center
+
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": "Harmony Zen Center",
+        "page": 25,
+        "Address": "4635 North Racine Avenue, 2nd Floor, Chicago, IL 60640",
+        "Tradition": "Mahayana, Rinzai/Soto Zen",
+        "Community Dharma Leader": "Jane Doe",
+        "street": "4635 North Racine Avenue, 2nd Floor",
+        "city": "Chicago",
+        "state": "IL",
+        "zip": "60640",
+    },
+    {"name": "Rigpa Online", "page": 50},
+    {"name": "Unusual", "page": 50, "Not A Known Key": "x"},
+]
+
+
+def test_round_trip() -> None:
+    for center in _CENTERS:
+        compact = Center.from_dict(center)
+        assert json.dumps(compact.to_dict()) == json.dumps(center)
+        assert compact == center
+        assert list(compact) == list(center)
+        assert compact["page"] == center["page"]
+        assert compact.get("Phone") is None
+        with pytest.raises(KeyError):
+            compact["Phone"]
+
+
+def test_centers_share_keys() -> None:
+    # Decode separately, so that the key strings start out as different objects.
+    first, second = (
+        Center.from_dict(json.loads(json.dumps(_CENTERS[0]))) for _ in "ab"
+    )
+    assert first._keys is second._keys
+    assert first["Tradition"] is second["Tradition"]
+    assert not hasattr(first, "__dict__")
+
+
+def test_name_and_page_come_first() -> None:
+    with pytest.raises(ValueError):
+        Center.from_dict({"page": 1, "name": "Out of order"})
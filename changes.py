@@ -0,0 +1,113 @@
+import datetime
+import hashlib
+import json
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+# Detects which centers were added, removed or modified when a page is scraped again.
+#
+# Each center is identified by its page and name, and fingerprinted by a hash of all of its
+# fields. The hashes from the last scrape are kept in the checkpoint, so the previous
+# centers don't need to be rehashed.
+
+CHANGE_KINDS = ("added", "removed", "modified")
+
+
+def content_hash(html: str) -> str:
+    return hashlib.sha256(html.encode()).hexdigest()
+
+
+def center_hashes(centers: Iterable[Mapping[str, str | int]]) -> dict[str, str]:
+    # Maps each center's name to the hash of its fields. Centers are only compared within
+    # a page, so a short hash is plenty.
+    hashes: dict[str, str] = {}
+    for center in centers:
+        encoded = json.dumps(center, sort_keys=True).encode()
+        hashes[_unique_name(str(center["name"]), hashes)] = hashlib.sha256(
+            encoded
+        ).hexdigest()[:16]
+    return hashes
+
+
+@dataclass(frozen=True)
+class CenterChange:
+    kind: str
+    page_number: int
+    name: str
+    # The center as it is now, or `None` if it was removed.
+    center: dict[str, str | int] | None
+
+
+def diff_page(
+    page_number: int,
+    old_hashes: Mapping[str, str],
+    new_centers: list[dict[str, str | int]],
+    new_hashes: Mapping[str, str],
+) -> list[CenterChange]:
+    # `new_hashes` must be `center_hashes(new_centers)`.
+    new_by_name = dict(zip(new_hashes, new_centers))
+    changes = []
+    for name, new_hash in new_hashes.items():
+        old_hash = old_hashes.get(name)
+        if old_hash != new_hash:
+            kind = "added" if old_hash is None else "modified"
+            changes.append(CenterChange(kind, page_number, name, new_by_name[name]))
+    changes.extend(
+        CenterChange("removed", page_number, name, None)
+        for name in old_hashes
+        if name not in new_hashes
+    )
+    return changes
+
+
+class Changelog:
+    # Appends one JSON line per changed center. Every change from one run shares the same
+    # `run` timestamp, so consumers can apply a run's changes together.
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.run = datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="seconds"
+        )
+        self.counts = dict.fromkeys(CHANGE_KINDS, 0)
+        self._file = path.open("a")
+
+    def __enter__(self) -> "Changelog":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def record(self, changes: Iterable[CenterChange]) -> None:
+        for change in changes:
+            line: dict[str, object] = {
+                "run": self.run,
+                "change": change.kind,
+                "page": change.page_number,
+                "name": change.name,
+            }
+            if change.center is not None:
+                line["center"] = change.center
+            self._file.write(json.dumps(line) + "\n")
+            self.counts[change.kind] += 1
+        self._file.flush()
+
+
+def _unique_name(name: str, seen: Mapping[str, str]) -> str:
+    # A page may list two centers with the same name, so number the repeats.
+    unique = name
+    n = 2
+    while unique in seen:
+        unique = f"{name} #{n}"
+        n += 1
+    return unique
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from changes import CenterChange, Changelog, center_hashes, diff_page
+
+_OLD: list[dict[str, str | int]] = [
+    {"name": "Kept", "page": 3, "Phone": "1"},
+    {"name": "Edited", "page": 3, "Phone": "2"},
+    {"name": "Gone", "page": 3},
+    {"name": "Twice", "page": 3, "Phone": "3"},
+]
+
+
+def test_center_hashes_number_repeated_names() -> None:
+    hashes = center_hashes([*_OLD, {"name": "Twice", "page": 3, "Phone": "4"}])
+    assert list(hashes) == ["Kept", "Edited", "Gone", "Twice", "Twice #2"]
+    assert hashes["Twice"] != hashes["Twice #2"]
+    # Key order doesn't matter.
+    assert center_hashes([{"page": 3, "name": "Kept", "Phone": "1"}]) == {
+        "Kept": hashes["Kept"]
+    }
+
+
+def test_diff_page() -> None:
+    new: list[dict[str, str | int]] = [
+        {"name": "Kept", "page": 3, "Phone": "1"},
+        {"name": "Edited", "page": 3, "Phone": "20"},
+        {"name": "Twice", "page": 3, "Phone": "3"},
+        {"name": "Twice", "page": 3, "Phone": "5"},
+    ]
+    assert diff_page(3, center_hashes(_OLD), new, center_hashes(new)) == [
+        CenterChange("modified", 3, "Edited", new[1]),
+        CenterChange("added", 3, "Twice #2", new[3]),
+        CenterChange("removed", 3, "Gone", None),
+    ]
+    assert diff_page(3, center_hashes(_OLD), _OLD, center_hashes(_OLD)) == []
+
+
+def test_changelog(tmp_path: Path) -> None:
+    path = tmp_path / "changelog.jsonl"
+    new: list[dict[str, str | int]] = [{"name": "New", "page": 1}]
+    with Changelog(path) as changelog:
+        changelog.record(diff_page(1, {}, new, center_hashes(new)))
+        changelog.record(diff_page(2, center_hashes(_OLD[2:3]), [], {}))
+    assert changelog.counts == {"added": 1, "removed": 1, "modified": 0}
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [
+        {
+            "run": changelog.run,
+            "change": "added",
+            "page": 1,
+            "name": "New",
+            "center": new[0],
+        },
+        {"run": changelog.run, "change": "removed", "page": 2, "name": "Gone"},
+    ]
@@ -0,0 +1,249 @@
+import json
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, replace
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+
+from fetch import Validators
+
+
+@dataclass(frozen=True)
+class PageRecord:
+    page_number: int
+    url: str
+    validators: Validators
+    # Set if the most recent attempt at the page failed.
+    error: str | None = None
+    # The hash of the page's HTML from the last time the page was scraped successfully.
+    # See `changes.py`.
+    content_hash: str | None = None
+    # Where the line with the centers from the last time the page was scraped successfully
+    # starts in the file, if it ever was. See `CheckpointStore.read_saved`.
+    saved_offset: int | None = None
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    @property
+    def has_centers(self) -> bool:
+        return self.saved_offset is not None
+
+
+@dataclass(frozen=True)
+class SavedPage:
+    centers: list[dict[str, str | int]]
+    # The hash of each center by name. See `changes.py`.
+    center_hashes: dict[str, str] | None = None
+
+
+class CheckpointStore:
+    # Records each page as soon as it is scraped, so that a crash only loses the pages that
+    # were in flight, and so that resuming only needs to refetch missing or failed pages.
+    #
+    # The file is append-only JSON Lines, with one line per page attempt. When loading, the
+    # latest line for a page wins, except that a failure keeps the centers from the last
+    # success.
+    #
+    # Only each page's metadata is held in memory, along with where its centers are in the
+    # file, so that memory stays flat however many pages there are. The centers are read
+    # back from the file when they are needed, e.g. to stream them to the output. A record
+    # points into the file as it is, so it can't be read from after `compact`.
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._records: dict[int, PageRecord] = {}
+        if path.exists():
+            for offset, line in _read_lines(path):
+                _apply(self._records, line, offset)
+        self._file = path.open("ab")
+        # Don't append to a line that was truncated by a crash.
+        if self._file.tell() and not _ends_with_newline(path):
+            self._file.write(b"\n")
+
+    def __enter__(self) -> "CheckpointStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+
+    def records(self) -> dict[int, PageRecord]:
+        return dict(self._records)
+
+    def pages_to_resume(self, page_numbers: Iterable[int]) -> list[int]:
+        return [
+            page_number
+            for page_number in page_numbers
+            if (record := self._records.get(page_number)) is None
+            or record.failed
+            or not record.has_centers
+        ]
+
+    def record_page(
+        self,
+        page_number: int,
+        url: str,
+        centers: list[dict[str, str | int]],
+        validators: Validators,
+        *,
+        content_hash: str | None = None,
+        center_hashes: dict[str, str] | None = None,
+    ) -> None:
+        self._append(
+            _success_line(
+                page_number,
+                url,
+                centers,
+                validators,
+                content_hash=content_hash,
+                center_hashes=center_hashes,
+            )
+        )
+
+    def record_failure(self, page_number: int, url: str, error: str) -> None:
+        self._append(_failure_line(page_number, url, error))
+
+    def read_saved(self, record: PageRecord) -> SavedPage | None:
+        # The centers from the last time the record's page was scraped successfully.
+        if record.saved_offset is None:
+            return None
+        with self.path.open("rb") as f:
+            return _saved_page(_read_line(f, record.saved_offset))
+
+    def centers(self, page_numbers: Iterable[int]) -> Iterator[dict[str, str | int]]:
+        # Reads one page at a time from the file.
+        with self.path.open("rb") as f:
+            for page_number in sorted(page_numbers):
+                record = self._records.get(page_number)
+                if record is not None and record.saved_offset is not None:
+                    yield from _saved_page(_read_line(f, record.saved_offset)).centers
+
+    def compact(self) -> None:
+        # Rewrite the file with only what is needed to rebuild the current records, so that
+        # it doesn't grow forever across runs. Each page's last success is copied as is.
+        with self._lock:
+            self._file.close()
+            tmp = self.path.with_name(f".{self.path.name}.tmp")
+            records: dict[int, PageRecord] = {}
+            with self.path.open("rb") as old, tmp.open("wb") as f:
+                for page_number, record in sorted(self._records.items()):
+                    if record.saved_offset is not None:
+                        old.seek(record.saved_offset)
+                        saved = old.readline()
+                        _apply(records, json.loads(saved), f.tell())
+                        f.write(saved)
+                    if record.error is not None:
+                        line = _failure_line(page_number, record.url, record.error)
+                        _apply(records, line, f.tell())
+                        f.write(_encode(line))
+            os.replace(tmp, self.path)
+            self._records = records
+            self._file = self.path.open("ab")
+
+    def _append(self, line: dict[str, object]) -> None:
+        with self._lock:
+            _apply(self._records, line, self._file.tell())
+            self._file.write(_encode(line))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+
+def _success_line(
+    page_number: int,
+    url: str,
+    centers: list[dict[str, str | int]],
+    validators: Validators,
+    *,
+    content_hash: str | None,
+    center_hashes: dict[str, str] | None,
+) -> dict[str, object]:
+    line: dict[str, object] = {"page": page_number, "url": url, "centers": centers}
+    if validators_json := validators.to_json():
+        line["validators"] = validators_json
+    if content_hash is not None:
+        line["content_hash"] = content_hash
+    if center_hashes is not None:
+        line["center_hashes"] = center_hashes
+    return line
+
+
+def _failure_line(page_number: int, url: str, error: str) -> dict[str, object]:
+    return {"page": page_number, "url": url, "error": error}
+
+
+def _encode(line: dict[str, object]) -> bytes:
+    # `json.dumps` escapes anything that isn't ASCII, so this is never split mid-character.
+    return (json.dumps(line) + "\n").encode()
+
+
+def _read_lines(path: Path) -> Iterator[tuple[int, dict[str, object]]]:
+    # Yields each line with the offset it starts at.
+    offset = 0
+    with path.open("rb") as f:
+        for raw in f:
+            try:
+                yield offset, json.loads(raw)
+            except json.JSONDecodeError:
+                # The last line may be truncated if we crashed while writing it.
+                pass
+            offset += len(raw)
+
+
+def _read_line(f: BinaryIO, offset: int) -> dict[str, object]:
+    f.seek(offset)
+    return json.loads(f.readline())
+
+
+def _saved_page(line: dict[str, object]) -> SavedPage:
+    centers = line["centers"]
+    center_hashes = line.get("center_hashes")
+    assert isinstance(centers, list)
+    assert center_hashes is None or isinstance(center_hashes, dict)
+    return SavedPage(centers, center_hashes)
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _apply(
+    records: dict[int, PageRecord], line: dict[str, object], offset: int
+) -> None:
+    # `offset` is where `line` starts in the file.
+    page_number = line["page"]
+    url = line["url"]
+    assert isinstance(page_number, int) and isinstance(url, str)
+    if "error" in line:
+        previous = records.get(page_number)
+        if previous is None:
+            records[page_number] = PageRecord(
+                page_number, url, Validators(), str(line["error"])
+            )
+        else:
+            records[page_number] = replace(previous, url=url, error=str(line["error"]))
+        return
+    validators = line.get("validators", {})
+    content_hash = line.get("content_hash")
+    assert isinstance(line["centers"], list) and isinstance(validators, dict)
+    assert content_hash is None or isinstance(content_hash, str)
+    records[page_number] = PageRecord(
+        page_number,
+        url,
+        Validators.from_json(validators),
+        content_hash=content_hash,
+        saved_offset=offset,
+    )
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+from checkpoint import CheckpointStore, SavedPage
+from fetch import Validators
+
+_CENTERS: dict[int, list[dict[str, str | int]]] = {
+    page_number: [{"name": f"Center {page_number}", "page": page_number}]
+    for page_number in range(1, 6)
+}
+
+
+def _url(page_number: int) -> str:
+    return f"http://x/?offset={(page_number - 1) * 25}"
+
+
+def test_resume_only_refetches_missing_and_failed_pages(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    with CheckpointStore(path) as store:
+        for page_number in (1, 2, 4):
+            store.record_page(
+                page_number, _url(page_number), _CENTERS[page_number], Validators()
+            )
+        store.record_failure(5, _url(5), "ConnectionError: boom")
+
+    store = CheckpointStore(path)
+    assert store.pages_to_resume(range(1, 6)) == [3, 5]
+    assert [c["name"] for c in store.centers(range(1, 6))] == [
+        "Center 1",
+        "Center 2",
+        "Center 4",
+    ]
+
+
+def test_failure_keeps_last_successful_centers(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    validators = Validators(etag='"v1"')
+    with CheckpointStore(path) as store:
+        store.record_page(1, _url(1), _CENTERS[1], validators)
+        store.record_failure(1, _url(1), "HTTPError: 503")
+
+    store = CheckpointStore(path)
+    record = store.records()[1]
+    assert record.failed
+    assert store.read_saved(record) == SavedPage(_CENTERS[1])
+    assert record.validators == validators
+
+
+def test_tolerates_truncated_last_line(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    with CheckpointStore(path) as store:
+        store.record_page(1, _url(1), _CENTERS[1], Validators())
+    # Simulate a crash halfway through writing page 2.
+    with path.open("a") as f:
+        f.write('{"page": 2, "url": "http://x/?offset=25", "cen')
+
+    with CheckpointStore(path) as store:
+        assert store.pages_to_resume(range(1, 3)) == [2]
+        store.record_page(2, _url(2), _CENTERS[2], Validators())
+    store = CheckpointStore(path)
+    assert store.pages_to_resume(range(1, 3)) == []
+    # The centers are read back from where each page's line starts.
+    assert list(store.centers([1, 2])) == _CENTERS[1] + _CENTERS[2]
+
+
+def test_compact(tmp_path: Path) -> None:
+    path = tmp_path / "checkpoint.jsonl"
+    with CheckpointStore(path) as store:
+        for _ in range(3):
+            store.record_page(1, _url(1), _CENTERS[1], Validators(etag='"v1"'))
+        store.record_failure(2, _url(2), "Timeout")
+        store.compact()
+        before = store.records()
+        store.record_page(3, _url(3), _CENTERS[3], Validators())
+
+    assert len(path.read_text().splitlines()) == 3
+    store = CheckpointStore(path)
+    after = store.records()
+    assert {k: after[k] for k in before} == before
+    assert list(store.centers([1, 2, 3])) == _CENTERS[1] + _CENTERS[3]
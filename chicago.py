@@ -1,21 +1,60 @@
-import json
+import argparse
+from argparse import ArgumentParser
 from pathlib import Path
 
+from center_io import FORMATS, output_path, write_centers
+from geo import MissingGazetteerError, Point, add_gazetteer_argument, centers_near
+from query import CenterIndex
+
+# Downtown Chicago.
+_CHICAGO = Point(41.8781, -87.6298)
+
 
 def main() -> None:
-    all_centers = json.loads(Path("buddhist_centers.json").read_text())
-    result = [
-        center
-        for center in all_centers
-        if (
-            any(kw in center["name"] for kw in _KEYWORDS)
-            or any(kw in center.get("address", "") for kw in _KEYWORDS)
-        )
-    ]
-    Path("chicago_centers.json").write_text(json.dumps(result, indent=2))
-
-
-_KEYWORDS = frozenset(["IL", "Illinois", "Chi", "Chicago"])
+    parser = create_parser()
+    args = parser.parse_args()
+    source = Path(args.input)
+    if args.radius_km is not None:
+        # Unlike the state, this includes the suburbs in Indiana and Wisconsin.
+        try:
+            centers = centers_near(
+                source, _CHICAGO, args.radius_km, gazetteer=Path(args.gazetteer)
+            )
+        except MissingGazetteerError as e:
+            parser.error(str(e))
+        write_centers(output_path("chicago_centers", args.format), centers)
+        return
+    # Every center in Illinois, and those with Chicago in their name, since some, like
+    # "Rigpa Chicago", have no address to find the state in.
+    centers = CenterIndex.load(source).query_any({"state": "IL"}, {"name": "chicago"})
+    write_centers(output_path("chicago_centers", args.format), centers)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Whether to write `chicago_centers.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    parser.add_argument(
+        "--radius-km",
+        type=float,
+        help="Write the centers within this distance of downtown Chicago, nearest "
+        "first, or in page order for `.sqlite`, rather than every center in Illinois "
+        "or named after Chicago. Requires `--gazetteer` for addresses that aren't in "
+        "the geocode cache yet.",
+    )
+    add_gazetteer_argument(parser)
+    return parser
 
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+import threading
+from collections.abc import Callable, Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# A local HTTP server for the tests that need to control each response. Tests that only
+# need a stand-in for the directory use `replay.ReplayServer` instead.
+
+# Receives the request handler and the 1-based number of the request, and returns the
+# status code, extra headers and body to respond with.
+Responder = Callable[[BaseHTTPRequestHandler, int], tuple[int, dict[str, str], str]]
+
+
+class LocalServer:
+    def __init__(self, responder: Responder) -> None:
+        self.responder = responder
+        # The path and client port of each request, in the order they arrived.
+        self.paths: list[str] = []
+        self.client_ports: list[int] = []
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Needed for keep-alive.
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.paths.append(self.path)
+                    server.client_ports.append(self.client_address[1])
+                    request_number = len(server.client_ports)
+                status, headers, body = server.responder(self, request_number)
+                encoded = body.encode()
+                self.send_response(status)
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(encoded)))
+                self.end_headers()
+                self.wfile.write(encoded)
+
+            def log_message(self, *args: object) -> None:
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_port}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def serve() -> Iterator[Callable[[Responder], LocalServer]]:
+    servers: list[LocalServer] = []
+
+    def start(responder: Responder) -> LocalServer:
+        server = LocalServer(responder)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
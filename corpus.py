@@ -0,0 +1,110 @@
+import json
+from collections.abc import Iterable, Iterator
+from html import escape
+from pathlib import Path
+
+from address import ADDRESS_FIELDS
+from page_cache import PageCache
+from scrape import page_url
+
+# Regenerates buddhanet.info directory pages from already-scraped centers, following the
+# markup described in the README. This gives tests and benchmarks a realistic corpus of
+# whole pages without hitting the network.
+
+_PAGER_URL = "country.php?country_id=2"
+
+
+def load_centers_by_page(
+    fp: Path = Path("buddhist_centers.json"),
+) -> dict[int, list[dict[str, str | int]]]:
+    result: dict[int, list[dict[str, str | int]]] = {}
+    for center in json.loads(fp.read_text()):
+        result.setdefault(center["page"], []).append(center)
+    return result
+
+
+def render_page(centers: Iterable[dict[str, str | int]], *, page_count: int = 1) -> str:
+    entries = "\n".join(_render_entry(center) for center in centers)
+    return (
+        "<html><head><title>World Buddhist Directory</title></head><body>\n"
+        f"{entries}\n"
+        f"{_render_pager(page_count)}"
+        "</body></html>"
+    )
+
+
+def iter_corpus(
+    fp: Path = Path("buddhist_centers.json"),
+    *,
+    cache: PageCache | None = None,
+) -> Iterator[tuple[int, str]]:
+    # Yields `(page_number, html)` for every page: the real HTML if the page is in
+    # `cache`, else a page regenerated from `fp`.
+    centers_by_page = load_centers_by_page(fp)
+    page_count = max(centers_by_page, default=1)
+    for page_number, centers in sorted(centers_by_page.items()):
+        cached = cache.get(page_url(page_number)) if cache is not None else None
+        yield page_number, (
+            cached.html
+            if cached is not None
+            else render_page(centers, page_count=page_count)
+        )
+
+
+def _render_pager(page_count: int) -> str:
+    # Like the real pages, links to every page by its offset, unless there is only one.
+    if page_count <= 1:
+        return ""
+    links = " ".join(
+        f'<a href="{escape(page_url(page_number, base_url=_PAGER_URL))}">'
+        f"{page_number}</a>"
+        for page_number in range(1, page_count + 1)
+    )
+    return f'<p class="pager">{links}</p>\n'
+
+
+def _render_entry(center: dict[str, str | int]) -> str:
+    details = []
+    notes: str | None = None
+    for key, value in center.items():
+        if key in ("name", "page") or key in ADDRESS_FIELDS:
+            continue
+        value = str(value)
+        if key == "Notes and Events":
+            notes = value
+            continue
+        details.append(
+            f"<strong>{escape(key)}:</strong> {_render_value(key, value)}<br>"
+        )
+        if key == "Address":
+            details.append(
+                f'<strong>Find on:</strong> <a href="http://mapof.it/{escape(value)}" '
+                'target="_blank"><img align="absmiddle" src="images/map.gif" '
+                'border="0" style="margin-top:2px"></a><br>'
+            )
+
+    name = f'<p class="entryName">{escape(str(center["name"]))}</p>'
+    if notes is None:
+        return (
+            f'{name}\n<p class="entryDetail">\n' + "\n".join(details) + "\n</p>\n<hr>"
+        )
+
+    # Like the real pages, the details paragraph is closed right after the `Notes and
+    # Events` key, and each paragraph of the notes follows it as a sibling.
+    details.append("<strong>Notes and Events:</strong></p>")
+    paragraphs = [escape(p) for p in notes.split("\n\n") if p]
+    desc = (
+        f'<p class="entryDesc">{paragraphs[0]}</p>\n'
+        + "".join(f"<p>{p}</p>\n" for p in paragraphs[1:])
+        if paragraphs
+        else ""
+    )
+    return f'{name}\n<p class="entryDetail">\n' + "\n".join(details) + f"\n{desc}<hr>"
+
+
+def _render_value(key: str, value: str) -> str:
+    if key == "E-mail":
+        return f'<a href="mailto:{escape(value)}">{escape(value)}</a>'
+    if key == "Website":
+        return f'<a href="{escape(value)}">{escape(value)}</a>'
+    return escape(value)
@@ -0,0 +1,361 @@
+import argparse
+import collections
+import contextlib
+import functools
+import itertools
+import multiprocessing
+import re
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from tqdm import tqdm
+
+from center_io import FORMATS, output_path, write_centers
+from checkpoint import CheckpointStore, PageRecord
+from fetch import Fetcher, Validators
+from metrics import RunMetrics
+from page_cache import PageCache
+from scrape import (
+    CrawlStats,
+    FetchedPage,
+    ScrapedPage,
+    add_fetch_arguments,
+    centers_in_page_order,
+    checkpoint_pages,
+    create_cache,
+    create_fetcher,
+    create_metrics,
+    discover_page_count,
+    map_in_order,
+    page_url,
+    parse_fetched_page,
+    try_fetch_page,
+    write_metrics,
+)
+
+# Crawls several countries of the World Buddhist Directory in one run.
+#
+# The first page of every country is fetched up front, to read how many pages the country
+# has from its pagination links. Then every remaining `(country, page)` is fetched through
+# one shared pool of `--concurrency` threads, with one rate limiter, so the crawl is as
+# polite to buddhanet.info as a single-country scrape, however many countries there are.
+#
+# Each country is its own partition, with its own output and checkpoint under
+# `--output-dir`, so crawling a few `--countries` only rewrites their partitions.
+
+_DIRECTORY_URL = "http://www.buddhanet.info/wbd/"
+
+# The `country_id` in a link to a country's listing.
+_COUNTRY_LINK = re.compile(r"""href=["'][^"']*country\.php\?country_id=(\d+)""")
+
+
+@dataclass
+class _Partition:
+    country_id: int
+    output: Path
+    checkpoints: CheckpointStore
+    previous_records: dict[int, PageRecord]
+    page_numbers: list[int]
+    page_count: int = 1
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fetcher = create_fetcher(args)
+    cache = create_cache(args)
+    stats = CrawlStats()
+    metrics = create_metrics(args)
+    with (
+        fetcher,
+        cache or contextlib.nullcontext(),
+        ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as executor,
+    ):
+        country_ids = args.countries or discover_country_ids(
+            args.directory_url, fetcher=fetcher
+        )
+        partitions = {
+            country_id: _open_partition(country_id, output_dir, format=args.format)
+            for country_id in country_ids
+        }
+        first_pages = _fetch_first_pages(
+            partitions.values(),
+            executor=executor,
+            fetcher=fetcher,
+            cache=cache,
+            directory_url=args.directory_url,
+        )
+        for partition, first_page in zip(partitions.values(), first_pages):
+            partition.page_count = _page_count(first_page, partition)
+            all_page_numbers = range(1, partition.page_count + 1)
+            partition.page_numbers = (
+                # Page 1 was just fetched anyway, so always keep it.
+                sorted({1, *partition.checkpoints.pages_to_resume(all_page_numbers)})
+                if args.reuse
+                else list(all_page_numbers)
+            )
+        pages = crawl_pages(
+            partitions.values(),
+            first_pages=first_pages,
+            executor=executor,
+            fetcher=fetcher,
+            cache=cache,
+            directory_url=args.directory_url,
+            parser=args.parser,
+            parse_workers=args.parse_workers,
+            parse_queue_size=args.parse_queue_size,
+            concurrency=args.concurrency,
+        )
+        total = sum(len(partition.page_numbers) for partition in partitions.values())
+        for country_id, country_pages in itertools.groupby(
+            tqdm(pages, total=total, unit="page"), key=lambda page: page[0]
+        ):
+            _write_partition(
+                partitions[country_id],
+                (page for _, page in country_pages),
+                stats=stats,
+                metrics=metrics,
+            )
+    if metrics is not None:
+        write_metrics(metrics, args)
+
+    elapsed = time.perf_counter() - stats.start
+    print(
+        f"Scraped {total} pages from {len(partitions)} countries in {elapsed:.1f}s "
+        f"({total / elapsed:.2f} pages/sec, {stats.not_modified} unchanged since the "
+        "last run)"
+    )
+    for partition in partitions.values():
+        print(
+            f"Country {partition.country_id}: {partition.page_count} pages in "
+            f"{partition.output}"
+        )
+    if stats.failed:
+        print(
+            f"Failed to scrape {len(stats.failed)} pages. Rerun with `--reuse` to retry "
+            "only those pages."
+        )
+
+
+def country_url(country_id: int, *, directory_url: str = _DIRECTORY_URL) -> str:
+    return f"{directory_url}country.php?country_id={country_id}"
+
+
+def discover_country_ids(directory_url: str, *, fetcher: Fetcher) -> list[int]:
+    # Every country is linked from the directory's front page.
+    html = fetcher.fetch(directory_url).text or ""
+    country_ids = sorted(
+        {int(country_id) for country_id in _COUNTRY_LINK.findall(html)}
+    )
+    if not country_ids:
+        raise ValueError(f"Found no links to countries on {directory_url}.")
+    return country_ids
+
+
+def crawl_pages(
+    partitions: Iterable[_Partition],
+    *,
+    first_pages: list[FetchedPage],
+    executor: ThreadPoolExecutor,
+    fetcher: Fetcher,
+    cache: PageCache | None = None,
+    directory_url: str = _DIRECTORY_URL,
+    parser: str = "html.parser",
+    parse_workers: int = 0,
+    parse_queue_size: int | None = None,
+    concurrency: int = 1,
+) -> Iterator[tuple[int, ScrapedPage]]:
+    # Yields `(country_id, page)` for every page of every partition, country by country
+    # and in page order. The pages are fetched through `executor`, up to `concurrency` at
+    # a time, so the next country's pages are already being fetched while the last pages
+    # of the previous one finish.
+    partitions = list(partitions)
+    first_pages_by_country = {
+        partition.country_id: first_page
+        for partition, first_page in zip(partitions, first_pages)
+    }
+    jobs = [
+        (partition.country_id, page_number)
+        for partition in partitions
+        for page_number in partition.page_numbers
+    ]
+    validators = {
+        partition.country_id: _known_validators(partition.previous_records)
+        for partition in partitions
+    }
+
+    def fetch(job: tuple[int, int]) -> tuple[int, FetchedPage]:
+        country_id, page_number = job
+        if page_number == 1:
+            return country_id, first_pages_by_country[country_id]
+        base_url = country_url(country_id, directory_url=directory_url)
+        return country_id, try_fetch_page(
+            page_url(page_number, base_url=base_url),
+            page_number=page_number,
+            fetcher=fetcher,
+            cache=cache,
+            validators=validators[country_id].get(page_number),
+        )
+
+    if parse_workers <= 0:
+
+        def scrape(job: tuple[int, int]) -> tuple[int, ScrapedPage]:
+            return _parse_country_page(fetch(job), parser=parser)
+
+        scraped = map_in_order(
+            executor, scrape, jobs, max_in_flight=max(concurrency, 1)
+        )
+        with contextlib.closing(scraped):
+            yield from scraped
+        return
+    fetched = map_in_order(executor, fetch, jobs, max_in_flight=max(concurrency, 1))
+    # As in `scrape_pages`, stop fetching as soon as parsing fails or the caller stops.
+    with (
+        contextlib.closing(fetched),
+        ProcessPoolExecutor(
+            max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as parse_executor,
+    ):
+        parsed = map_in_order(
+            parse_executor,
+            functools.partial(_parse_country_page, parser=parser),
+            fetched,
+            max_in_flight=parse_queue_size or 2 * parse_workers,
+        )
+        with contextlib.closing(parsed):
+            yield from parsed
+
+
+def _parse_country_page(
+    job: tuple[int, FetchedPage], *, parser: str
+) -> tuple[int, ScrapedPage]:
+    # This runs in the parser processes, so it must be a top-level function.
+    country_id, page = job
+    return country_id, parse_fetched_page(page, parser=parser)
+
+
+def _open_partition(country_id: int, output_dir: Path, *, format: str) -> _Partition:
+    checkpoints = CheckpointStore(output_dir / f"country_{country_id}.checkpoint.jsonl")
+    return _Partition(
+        country_id,
+        output_path(str(output_dir / f"country_{country_id}"), format),
+        checkpoints,
+        checkpoints.records(),
+        page_numbers=[],
+    )
+
+
+def _fetch_first_pages(
+    partitions: Iterable[_Partition],
+    *,
+    executor: ThreadPoolExecutor,
+    fetcher: Fetcher,
+    cache: PageCache | None,
+    directory_url: str,
+) -> list[FetchedPage]:
+    def fetch(partition: _Partition) -> FetchedPage:
+        record = partition.previous_records.get(1)
+        return try_fetch_page(
+            page_url(
+                1,
+                base_url=country_url(partition.country_id, directory_url=directory_url),
+            ),
+            page_number=1,
+            fetcher=fetcher,
+            cache=cache,
+            validators=(record.validators if record and record.has_centers else None),
+        )
+
+    return list(executor.map(fetch, partitions))
+
+
+def _page_count(first_page: FetchedPage, partition: _Partition) -> int:
+    if first_page.html is not None:
+        return discover_page_count(first_page.html) or 1
+    # The first page failed, or is unchanged since the last run. Either way, the country
+    # likely still has as many pages as it did then, and the output must keep them all.
+    return max(partition.previous_records, default=1)
+
+
+def _known_validators(records: Mapping[int, PageRecord]) -> dict[int, Validators]:
+    # Only revalidate pages whose centers we still have, since a `304` means reusing them.
+    return {
+        page_number: record.validators
+        for page_number, record in records.items()
+        if record.has_centers
+    }
+
+
+def _write_partition(
+    partition: _Partition,
+    pages: Iterable[ScrapedPage],
+    *,
+    stats: CrawlStats,
+    metrics: RunMetrics | None = None,
+) -> None:
+    with partition.checkpoints as checkpoints:
+        scraped_page_numbers = checkpoint_pages(
+            pages,
+            checkpoints=checkpoints,
+            previous_records=partition.previous_records,
+            stats=stats,
+            metrics=metrics,
+        )
+        write_centers(
+            partition.output,
+            centers_in_page_order(
+                range(1, partition.page_count + 1),
+                scraped_page_numbers,
+                scraped=set(partition.page_numbers),
+                checkpoints=checkpoints,
+            ),
+        )
+        # Make sure every page of the country was checkpointed before moving on.
+        collections.deque(scraped_page_numbers, maxlen=0)
+        checkpoints.compact()
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--countries",
+        type=int,
+        nargs="+",
+        help="The `country_id`s to crawl. Defaults to every country linked from "
+        "`--directory-url`.",
+    )
+    parser.add_argument(
+        "--directory-url",
+        default=_DIRECTORY_URL,
+        help="The World Buddhist Directory, whose front page links to every country.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="countries",
+        help="Where to write each country's centers, as `country_<id>.<format>`, next "
+        "to its checkpoint.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="The format of each country's output, as for `scrape.py`.",
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        default=False,
+        help="Only scrape the pages of each country that are missing from its "
+        "checkpoint or that failed last time.",
+    )
+    add_fetch_arguments(parser)
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import json
+import sys
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import crawl
+from center_io import iter_centers
+from conftest import LocalServer, Responder
+
+# Country 2 has three pages, and country 7 only one, so it has no pagination links.
+_PAGE_COUNTS = {2: 3, 7: 1}
+
+
+def _canned_page(country_id: int, offset: int) -> str:
+    entries = "\n".join(f"""<p class="entryName">Center {country_id}-{offset + i}</p>
+<p class="entryDetail">
+<strong>Tradition:</strong> Tradition {offset + i}<br>
+</p>
+<hr>""" for i in range(2))
+    links = " ".join(
+        f'<a href="country.php?country_id={country_id}&amp;offset={page * 25}">'
+        f"{page + 1}</a>"
+        for page in range(_PAGE_COUNTS[country_id])
+        if _PAGE_COUNTS[country_id] > 1
+    )
+    return f"<html><body>{entries}<p>{links}</p></body></html>"
+
+
+def _respond(
+    handler: BaseHTTPRequestHandler, n: int
+) -> tuple[int, dict[str, str], str]:
+    url = urlsplit(handler.path)
+    if url.path.endswith("country.php"):
+        query = parse_qs(url.query)
+        country_id = int(query["country_id"][0])
+        offset = int(query.get("offset", ["0"])[0])
+        body = _canned_page(country_id, offset)
+    else:
+        body = "".join(
+            f'<a href="country.php?country_id={country_id}">Country</a>'
+            for country_id in _PAGE_COUNTS
+        )
+    return 200, {"Content-Type": "text/html"}, body
+
+
+@pytest.fixture
+def canned_world_directory(
+    serve: Callable[[Responder], LocalServer],
+) -> tuple[str, list[str]]:
+    # The URL of the directory, and the paths requested from it so far.
+    server = serve(_respond)
+    return f"{server.url}/wbd/", server.paths
+
+
+def _run_crawl(
+    monkeypatch: pytest.MonkeyPatch, directory_url: str, output_dir: Path, *args: str
+) -> None:
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "crawl.py",
+            "--directory-url",
+            directory_url,
+            "--output-dir",
+            str(output_dir),
+            "--cache-dir",
+            "",
+            "--concurrency",
+            "4",
+            "--max-requests-per-second",
+            "0",
+            *args,
+        ],
+    )
+    crawl.main()
+
+
+@pytest.mark.parametrize("parse_workers", ["0", "2"])
+def test_crawl_discovers_countries_and_page_counts(
+    monkeypatch: pytest.MonkeyPatch,
+    canned_world_directory: tuple[str, list[str]],
+    tmp_path: Path,
+    parse_workers: str,
+) -> None:
+    directory_url, requested = canned_world_directory
+    _run_crawl(monkeypatch, directory_url, tmp_path, "--parse-workers", parse_workers)
+
+    for country_id, page_count in _PAGE_COUNTS.items():
+        centers = list(iter_centers(tmp_path / f"country_{country_id}.json"))
+        assert [center["name"] for center in centers] == [
+            f"Center {country_id}-{page * 25 + i}"
+            for page in range(page_count)
+            for i in range(2)
+        ]
+        assert [center["page"] for center in centers] == [
+            page + 1 for page in range(page_count) for _ in range(2)
+        ]
+    # Each page is fetched exactly once, and never past the last page.
+    country_requests = [path for path in requested if "country.php" in path]
+    assert len(country_requests) == len(set(country_requests)) == 4
+
+
+def test_crawl_writes_metrics(
+    monkeypatch: pytest.MonkeyPatch,
+    canned_world_directory: tuple[str, list[str]],
+    tmp_path: Path,
+) -> None:
+    directory_url, _ = canned_world_directory
+    _run_crawl(
+        monkeypatch,
+        directory_url,
+        tmp_path,
+        "--parse-workers",
+        "0",
+        "--metrics-json",
+        str(tmp_path / "run.json"),
+        "--metrics-prom",
+        str(tmp_path / "run.prom"),
+    )
+    report = json.loads((tmp_path / "run.json").read_text())
+    assert report["pages"] == 4
+    assert report["centers"] == 8
+    assert report["status_codes"] == {"200": 4}
+    assert [page["page_number"] for page in report["page_details"]] == [1, 2, 3, 1]
+    assert all(page["fetch"]["bytes"] > 0 for page in report["page_details"])
+    assert all(page["parse_seconds"] > 0 for page in report["page_details"])
+    assert "scrape_centers_total 8\n" in (tmp_path / "run.prom").read_text()
+
+
+def test_crawl_only_rewrites_the_given_countries(
+    monkeypatch: pytest.MonkeyPatch,
+    canned_world_directory: tuple[str, list[str]],
+    tmp_path: Path,
+) -> None:
+    directory_url, requested = canned_world_directory
+    _run_crawl(
+        monkeypatch, directory_url, tmp_path, "--countries", "2", "--parse-workers", "0"
+    )
+    assert (tmp_path / "country_2.json").exists()
+    assert not (tmp_path / "country_7.json").exists()
+    # The country was given, so the directory's front page isn't needed.
+    assert all("country.php" in path for path in requested)
+
+
+def test_crawl_keeps_a_country_whose_first_page_fails(
+    monkeypatch: pytest.MonkeyPatch,
+    canned_world_directory: tuple[str, list[str]],
+    tmp_path: Path,
+) -> None:
+    directory_url, _ = canned_world_directory
+    _run_crawl(
+        monkeypatch, directory_url, tmp_path, "--countries", "2", "--parse-workers", "0"
+    )
+    # Nothing listens on port 9, so every page fails.
+    _run_crawl(
+        monkeypatch,
+        "http://127.0.0.1:9/wbd/",
+        tmp_path,
+        "--countries",
+        "2",
+        "--parse-workers",
+        "0",
+        "--max-retries",
+        "0",
+    )
+    assert len(list(iter_centers(tmp_path / "country_2.json"))) == 6
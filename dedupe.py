@@ -0,0 +1,399 @@
+import argparse
+import bisect
+import functools
+import hashlib
+import json
+import random
+import re
+import time
+import unicodedata
+import zlib
+from argparse import ArgumentParser
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from center import Center
+from center_io import iter_centers, write_centers
+
+# Finds centers that appear more than once, e.g. on two pages because the directory's
+# offset pagination shifted mid-crawl, or in the outputs of two runs, and merges each group
+# into one canonical center.
+#
+# Comparing every pair of centers doesn't scale, so only centers that share a blocking key
+# are compared: the same normalized name, phone number, e-mail or website host, or the same
+# band of a MinHash signature of the name's trigrams, which puts similar names in the same
+# bucket with high probability. Blocks larger than `max_block_size`, like the website host
+# of a whole organization, are too common to say anything and are skipped.
+#
+# Sharing a blocking key is not enough to be a duplicate, since different centers may have
+# the same name, e.g. "Blooming Lotus Sangha" in Indiana and New Mexico, or the same
+# website. A pair is a duplicate if every field but `page` is the same, or if the names are
+# similar and the centers also share a phone number, e-mail, website or address.
+
+_DEFAULT_NAME_THRESHOLD = 0.8
+_DEFAULT_MAX_BLOCK_SIZE = 100
+
+# With 8 bands of 4 rows, names with a trigram Jaccard similarity of 0.8 share a band with
+# a probability of 0.98, and names with a similarity of 0.3 with a probability of 0.06.
+_BANDS = 8
+_ROWS = 4
+# Each row of the signature is the minimum of a random hash function `(a * h + b) % p` over
+# the hashes `h` of the name's trigrams. The functions are seeded, so that signatures are the
+# same from run to run.
+_PRIME = (1 << 61) - 1
+
+
+def _hash_functions(count: int) -> list[tuple[int, int]]:
+    rng = random.Random(0)
+    return [(rng.randrange(1, _PRIME), rng.randrange(_PRIME)) for _ in range(count)]
+
+
+_HASH_FUNCTIONS = _hash_functions(_BANDS * _ROWS)
+
+_PHONE_NUMBER = re.compile(r"\d[\d\s().-]{5,}\d")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+@dataclass(frozen=True, slots=True)
+class Fingerprint:
+    # What a center is compared by, normalized so that formatting doesn't matter.
+    name: str
+    trigrams: frozenset[int]
+    phones: frozenset[str]
+    emails: frozenset[str]
+    websites: frozenset[str]
+    hosts: frozenset[str]
+    address: str
+    # A hash of every field but `page`.
+    fields: str
+
+    @classmethod
+    def of(cls, center: Mapping[str, str | int]) -> "Fingerprint":
+        name = normalize_name(str(center["name"]))
+        websites = frozenset(
+            _normalize_website(url)
+            for url in str(center.get("Website", "")).split()
+            if url.strip(",;")
+        )
+        return cls(
+            name=name,
+            trigrams=frozenset(zlib.crc32(gram.encode()) for gram in _trigrams(name)),
+            phones=frozenset(
+                # The last 10 digits, so that a leading `1` or `+1` doesn't matter.
+                re.sub(r"\D", "", number)[-10:]
+                for number in _PHONE_NUMBER.findall(str(center.get("Phone", "")))
+            ),
+            emails=frozenset(
+                email.lower() for email in _EMAIL.findall(str(center.get("E-mail", "")))
+            ),
+            websites=websites,
+            hosts=frozenset(website.partition("/")[0] for website in websites),
+            address=_NON_WORD.sub(" ", str(center.get("Address", "")).lower()).strip(),
+            fields=hashlib.sha256(
+                json.dumps(
+                    {k: v for k, v in center.items() if k != "page"}, sort_keys=True
+                ).encode()
+            ).hexdigest(),
+        )
+
+    def blocking_keys(self) -> Iterator[tuple[str | int, ...]]:
+        yield ("fields", self.fields)
+        if self.name:
+            yield ("name", self.name)
+        yield from (("phone", phone) for phone in self.phones)
+        yield from (("email", email) for email in self.emails)
+        yield from (("host", host) for host in self.hosts)
+        signature = minhash(self.trigrams)
+        for band in range(_BANDS) if signature else ():
+            yield ("band", band, *signature[band * _ROWS : (band + 1) * _ROWS])
+
+
+@dataclass(frozen=True)
+class Match:
+    # Why two centers were found to be duplicates: `exact` if every field but `page` is
+    # the same, else `near`, with what they share besides a similar name.
+    kind: str
+    name_similarity: float
+    shared: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Source:
+    # Where a center was read from: its input file, page and position on that page.
+    input: str
+    page: int
+    position: int
+    name: str
+
+
+@dataclass
+class Cluster:
+    canonical: dict[str, str | int]
+    # The first member is the one the canonical center is based on.
+    members: list[Source]
+    # Each pair of members, by index into `members`, that was found to be a duplicate.
+    matches: list[tuple[int, int, Match]] = field(default_factory=list)
+
+
+@dataclass
+class DedupeStats:
+    centers: int = 0
+    comparisons: int = 0
+    duplicates: int = 0
+    skipped_blocks: int = 0
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    start = time.perf_counter()
+    sources: list[Source] = []
+    centers: list[Center] = []
+    for input in args.input:
+        positions: dict[int, int] = {}
+        for center in iter_centers(Path(input)):
+            page = int(center["page"])
+            positions[page] = positions.get(page, -1) + 1
+            sources.append(Source(input, page, positions[page], str(center["name"])))
+            centers.append(Center.from_dict(center))
+    clusters, stats = find_duplicates(
+        centers,
+        sources,
+        name_threshold=args.name_threshold,
+        max_block_size=args.max_block_size,
+    )
+    # With several inputs, the clusters first seen in a later one come after those of
+    # the first, so put them back in page order, as a scrape would write them.
+    clusters.sort(key=lambda cluster: int(cluster.canonical["page"]))
+    count = write_centers(
+        Path(args.output), (cluster.canonical for cluster in clusters)
+    )
+    with Path(args.provenance).open("w") as f:
+        for cluster in clusters:
+            if len(cluster.members) > 1:
+                f.write(json.dumps(provenance(cluster)) + "\n")
+    elapsed = time.perf_counter() - start
+    print(
+        f"Merged {stats.duplicates} duplicates of {stats.centers} centers into "
+        f"{count} centers in {elapsed:.1f}s, comparing {stats.comparisons} pairs. "
+        f"Wrote the merges to {args.provenance}."
+    )
+    if stats.skipped_blocks:
+        print(
+            f"Skipped {stats.skipped_blocks} blocking keys shared by more than "
+            f"{args.max_block_size} centers."
+        )
+
+
+def find_duplicates(
+    centers: Sequence[Mapping[str, str | int]],
+    sources: Sequence[Source],
+    *,
+    name_threshold: float = _DEFAULT_NAME_THRESHOLD,
+    max_block_size: int = _DEFAULT_MAX_BLOCK_SIZE,
+) -> tuple[list[Cluster], DedupeStats]:
+    # Returns a cluster for every distinct center, ordered by its first member, which is
+    # also the member that comes first in `centers`.
+    stats = DedupeStats(centers=len(centers))
+    fingerprints = [Fingerprint.of(center) for center in centers]
+    keys = [list(fingerprint.blocking_keys()) for fingerprint in fingerprints]
+    blocks: dict[tuple[str | int, ...], list[int]] = {}
+    for i, center_keys in enumerate(keys):
+        for key in center_keys:
+            blocks.setdefault(key, []).append(i)
+    stats.skipped_blocks = sum(
+        1 for members in blocks.values() if len(members) > max_block_size
+    )
+
+    parents = list(range(len(centers)))
+    matches: list[tuple[int, int, Match]] = []
+    for i, center_keys in enumerate(keys):
+        # Every later center that shares a block with this one, compared only once even
+        # if they share several.
+        candidates: set[int] = set()
+        for key in center_keys:
+            members = blocks[key]
+            if len(members) <= max_block_size:
+                # `members` is in ascending order.
+                candidates.update(members[bisect.bisect_right(members, i) :])
+        stats.comparisons += len(candidates)
+        for j in candidates:
+            match = compare(
+                fingerprints[i], fingerprints[j], name_threshold=name_threshold
+            )
+            if match is not None:
+                matches.append((i, j, match))
+                parents[_root(parents, i)] = _root(parents, j)
+
+    groups: dict[int, list[int]] = {}
+    for i in range(len(centers)):
+        groups.setdefault(_root(parents, i), []).append(i)
+    clusters: list[Cluster] = []
+    # Each center's cluster, and its index among the cluster's members.
+    positions: dict[int, tuple[int, int]] = {}
+    for members in sorted(groups.values()):
+        for n, i in enumerate(members):
+            positions[i] = (len(clusters), n)
+        clusters.append(
+            Cluster(
+                merge_centers([centers[i] for i in members]),
+                [sources[i] for i in members],
+            )
+        )
+    for i, j, match in sorted(matches, key=lambda m: (m[0], m[1])):
+        cluster, a = positions[i]
+        _, b = positions[j]
+        clusters[cluster].matches.append((a, b, match))
+    stats.duplicates = len(centers) - len(clusters)
+    return clusters, stats
+
+
+def compare(
+    a: Fingerprint, b: Fingerprint, *, name_threshold: float = _DEFAULT_NAME_THRESHOLD
+) -> Match | None:
+    if a.fields == b.fields:
+        return Match("exact", 1.0)
+    # Most candidates share nothing but a similar name or a website host, and checking
+    # that is cheaper than comparing the names.
+    same_address = bool(a.address) and a.address == b.address
+    if (
+        a.phones.isdisjoint(b.phones)
+        and a.emails.isdisjoint(b.emails)
+        and a.websites.isdisjoint(b.websites)
+        and not same_address
+    ):
+        return None
+    similarity = jaccard(a.trigrams, b.trigrams)
+    if similarity < name_threshold:
+        return None
+    shared = [
+        label
+        for label, ours, theirs in [
+            ("phone", a.phones, b.phones),
+            ("e-mail", a.emails, b.emails),
+            ("website", a.websites, b.websites),
+        ]
+        if not ours.isdisjoint(theirs)
+    ]
+    if same_address:
+        shared.append("address")
+    return Match("near", round(similarity, 3), tuple(shared))
+
+
+def merge_centers(
+    centers: Sequence[Mapping[str, str | int]],
+) -> dict[str, str | int]:
+    # The first center wins, but keys it is missing are filled in from the others, in
+    # order.
+    merged = dict(centers[0])
+    for center in centers[1:]:
+        for key, value in center.items():
+            merged.setdefault(key, value)
+    return merged
+
+
+def provenance(cluster: Cluster) -> dict[str, object]:
+    return {
+        "name": cluster.canonical["name"],
+        "page": cluster.canonical["page"],
+        "members": [vars(source) for source in cluster.members],
+        "matches": [
+            {"members": [i, j], **vars(match)} for i, j, match in cluster.matches
+        ],
+    }
+
+
+def normalize_name(name: str) -> str:
+    # Lowercase, without accents or punctuation, so "Wat Buddhānusorn, Inc." and
+    # "wat buddhanusorn inc" are the same name.
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_name = "".join(c for c in decomposed if not unicodedata.combining(c))
+    words = _NON_WORD.sub(" ", ascii_name.lower()).split()
+    if words[:1] == ["the"]:
+        words = words[1:]
+    return " ".join(words)
+
+
+def minhash(hashes: Iterable[int]) -> list[int]:
+    rows = [_hashed(h) for h in hashes]
+    if not rows:
+        return []
+    return [min(column) for column in zip(*rows)]
+
+
+@functools.cache
+def _hashed(h: int) -> tuple[int, ...]:
+    # Names share most of their trigrams, e.g. " bu" and "ter", so each trigram's hashes are
+    # only computed once.
+    return tuple((a * h + b) % _PRIME for a, b in _HASH_FUNCTIONS)
+
+
+def jaccard(a: frozenset[int], b: frozenset[int]) -> float:
+    if not a and not b:
+        return 1.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def _trigrams(name: str) -> set[str]:
+    padded = f"  {name} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _normalize_website(url: str) -> str:
+    # The host without `www.`, and the path without a trailing `/`.
+    url = url.strip(",;").lower()
+    parts = urlsplit(url if "//" in url else f"//{url}")
+    return parts.netloc.removeprefix("www.") + parts.path.rstrip("/")
+
+
+def _root(parents: list[int], i: int) -> int:
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        nargs="+",
+        default=["buddhist_centers.json"],
+        help="The centers to deduplicate, from one or more runs, as `.json`, `.jsonl`, "
+        "`.sqlite` or `.parquet`. When centers are merged, the first input's center "
+        "wins.",
+    )
+    parser.add_argument(
+        "--output",
+        default="buddhist_centers.deduped.json",
+        help="Where to write the canonical centers, as `.json`, `.jsonl`, `.sqlite` "
+        "or `.parquet`.",
+    )
+    parser.add_argument(
+        "--provenance",
+        default="buddhist_centers.duplicates.jsonl",
+        help="Where to write each merge, as JSON Lines: the canonical center's name "
+        "and page, every center merged into it, and why each pair matched.",
+    )
+    parser.add_argument(
+        "--name-threshold",
+        type=float,
+        default=_DEFAULT_NAME_THRESHOLD,
+        help="How similar two names must be, as the Jaccard similarity of their "
+        "trigrams, for centers that share contact details to be merged.",
+    )
+    parser.add_argument(
+        "--max-block-size",
+        type=int,
+        default=_DEFAULT_MAX_BLOCK_SIZE,
+        help="Skip blocking keys shared by more centers than this, since comparing "
+        "every pair in them is quadratic.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import json
+import random
+import string
+import sys
+from pathlib import Path
+
+import pytest
+
+import dedupe
+from center_io import iter_centers, write_centers
+from dedupe import Fingerprint, Source, compare, find_duplicates, normalize_name
+
+
+def _find(
+    centers: list[dict[str, str | int]], **kwargs: int
+) -> tuple[list[dedupe.Cluster], dedupe.DedupeStats]:
+    sources = [
+        Source("centers.json", int(center["page"]), i, str(center["name"]))
+        for i, center in enumerate(centers)
+    ]
+    return find_duplicates(centers, sources, **kwargs)
+
+
+def test_normalize_name() -> None:
+    assert normalize_name("The Wat Buddhānusorn, Inc.") == "wat buddhanusorn inc"
+    assert normalize_name("  Zen  Center  ") == "zen center"
+
+
+def test_exact_duplicates_are_merged() -> None:
+    center: dict[str, str | int] = {
+        "name": "Zen Center",
+        "page": 3,
+        "Phone": "(303) 555-0199",
+    }
+    clusters, stats = _find([center, {**center, "page": 75}])
+    assert stats.duplicates == 1
+    assert len(clusters) == 1
+    assert clusters[0].canonical == center
+    assert [source.page for source in clusters[0].members] == [3, 75]
+    assert clusters[0].matches == [(0, 1, dedupe.Match("exact", 1.0))]
+
+
+def test_near_duplicates_need_similar_names_and_shared_contact_details() -> None:
+    a = Fingerprint.of(
+        {
+            "name": "Blue Water Community of Mindful Living",
+            "page": 5,
+            "Phone": "(810) 555-0134",
+            "E-mail": "Sangha@BlueWater.org",
+        }
+    )
+    b = Fingerprint.of(
+        {
+            "name": "Bluewater Community of Mindful Living",
+            "page": 76,
+            "Phone": "1-810-555-0134",
+            "E-mail": "sangha@bluewater.org",
+            "Website": "http://www.bluewater.org/",
+        }
+    )
+    match = compare(a, b)
+    assert match is not None
+    assert match.kind == "near"
+    assert match.shared == ("phone", "e-mail")
+    assert 0.8 <= match.name_similarity < 1
+
+    # The same name in another state is a different center.
+    elsewhere = Fingerprint.of(
+        {"name": "Bluewater Community of Mindful Living", "page": 9, "Phone": "2"}
+    )
+    assert compare(a, elsewhere) is None
+    # And centers of one organization share its website host, but not their names.
+    sibling = Fingerprint.of(
+        {
+            "name": "Diamond Way Buddhist Center Dallas",
+            "page": 1,
+            "Website": "http://www.diamondway.org/dallas",
+        }
+    )
+    other = Fingerprint.of(
+        {
+            "name": "Diamond Way Buddhist Center Austin",
+            "page": 1,
+            "Website": "http://www.diamondway.org/austin",
+        }
+    )
+    assert compare(sibling, other) is None
+
+
+def test_merged_centers_fill_in_missing_fields() -> None:
+    centers: list[dict[str, str | int]] = [
+        {"name": "Gyuto Foundation", "page": 2, "Phone": "(510) 555-0100"},
+        {"name": "Other Sangha", "page": 2},
+        {
+            "name": "The Gyuto Foundation",
+            "page": 40,
+            "Phone": "510.555.0100",
+            "Website": "http://gyuto.org",
+        },
+    ]
+    clusters, _ = _find(centers)
+    assert [cluster.canonical for cluster in clusters] == [
+        {
+            "name": "Gyuto Foundation",
+            "page": 2,
+            "Phone": "(510) 555-0100",
+            "Website": "http://gyuto.org",
+        },
+        {"name": "Other Sangha", "page": 2},
+    ]
+    assert [source.position for source in clusters[0].members] == [0, 2]
+
+
+def test_comparisons_grow_with_the_centers_not_their_pairs() -> None:
+    rng = random.Random(0)
+    centers: list[dict[str, str | int]] = [
+        {
+            "name": " ".join(
+                "".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(3)
+            ),
+            "page": i // 25 + 1,
+            "Phone": f"(555) {i:07}",
+            "Website": f"http://sangha{i}.org",
+        }
+        for i in range(5000)
+    ]
+    clusters, stats = _find(centers)
+    assert stats.duplicates == 0
+    assert len(clusters) == len(centers)
+    assert stats.comparisons < len(centers)
+
+
+def test_oversized_blocks_are_skipped() -> None:
+    centers: list[dict[str, str | int]] = [
+        {"name": f"Center {i}", "page": 1, "Website": f"http://sgi-usa.org/{i}"}
+        for i in range(10)
+    ]
+    _, stats = _find(centers, max_block_size=5)
+    assert stats.skipped_blocks >= 1
+
+
+def test_main_dedupes_across_runs(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    center: dict[str, str | int] = {
+        "name": "Zen Center",
+        "page": 3,
+        "Phone": "(303) 555-0199",
+    }
+    write_centers(tmp_path / "new.json", [center, {"name": "New Sangha", "page": 4}])
+    write_centers(
+        tmp_path / "old.jsonl",
+        [{"name": "Old Sangha", "page": 1}, {**center, "page": 2, "E-mail": "z@c.org"}],
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "dedupe.py",
+            "--input",
+            str(tmp_path / "new.json"),
+            str(tmp_path / "old.jsonl"),
+            "--output",
+            str(tmp_path / "deduped.json"),
+            "--provenance",
+            str(tmp_path / "duplicates.jsonl"),
+        ],
+    )
+    dedupe.main()
+
+    # In page order, though "Old Sangha" is only in the second input.
+    assert list(iter_centers(tmp_path / "deduped.json")) == [
+        {"name": "Old Sangha", "page": 1},
+        {**center, "E-mail": "z@c.org"},
+        {"name": "New Sangha", "page": 4},
+    ]
+    [merge] = [
+        json.loads(line)
+        for line in (tmp_path / "duplicates.jsonl").read_text().splitlines()
+    ]
+    assert merge["members"] == [
+        {
+            "input": str(tmp_path / "new.json"),
+            "page": 3,
+            "position": 0,
+            "name": "Zen Center",
+        },
+        {
+            "input": str(tmp_path / "old.jsonl"),
+            "page": 2,
+            "position": 0,
+            "name": "Zen Center",
+        },
+    ]
+    assert merge["matches"] == [
+        {"members": [0, 1], "kind": "near", "name_similarity": 1.0, "shared": ["phone"]}
+    ]
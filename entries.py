@@ -0,0 +1,127 @@
+import re
+from collections import deque
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from center import KNOWN_KEY_NAMES
+
+# The parts of reading a page's entries that don't depend on the HTML tree, shared by the
+# BeautifulSoup parser in `scrape.py` and the lxml parser in `lxml_parser.py`: pairing each
+# `entryName` with its `entryDetail`, recognizing keys, and normalizing values, so that both
+# parsers produce identical centers.
+
+_ENTRY_CLASSES = ("entryName", "entryDetail")
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class EntryParagraph(Generic[_T]):
+    tag: _T
+    # Only for an `entryDetail`: its `<strong>`s, and the elements with text between it and
+    # the end of its entry, which are the entry's description, e.g. `<p class="entryDesc">`.
+    strongs: list[_T] = field(default_factory=list)
+    entry_descs: list[_T] = field(default_factory=list)
+
+
+def pair_entries(paragraphs: Iterable[tuple[str, _T]]) -> Iterator[tuple[_T, _T]]:
+    # Pairs the n-th `entryName` with the n-th `entryDetail`, as zipping the two lists
+    # would, but from a single pass over the page, in document order. Normally each name
+    # is directly followed by its details, so at most one paragraph is waiting.
+    waiting: dict[str, deque[_T]] = {
+        class_name: deque() for class_name in _ENTRY_CLASSES
+    }
+    names, details = waiting["entryName"], waiting["entryDetail"]
+    for class_name, paragraph in paragraphs:
+        waiting[class_name].append(paragraph)
+        if names and details:
+            yield names.popleft(), details.popleft()
+    if names or details:
+        raise ValueError(
+            f"Found {len(names) or len(details)} more "
+            f"{'entryName' if names else 'entryDetail'} than "
+            f"{'entryDetail' if names else 'entryName'} paragraphs."
+        )
+
+
+# Recognizes a `<strong>` element's text that starts with a known key followed by `:`. This
+# is a single alternation compiled once, rather than one regex per key. Longer keys are tried
+# first, so e.g. `Spiritual Director and Teacher` wins over `Spiritual Director`. As before,
+# each key is used as a pattern as-is, e.g. the `.` in `Rev.` matches any character.
+KNOWN_KEY_PATTERN = re.compile(
+    "|".join(rf"{k}\s*:" for k in sorted(KNOWN_KEY_NAMES, key=lambda k: (-len(k), k)))
+)
+
+
+# Runs of whitespace within a value that collapse to a single space.
+_VALUE_WHITESPACE = re.compile(r"\s*\xa0\s*|\s{2,}")
+
+
+def normalize_value_texts(text_elements: list[str], *, key: str) -> str:
+    # Shared by every parser backend: `text_elements` holds the text of the key's own
+    # `<strong>` after the `:`, followed by the text of each sibling up to the `<br>`.
+    text = " ".join(text_elements).strip()
+    if key == "Address":
+        text = normalize_address(text)
+
+    # Remove extra whitespace and `\xa0` characters in the middle of the string.
+    return _VALUE_WHITESPACE.sub(" ", text)
+
+
+# The steps of `normalize_address`, in order.
+_MAILING = re.compile(r"\s*Mailing:.*$", flags=re.DOTALL)
+_NEWLINES = re.compile(r"(\r\n|\n)+")
+_PHYSICAL = re.compile(r"^\s*Physical:\s*")
+_TRAILING_STATE = re.compile(r"\s*\xa0\s*[A-Z]{2}$")
+_STREET_SEPARATOR = re.compile(r"\s*\xa0\s+(?=\S)")
+_COMMAS = re.compile(r",+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_address(value: str) -> str:
+    # Remove 'Mailing:' and everything after it. `re.DOTALL` is because there are sometimes
+    # newlines after the `Mailing:`.
+    value = _MAILING.sub("", value)
+
+    # Replace `\r\n` and `\n` with `, `.
+    value = _NEWLINES.sub(", ", value)
+
+    # Remove 'Physical:' if it's at the beginning of the address
+    value = _PHYSICAL.sub("", value)
+
+    # Remove trailing whitespace, '\xa0', and 2-letter state code
+    value = _TRAILING_STATE.sub("", value)
+
+    # Replace whitespace, '\xa0', and a little more whitespace followed by text. This
+    # sometimes separates the street from the city and state. Replace with `, `.
+    value = _STREET_SEPARATOR.sub(", ", value)
+
+    # Some previous rules can result in occurrences like `,,`. Ensure it's only ever one comma.
+    value = _COMMAS.sub(",", value)
+
+    # Finally, replace multiple blank spaces with only one. Note that this happens at the end
+    # because the other replacements are more precise.
+    return _WHITESPACE.sub(" ", value)
+
+
+def add_notes_and_events(
+    result: dict[str, str | int], entry_desc_texts: list[str]
+) -> None:
+    if not entry_desc_texts:
+        return
+
+    if "Notes and Events" not in result:
+        raise AssertionError(
+            f"entryDesc found for the center {result['name']}, but there was no "
+            "`Notes and Events` key."
+        )
+    if notes := result["Notes and Events"] != "":
+        raise AssertionError(
+            f"entryDesc found for the center {result['name']}, but the 'Notes and Events' key has "
+            f"its own text already: {notes}"
+        )
+
+    result["Notes and Events"] = "\n\n".join(
+        text.replace("\n", "") for text in entry_desc_texts
+    )
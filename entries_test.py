@@ -0,0 +1,41 @@
+import re
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from center import KNOWN_KEY_NAMES
+from corpus import iter_corpus
+from entries import KNOWN_KEY_PATTERN, pair_entries
+
+_CORPUS = Path(__file__).with_name("buddhist_centers.json")
+
+
+def test_pair_entries() -> None:
+    paragraphs = [("entryName", 1), ("entryDetail", 2), ("entryName", 3)]
+    assert list(pair_entries([*paragraphs, ("entryDetail", 4)])) == [(1, 2), (3, 4)]
+    pairs = pair_entries(paragraphs)
+    assert next(pairs) == (1, 2)
+    with pytest.raises(ValueError, match="1 more entryName"):
+        next(pairs)
+
+
+def test_known_key_pattern_matches_per_key_regexes() -> None:
+    # Differential test against the original approach of one regex per known key, over
+    # every `<strong>` in the corpus, regenerated from `buddhist_centers.json`.
+    def reference(text: str) -> bool:
+        return any(re.match(rf"{k}\s*:", text) for k in KNOWN_KEY_NAMES)
+
+    strong_texts = {
+        strong.text
+        for _, html in iter_corpus(_CORPUS)
+        for strong in BeautifulSoup(html, "html.parser").find_all("strong")
+    }
+    strong_texts |= {
+        variant
+        for k in KNOWN_KEY_NAMES
+        for variant in (k, f"{k}:", f"{k} :", f"{k}: value:", f" {k}:", f"{k}s:")
+    }
+    strong_texts |= {"Revd:", "Rev :", "phone:", "Find on:", "Unknown:", ""}
+    for text in strong_texts:
+        assert bool(KNOWN_KEY_PATTERN.match(text)) == reference(text), text
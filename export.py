@@ -0,0 +1,50 @@
+import argparse
+from argparse import ArgumentParser
+from pathlib import Path
+
+from center_io import iter_centers, write_centers
+
+
+def main() -> None:
+    parser = create_parser()
+    args = parser.parse_args()
+    output = Path(args.output)
+    centers = iter_centers(Path(args.input))
+    if args.partition_by is not None:
+        if output.suffix != ".parquet":
+            parser.error("`--partition-by` only works with a `.parquet` output.")
+        import center_parquet
+
+        count = center_parquet.write_parquet(
+            output, centers, partition_by=args.partition_by
+        )
+    else:
+        count = write_centers(output, centers)
+    print(f"Wrote {count} centers to {args.output}")
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.sqlite",
+        help="The centers to convert, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    parser.add_argument(
+        "--output",
+        default="buddhist_centers.json",
+        help="Where to write the centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`.",
+    )
+    parser.add_argument(
+        "--partition-by",
+        choices=("page", "state"),
+        help="Write the `.parquet` output as a directory with one subdirectory per "
+        "page or state, e.g. `page=3/`, so that readers filtering on it skip the rest.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
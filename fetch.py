@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from types import TracebackType
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Necessary to avoid a 403.
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0"
+)
+_RETRYABLE_STATUS_CODES = frozenset([429, 500, 502, 503, 504])
+
+
+class RateLimiter:
+    # Spaces out requests so that no host receives more than `max_per_second`. A single
+    # instance is shared by every worker, so the cap holds regardless of `--concurrency`.
+
+    def __init__(self, max_per_second: float | None) -> None:
+        self._interval = 1 / max_per_second if max_per_second else 0.0
+        self._lock = threading.Lock()
+        self._next_slot_by_host: dict[str, float] = {}
+
+    def wait(self, url: str) -> None:
+        if not self._interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot_by_host.get(host, now))
+            self._next_slot_by_host[host] = slot + self._interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+@dataclass(frozen=True)
+class Validators:
+    # The cache validators the server sent for a page, which we echo back so that it can
+    # answer `304 Not Modified` instead of resending an unchanged page.
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_json(self) -> dict[str, str]:
+        result = {}
+        if self.etag:
+            result["etag"] = self.etag
+        if self.last_modified:
+            result["last_modified"] = self.last_modified
+        return result
+
+    @classmethod
+    def from_json(cls, data: dict[str, str]) -> "Validators":
+        return cls(etag=data.get("etag"), last_modified=data.get("last_modified"))
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    url: str
+    status_code: int
+    # `None` when the server answered `304 Not Modified`.
+    text: str | None
+    validators: Validators
+    attempts: int
+    # The whole fetch, including retries, and the part of it spent waiting on the rate
+    # limiter and backoff rather than on the server.
+    seconds: float = 0.0
+    wait_seconds: float = 0.0
+    # The size of the response body.
+    bytes: int = 0
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status_code == 304
+
+
+class Fetcher:
+    # A single pooled `requests.Session` shared by every worker, so that connections to
+    # buddhanet.info are kept alive between pages. Timeouts, connection errors and
+    # 429/5xx responses are retried with jittered exponential backoff.
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 30.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        pool_size: int = 10,
+        rate_limiter: RateLimiter | None = None,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.rate_limiter = rate_limiter
+        self._session = requests.Session()
+        self._session.headers["User-Agent"] = _USER_AGENT
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def __enter__(self) -> "Fetcher":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._session.close()
+
+    def fetch(self, url: str, *, validators: Validators | None = None) -> FetchResult:
+        headers = validators.conditional_headers() if validators else {}
+        start = time.perf_counter()
+        waited = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                before = time.perf_counter()
+                self.rate_limiter.wait(url)
+                waited += time.perf_counter() - before
+            try:
+                response = self._session.get(url, headers=headers, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt > self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                time.sleep(delay)
+                waited += delay
+                continue
+
+            if (
+                response.status_code in _RETRYABLE_STATUS_CODES
+                and attempt <= self.max_retries
+            ):
+                delay = max(self._backoff(attempt), _retry_after(response) or 0.0)
+                time.sleep(delay)
+                waited += delay
+                continue
+            response.raise_for_status()
+            return FetchResult(
+                url=url,
+                status_code=response.status_code,
+                text=None if response.status_code == 304 else response.text,
+                validators=_response_validators(response, previous=validators),
+                attempts=attempt,
+                seconds=time.perf_counter() - start,
+                wait_seconds=waited,
+                bytes=len(response.content),
+            )
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": sleep a random amount up to the exponential ceiling, so that
+        # workers that failed together don't retry in lockstep.
+        ceiling = min(self.backoff_cap, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+def _response_validators(
+    response: requests.Response, *, previous: Validators | None
+) -> Validators:
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    # A 304 may omit the validators, in which case the ones we sent still hold.
+    if response.status_code == 304 and previous is not None:
+        etag = etag or previous.etag
+        last_modified = last_modified or previous.last_modified
+    return Validators(etag=etag, last_modified=last_modified)
+
+
+def _retry_after(response: requests.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if value is None or not value.isdigit():
+        return None
+    return float(value)
@@ -0,0 +1,82 @@
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from conftest import LocalServer, Responder
+from fetch import Fetcher, Validators
+
+
+def test_reuses_connections(serve: Callable[[Responder], LocalServer]) -> None:
+    server = serve(lambda handler, n: (200, {}, "ok"))
+    with Fetcher() as fetcher:
+        for _ in range(3):
+            assert fetcher.fetch(server.url).text == "ok"
+    assert len(set(server.client_ports)) == 1
+
+
+def test_retries_server_errors(serve: Callable[[Responder], LocalServer]) -> None:
+    server = serve(lambda handler, n: (503, {}, "busy") if n < 3 else (200, {}, "ok"))
+    with Fetcher(backoff_base=0.01) as fetcher:
+        result = fetcher.fetch(server.url)
+    assert result.text == "ok"
+    assert result.attempts == 3
+    assert result.bytes == 2
+    # Both retries waited on backoff, which is part of the whole fetch.
+    assert 0 < result.wait_seconds <= result.seconds
+
+
+def test_gives_up_after_max_retries(serve: Callable[[Responder], LocalServer]) -> None:
+    server = serve(lambda handler, n: (500, {}, "broken"))
+    with Fetcher(max_retries=2, backoff_base=0.01) as fetcher:
+        with pytest.raises(requests.HTTPError):
+            fetcher.fetch(server.url)
+    assert len(server.client_ports) == 3
+
+
+def test_retries_timeouts(serve: Callable[[Responder], LocalServer]) -> None:
+    def responder(
+        handler: BaseHTTPRequestHandler, n: int
+    ) -> tuple[int, dict[str, str], str]:
+        if n == 1:
+            time.sleep(0.5)
+        return 200, {}, "ok"
+
+    server = serve(responder)
+    with Fetcher(timeout=0.1, backoff_base=0.01) as fetcher:
+        result = fetcher.fetch(server.url)
+    assert result.text == "ok"
+    assert result.attempts == 2
+
+
+def test_conditional_get(serve: Callable[[Responder], LocalServer]) -> None:
+    etag = '"v1"'
+    last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+    def responder(
+        handler: BaseHTTPRequestHandler, n: int
+    ) -> tuple[int, dict[str, str], str]:
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, {}, ""
+        return 200, {"ETag": etag, "Last-Modified": last_modified}, "<html></html>"
+
+    server = serve(responder)
+    with Fetcher() as fetcher:
+        first = fetcher.fetch(server.url)
+        assert first.text == "<html></html>"
+        assert first.validators == Validators(etag=etag, last_modified=last_modified)
+
+        second = fetcher.fetch(server.url, validators=first.validators)
+    assert second.not_modified
+    assert second.text is None
+    # The 304 did not resend the validators, so the ones we sent carry over.
+    assert second.validators == first.validators
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    fetcher = Fetcher(backoff_base=1.0, backoff_cap=4.0)
+    delays = [fetcher._backoff(attempt) for attempt in range(1, 10) for _ in range(50)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
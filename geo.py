@@ -0,0 +1,363 @@
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import NamedTuple
+
+from address import address_fields
+from atomic_write import atomic_write
+from center_io import iter_centers, write_centers
+from query import fingerprint, normalize_city
+
+# Finds the centers within some distance of a point, e.g. within 50 km of downtown Chicago,
+# which unlike matching the city or state also finds the suburbs, and nothing else.
+#
+# Addresses are geocoded offline, from the ZIP or else the city and state that
+# `parse_address` finds, using the GeoNames postal code gazetteer. Download it once with
+# `curl -O https://download.geonames.org/export/zip/US.zip && unzip US.zip US.txt -d
+# gazetteer`, which extracts `gazetteer/US.txt`, the default `--gazetteer`.
+# Geocodes are cached per address next to the source, along with the gazetteer's size and
+# mtime, so a rerun only geocodes new or changed addresses, and doesn't even need the
+# gazetteer if there are none.
+#
+# The geocoded centers are bucketed into a grid of `cell_degrees` cells, so that a query
+# only measures the distance to the centers in the few cells that its circle overlaps.
+
+GAZETTEER_URL = "https://download.geonames.org/export/zip/US.zip"
+
+_CACHE_VERSION = 1
+
+_EARTH_RADIUS_KM = 6371.0088
+_KM_PER_DEGREE = _EARTH_RADIUS_KM * math.pi / 180
+
+
+class Point(NamedTuple):
+    lat: float
+    lon: float
+
+
+@dataclass(frozen=True)
+class Geocode:
+    point: Point
+    # `zip` or `city`, whichever the point is the center of.
+    precision: str
+
+
+class Gazetteer:
+    def __init__(
+        self,
+        by_zip: Mapping[str, Point],
+        by_place: Mapping[tuple[str, str], Point],
+    ) -> None:
+        self._by_zip = by_zip
+        self._by_place = by_place
+
+    @classmethod
+    def load(cls, path: Path) -> "Gazetteer":
+        # Reads GeoNames' tab-separated postal codes: the country, ZIP, place name, state
+        # name and code, three more admin names and codes, then the latitude and longitude.
+        by_zip: dict[str, Point] = {}
+        zips_by_place: dict[tuple[str, str], list[Point]] = {}
+        with path.open(newline="", encoding="utf-8") as f:
+            for row in csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE):
+                zip_code, place, state = row[1], row[2], row[4]
+                point = Point(float(row[9]), float(row[10]))
+                by_zip[zip_code] = point
+                zips_by_place.setdefault(_place_key(place, state), []).append(point)
+        # A city is placed at the average of its ZIPs.
+        by_place = {
+            place: Point(
+                sum(p.lat for p in points) / len(points),
+                sum(p.lon for p in points) / len(points),
+            )
+            for place, points in zips_by_place.items()
+        }
+        return cls(by_zip, by_place)
+
+    def geocode(self, fields: Mapping[str, str | int]) -> Geocode | None:
+        # `fields` are the structured address fields, as from `address_fields`.
+        if (point := self._by_zip.get(str(fields.get("zip")))) is not None:
+            return Geocode(point, "zip")
+        if "city" in fields and "state" in fields:
+            key = _place_key(str(fields["city"]), str(fields["state"]))
+            if (point := self._by_place.get(key)) is not None:
+                return Geocode(point, "city")
+        return None
+
+
+class MissingGazetteerError(Exception):
+    def __init__(self, path: Path) -> None:
+        # The zip has the gazetteer as `US.txt`, so give it the name that was asked for.
+        command = f"curl -O {GAZETTEER_URL} && unzip US.zip US.txt -d {path.parent}"
+        if path.name != "US.txt":
+            command += f" && mv {path.parent / 'US.txt'} {path}"
+        super().__init__(
+            f"There is no gazetteer at `{path}`, and some addresses aren't in the "
+            f"geocode cache. Download it with `{command}`."
+        )
+        self.path = path
+
+
+class Geocoder:
+    # Geocodes each center's `Address` through the cache at `cache_path`. The gazetteer
+    # is only needed for addresses that aren't cached: without it, the cache is used as
+    # is, and geocoding anything else raises `MissingGazetteerError`.
+    def __init__(self, gazetteer_path: Path, cache_path: Path | None = None) -> None:
+        self.gazetteer_path = gazetteer_path
+        self.cache_path = cache_path
+        # How many addresses weren't in the cache.
+        self.looked_up = 0
+        self._gazetteer: Gazetteer | None = None
+        try:
+            self._gazetteer_fingerprint: dict[str, int] | None = fingerprint(
+                gazetteer_path
+            )
+        except FileNotFoundError:
+            self._gazetteer_fingerprint = None
+        self._cache: dict[str, list[float | str] | None] = {}
+        if cache_path is not None:
+            try:
+                saved = json.loads(cache_path.read_text())
+            except (FileNotFoundError, json.JSONDecodeError):
+                saved = None
+            # Without the gazetteer, the cache is kept whichever gazetteer it came from.
+            if (
+                saved is not None
+                and saved.get("version") == _CACHE_VERSION
+                and self._gazetteer_fingerprint in (None, saved.get("gazetteer"))
+            ):
+                self._cache = saved["addresses"]
+                self._gazetteer_fingerprint = saved["gazetteer"]
+
+    def geocode(self, center: Mapping[str, str | int]) -> Geocode | None:
+        address = center.get("Address")
+        if not isinstance(address, str):
+            return None
+        if address not in self._cache:
+            self.looked_up += 1
+            geocode = self._load_gazetteer().geocode(address_fields(center))
+            self._cache[address] = (
+                [*geocode.point, geocode.precision] if geocode is not None else None
+            )
+        cached = self._cache[address]
+        if cached is None:
+            return None
+        lat, lon, precision = cached
+        return Geocode(Point(float(lat), float(lon)), str(precision))
+
+    def save(self) -> None:
+        if self.cache_path is None or not self.looked_up:
+            return
+        data = {
+            "version": _CACHE_VERSION,
+            "gazetteer": self._gazetteer_fingerprint,
+            "addresses": self._cache,
+        }
+        atomic_write(self.cache_path, json.dumps(data))
+
+    def _load_gazetteer(self) -> Gazetteer:
+        if self._gazetteer is None:
+            if not self.gazetteer_path.exists():
+                raise MissingGazetteerError(self.gazetteer_path)
+            self._gazetteer = Gazetteer.load(self.gazetteer_path)
+        return self._gazetteer
+
+
+class SpatialIndex:
+    def __init__(
+        self, points: Sequence[Point | None], *, cell_degrees: float = 0.25
+    ) -> None:
+        # `points` may have gaps for the centers that couldn't be geocoded. `cell_degrees`
+        # must divide 360, so that the cells wrap around the antimeridian.
+        self._cell_degrees = cell_degrees
+        self._lon_cells = round(360 / cell_degrees)
+        self._cells: dict[tuple[int, int], list[tuple[Point, int]]] = {}
+        for i, point in enumerate(points):
+            if point is not None:
+                self._cells.setdefault(self._cell(point), []).append((point, i))
+
+    def __len__(self) -> int:
+        # How many points were indexed, leaving out the gaps.
+        return sum(len(cell) for cell in self._cells.values())
+
+    def within(self, origin: Point, radius_km: float) -> list[tuple[float, int]]:
+        # Returns the distance to and index of every point within `radius_km` of `origin`,
+        # nearest first.
+        lat_radius = radius_km / _KM_PER_DEGREE
+        # Longitude degrees shrink towards the poles, so use the latitude nearest a pole.
+        widest_lat = min(abs(origin.lat) + lat_radius, 90.0)
+        km_per_lon_degree = _KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+        lon_radius = (
+            radius_km / km_per_lon_degree if km_per_lon_degree > 1e-9 else 180.0
+        )
+        min_lat, _ = self._cell(Point(origin.lat - lat_radius, origin.lon))
+        max_lat, _ = self._cell(Point(origin.lat + lat_radius, origin.lon))
+        if lon_radius >= 180:
+            lon_cells: Iterable[int] = range(self._lon_cells)
+        else:
+            first = math.floor((origin.lon - lon_radius) / self._cell_degrees)
+            last = math.floor((origin.lon + lon_radius) / self._cell_degrees)
+            lon_cells = {
+                cell % self._lon_cells
+                for cell in range(first, min(last, first + self._lon_cells - 1) + 1)
+            }
+        found = []
+        for lat_cell in range(min_lat, max_lat + 1):
+            for lon_cell in lon_cells:
+                for point, i in self._cells.get((lat_cell, lon_cell), ()):
+                    # Points further north or south than the radius can't be within it,
+                    # and are much cheaper to rule out than to measure.
+                    if abs(point.lat - origin.lat) > lat_radius:
+                        continue
+                    distance = haversine_km(origin, point)
+                    if distance <= radius_km:
+                        found.append((distance, i))
+        found.sort()
+        return found
+
+    def _cell(self, point: Point) -> tuple[int, int]:
+        return (
+            math.floor(point.lat / self._cell_degrees),
+            math.floor(point.lon / self._cell_degrees) % self._lon_cells,
+        )
+
+
+def haversine_km(a: Point, b: Point) -> float:
+    lat_a, lat_b = math.radians(a.lat), math.radians(b.lat)
+    h = (
+        math.sin((lat_b - lat_a) / 2) ** 2
+        + math.cos(lat_a)
+        * math.cos(lat_b)
+        * math.sin(math.radians(b.lon - a.lon) / 2) ** 2
+    )
+    return 2 * _EARTH_RADIUS_KM * math.asin(min(math.sqrt(h), 1.0))
+
+
+def centers_near(
+    source: Path,
+    origin: Point,
+    radius_km: float,
+    *,
+    gazetteer: Path,
+    cache_path: Path | None = None,
+) -> list[dict[str, str | int]]:
+    # The centers in `source` within `radius_km` of `origin`, nearest first.
+    centers = list(iter_centers(source))
+    index = index_centers(
+        centers, Geocoder(gazetteer, cache_path or default_cache_path(source))
+    )
+    return [centers[i] for _, i in index.within(origin, radius_km)]
+
+
+def index_centers(
+    centers: Iterable[Mapping[str, str | int]], geocoder: Geocoder
+) -> SpatialIndex:
+    # Indexes each center by its position in `centers`, and saves any new geocodes.
+    index = SpatialIndex([_point(geocoder.geocode(center)) for center in centers])
+    geocoder.save()
+    return index
+
+
+def default_cache_path(source: Path) -> Path:
+    return source.with_name(f"{source.stem}.geocodes.json")
+
+
+def parse_point(text: str) -> Point:
+    # Parses `lat,lon`, e.g. `41.88,-87.63`.
+    try:
+        lat, lon = (float(part) for part in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            f"Expected `latitude,longitude`, e.g. `41.88,-87.63`, got `{text}`."
+        )
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise argparse.ArgumentTypeError(f"`{text}` is not a latitude and longitude.")
+    return Point(lat, lon)
+
+
+def _point(geocode: Geocode | None) -> Point | None:
+    return geocode.point if geocode is not None else None
+
+
+def _place_key(city: str, state: str) -> tuple[str, str]:
+    return normalize_city(city), state.upper()
+
+
+def main() -> None:
+    parser = create_parser()
+    args = parser.parse_args()
+    source = Path(args.input)
+    start = time.perf_counter()
+    centers = list(iter_centers(source))
+    geocoder = Geocoder(Path(args.gazetteer), default_cache_path(source))
+    try:
+        index = index_centers(centers, geocoder)
+    except MissingGazetteerError as e:
+        parser.error(str(e))
+    indexed = time.perf_counter()
+    found = index.within(args.near, args.radius_km)
+    queried = time.perf_counter()
+    nearby = [centers[i] for _, i in found]
+    if args.output:
+        write_centers(Path(args.output), nearby)
+    else:
+        for distance, i in found:
+            print(json.dumps({**centers[i], "distance_km": round(distance, 1)}))
+    print(
+        f"{len(nearby)} centers within {args.radius_km:g} km. Geocoded "
+        f"{len(index)} of {len(centers)} centers "
+        f"({geocoder.looked_up} not cached) and indexed them in "
+        f"{(indexed - start) * 1000:.1f} ms, and queried them in "
+        f"{(queried - indexed) * 1e6:.0f} µs",
+        file=sys.stderr,
+    )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`. Geocodes are cached next to it.",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the nearby centers to this `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet` file, nearest first, or in page order for `.sqlite`, rather than "
+        "printing them as JSON Lines with their distance.",
+    )
+    parser.add_argument(
+        "--near",
+        type=parse_point,
+        required=True,
+        help="The point to search around, as `latitude,longitude`, e.g. "
+        "`41.88,-87.63`.",
+    )
+    parser.add_argument(
+        "--radius-km",
+        type=float,
+        default=50.0,
+        help="How far from `--near` to search.",
+    )
+    add_gazetteer_argument(parser)
+    return parser
+
+
+def add_gazetteer_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--gazetteer",
+        default="gazetteer/US.txt",
+        help=f"GeoNames' US postal codes, from {GAZETTEER_URL}. Only needed for "
+        "addresses that aren't in the geocode cache yet.",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from center_io import write_centers
+from geo import (
+    Gazetteer,
+    Geocode,
+    Geocoder,
+    MissingGazetteerError,
+    Point,
+    SpatialIndex,
+    centers_near,
+    default_cache_path,
+    haversine_km,
+)
+
+# A few rows of GeoNames' US postal codes.
+_GAZETTEER = [
+    ("60601", "Chicago", "IL", 41.8858, -87.6181),
+    ("60640", "Chicago", "IL", 41.9719, -87.6624),
+    ("60201", "Evanston", "IL", 42.0564, -87.6953),
+    ("60302", "Oak Park", "IL", 41.8944, -87.7896),
+    ("46320", "Hammond", "IN", 41.6169, -87.4916),
+    ("61820", "Champaign", "IL", 40.1084, -88.2403),
+    ("19107", "Philadelphia", "PA", 39.9516, -75.1586),
+]
+
+_CHICAGO = Point(41.88, -87.63)
+
+
+@pytest.fixture
+def gazetteer(tmp_path: Path) -> Path:
+    path = tmp_path / "US.txt"
+    path.write_text(
+        "".join(
+            f"US\t{zip_code}\t{place}\tState\t{state}\tCounty\t\t\t\t{lat}\t{lon}\t4\n"
+            for zip_code, place, state, lat, lon in _GAZETTEER
+        )
+    )
+    return path
+
+
+def test_haversine() -> None:
+    assert haversine_km(_CHICAGO, _CHICAGO) == 0
+    # A degree of latitude is about 111 km.
+    assert haversine_km(Point(0, 0), Point(1, 0)) == pytest.approx(111.2, abs=0.1)
+    assert haversine_km(Point(0, 179.5), Point(0, -179.5)) == pytest.approx(
+        111.2, abs=0.1
+    )
+
+
+def test_gazetteer(gazetteer: Path) -> None:
+    places = Gazetteer.load(gazetteer)
+    assert places.geocode({"city": "Evanston", "state": "IL", "zip": "60201"}) == (
+        Geocode(Point(42.0564, -87.6953), "zip")
+    )
+    # Without a known ZIP, a city is at the average of its ZIPs.
+    chicago = places.geocode({"city": "chicago", "state": "IL", "zip": "60699"})
+    assert chicago is not None
+    assert chicago.precision == "city"
+    assert chicago.point == pytest.approx(Point(41.92885, -87.64025))
+    assert places.geocode({"city": "Chicago", "state": "OH"}) is None
+    assert places.geocode({"state": "IL"}) is None
+
+
+def test_spatial_index_matches_brute_force() -> None:
+    rng = random.Random(0)
+    points: list[Point | None] = [
+        Point(rng.uniform(-89, 89), rng.uniform(-180, 180)) for _ in range(2000)
+    ]
+    # Dense clusters at the antimeridian and near a pole, and a gap.
+    points += [
+        Point(rng.uniform(-1, 1), rng.choice([-1, 1]) * 179.9) for _ in range(50)
+    ]
+    points += [Point(rng.uniform(88, 90), rng.uniform(-180, 180)) for _ in range(50)]
+    points.append(None)
+    index = SpatialIndex(points)
+    assert len(index) == len(points) - 1
+    for origin, radius_km in [
+        (_CHICAGO, 50),
+        (Point(0, 180), 200),
+        (Point(0, -179.95), 30),
+        (Point(89.5, 0), 300),
+        (Point(-30, 20), 3000),
+    ]:
+        expected = sorted(
+            (haversine_km(origin, point), i)
+            for i, point in enumerate(points)
+            if point is not None and haversine_km(origin, point) <= radius_km
+        )
+        assert index.within(origin, radius_km) == expected
+
+
+def test_geocoder_caches_each_address(
+    gazetteer: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cache = tmp_path / "geocodes.json"
+    centers: list[dict[str, str | int]] = [
+        {"name": "A", "page": 1, "Address": "1703 Orrington Avenue, Evanston IL 60201"},
+        {"name": "B", "page": 1, "Address": "Nowhere"},
+        {"name": "C", "page": 1},
+    ]
+    geocoder = Geocoder(gazetteer, cache)
+    assert [geocoder.geocode(center) for center in centers] == [
+        Geocode(Point(42.0564, -87.6953), "zip"),
+        None,
+        None,
+    ]
+    assert geocoder.looked_up == 2
+    geocoder.save()
+
+    # Every address is cached, so the gazetteer isn't even loaded.
+    def fail(path: Path) -> Gazetteer:
+        raise AssertionError("loaded the gazetteer")
+
+    monkeypatch.setattr(Gazetteer, "load", fail)
+    again = Geocoder(gazetteer, cache)
+    assert [again.geocode(center) for center in centers][:2] == [
+        Geocode(Point(42.0564, -87.6953), "zip"),
+        None,
+    ]
+    assert again.looked_up == 0
+    monkeypatch.undo()
+
+    # A new address is the only one geocoded.
+    again.geocode({"name": "D", "page": 2, "Address": "Oak Park, IL 60302"})
+    assert again.looked_up == 1
+
+
+def test_centers_near(gazetteer: Path, tmp_path: Path) -> None:
+    source = tmp_path / "centers.json"
+    write_centers(
+        source,
+        [
+            {"name": "Champaign", "page": 1, "Address": "Champaign IL 61820"},
+            {"name": "Evanston", "page": 1, "Address": "Evanston IL 60201"},
+            # Not in Illinois, but close to Chicago.
+            {"name": "Hammond", "page": 2, "Address": "Hammond, Indiana 46320"},
+            {"name": "Loop", "page": 2, "Address": "1 N State St, Chicago, IL 60601"},
+            {"name": "Online", "page": 3},
+        ],
+    )
+    nearby = centers_near(source, _CHICAGO, 50, gazetteer=gazetteer)
+    assert [center["name"] for center in nearby] == ["Loop", "Evanston", "Hammond"]
+    assert default_cache_path(source).exists()
+
+
+def test_geocoder_without_gazetteer(gazetteer: Path, tmp_path: Path) -> None:
+    cache = tmp_path / "geocodes.json"
+    center: dict[str, str | int] = {
+        "name": "A",
+        "page": 1,
+        "Address": "1703 Orrington Avenue, Evanston IL 60201",
+    }
+    geocoder = Geocoder(gazetteer, cache)
+    geocoder.geocode(center)
+    geocoder.save()
+
+    # Cached addresses are geocoded without the gazetteer, and others can't be.
+    missing = tmp_path / "missing" / "US.txt"
+    again = Geocoder(missing, cache)
+    assert again.geocode(center) == Geocode(Point(42.0564, -87.6953), "zip")
+    with pytest.raises(
+        MissingGazetteerError,
+        match=re.escape(f"unzip US.zip US.txt -d {missing.parent}`"),
+    ):
+        again.geocode({"name": "B", "page": 1, "Address": "Oak Park, IL 60302"})
+    with pytest.raises(MissingGazetteerError):
+        Geocoder(missing).geocode(center)
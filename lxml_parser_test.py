@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import pytest
+
+from corpus import iter_corpus
+from scrape import parse_page
+
+pytest.importorskip("lxml")
+
+_CORPUS = Path(__file__).with_name("buddhist_centers.json")
+
+# Each fixture is a whole page, since the two backends build different trees. The same
+# fixtures are run through both backends, which must agree exactly.
+_FIXTURES = {
+    "basic": """<p class="entryName"> Accidental Buddhist Sangha</p>
+<p class="entryDetail">
+<strong>Address:</strong>    &nbsp;  IL <br>
+<strong>Tradition:</strong> Mahayana, Zen Buddhist Master Thich Nhat Hahn<br>
+<strong>Phone:</strong> (630) 375-0881<br>
+<strong>E-mail:</strong> <a href="mailto:jackhat1@aol.com">jackhat1@aol.com</a><br>
+<strong>Find on:</strong> <a href="http://mapof.it/      Illinois" target="_blank"><img align="absmiddle" src="images/map.gif" border="0"></a><br>
+<strong>Contact:</strong> Jack Hatfield &nbsp;<br>
+</p>
+<hr>""",
+    "value_in_key_and_mixed_value": """<p class="entryName">Amitabha Foundation</p>
+<p class="entryDetail">
+<strong>Contact: Vice-secretary General:</strong> Ven. Hui-Chuang &nbsp;<br>
+<strong>Venerable :</strong> Nagasena<br>
+<strong>Main Contact:</strong> Becky &nbsp;<a href="mailto:ny@amitabhafoundation.us">Email</a> &nbsp;<i>(Phone: 585-261-7094)</i><br>
+<strong>Teacher:</strong> <a>No href</a> and <strong>bold</strong> text<!-- a comment --> after<br>
+</p>
+<hr>""",
+    "duplicate_keys_without_closing_tag": """<p class="entryName">Albuquerque Vipassana Sangha</p>
+<p class="entryDetail">
+<strong>Address:</strong>            &nbsp; Albuquerque NM 87196    <br>
+<strong>Community Dharma Leader:</strong> Kathryn Turnipseed &nbsp;<br>
+<strong>Community Dharma Leader:</strong> Valerie Roth &nbsp;<br>
+""",
+    "addresses": (
+        '<p class="entryName">Alaska Buddhist Center</p>\n'
+        '<p class="entryDetail">\n'
+        "<strong>Address:</strong> Physical: 4448 Pikes Landing Road (UUFF building)\r\n"
+        "Fairbanks, Alaska\r\n\r\nMailing: P.O. Box 60062\r\n\r\n&nbsp; Fairbanks AK 99706<br>\r\n"
+        "<strong>Tradition:</strong> Vajrayana,\r\nTibetan,Gelugpa<br>\r\n"
+        "</p>\r\n<hr>\r\n"
+        '<p class="entryName">All One Dharma-Quaker House   </p>\n'
+        '<p class="entryDetail">\n'
+        "<strong>Address:</strong> 1440 Harvard Street,\n         &nbsp; Santa Monica CA 90404<br>\n"
+        "</p>\n<hr>"
+    ),
+    "notes": """<p class="entryName">Albuquerque Vipassana Sangha</p>
+<p class="entryDetail">
+<strong>Tradition:</strong> Theravada, Vipassana (Insight Meditation)<br>
+<strong>Notes and Events:</strong></p><p class="entryDesc">Contact :PO Box 40722 Albuquerque NM 87196<br></p>
+<hr>
+<p class="entryName">Dzogchen Community, Colorado</p>
+<p class="entryDetail">
+<strong>Notes and Events:</strong></p>
+<p class="entryDesc"><!--StartFragment--></p>
+<p>The Dzogchen Community of Colorado is a group of <em>practitioners</em>.</p>
+<p>In the words of our teacher,
+“The Dzogchen teachings are neither a philosophy.”</p>
+<!--EndFragment-->
+<p></p>
+<hr>""",
+}
+
+
+def _page(body: str) -> str:
+    return f"<html><body>\n{body}\n</body></html>"
+
+
+@pytest.mark.parametrize("name", sorted(_FIXTURES))
+def test_backends_agree_on_fixtures(name: str) -> None:
+    html = _page(_FIXTURES[name])
+    expected = parse_page(html, page_number=3, parser="html.parser")
+    assert expected
+    assert parse_page(html, page_number=3, parser="lxml") == expected
+
+
+def test_backends_agree_on_corpus() -> None:
+    for page_number, html in iter_corpus(_CORPUS):
+        expected = parse_page(html, page_number=page_number, parser="html.parser")
+        actual = parse_page(html, page_number=page_number, parser="lxml")
+        assert actual == expected, page_number
+
+
+def test_empty_page() -> None:
+    assert parse_page("", page_number=1, parser="lxml") == []
+    assert parse_page(_page(""), page_number=1, parser="lxml") == []
@@ -0,0 +1,203 @@
+import datetime
+import json
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from atomic_write import atomic_write
+
+# Records how each page of a crawl went, and writes a run report: JSON with every page and
+# p50/p95/p99 summaries, and a Prometheus textfile for node_exporter's textfile collector.
+#
+# Timings are always attached to pages, since a couple of `perf_counter` calls are nothing
+# next to a request. Everything else only happens when a `RunMetrics` is passed in, so a run
+# without `--metrics-json` or `--metrics-prom` pays for none of it.
+
+_QUANTILES = (0.5, 0.95, 0.99)
+
+
+@dataclass(frozen=True)
+class FetchStats:
+    # `None` if the page was served from the page cache, without a request.
+    status_code: int | None
+    # Including retries. `0` if the page was served from the page cache.
+    attempts: int
+    # The whole fetch, including `wait_seconds`.
+    seconds: float
+    # Time spent waiting on the rate limiter and retry backoff, rather than the server.
+    wait_seconds: float
+    bytes: int
+
+
+@dataclass(frozen=True)
+class PageMetrics:
+    page_number: int
+    url: str
+    fetch: FetchStats | None
+    parse_seconds: float | None
+    # The time to save the page to its checkpoint, which is mostly JSON serialization.
+    checkpoint_seconds: float
+    centers: int | None
+    error: str | None
+
+
+class RunMetrics:
+    def __init__(self) -> None:
+        self.started = datetime.datetime.now(datetime.timezone.utc)
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._pages: list[PageMetrics] = []
+
+    def record(self, page: PageMetrics) -> None:
+        with self._lock:
+            self._pages.append(page)
+
+    def report(self) -> dict[str, object]:
+        with self._lock:
+            pages = list(self._pages)
+        fetched = [page.fetch for page in pages if page.fetch is not None]
+        requested = [fetch for fetch in fetched if fetch.status_code is not None]
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "elapsed_seconds": time.perf_counter() - self._start,
+            "pages": len(pages),
+            "errors": sum(1 for page in pages if page.error is not None),
+            "centers": sum(page.centers or 0 for page in pages),
+            "requests": sum(fetch.attempts for fetch in fetched),
+            "retries": sum(max(fetch.attempts - 1, 0) for fetch in fetched),
+            "bytes": sum(fetch.bytes for fetch in fetched),
+            "status_codes": dict(
+                sorted(Counter(str(fetch.status_code) for fetch in requested).items())
+            ),
+            "cached": len(fetched) - len(requested),
+            "summaries": {
+                "fetch_seconds": summarize(fetch.seconds for fetch in requested),
+                "wait_seconds": summarize(fetch.wait_seconds for fetch in requested),
+                "bytes": summarize(fetch.bytes for fetch in requested),
+                "parse_seconds": summarize(
+                    page.parse_seconds
+                    for page in pages
+                    if page.parse_seconds is not None
+                ),
+                "checkpoint_seconds": summarize(
+                    page.checkpoint_seconds for page in pages
+                ),
+                "centers": summarize(
+                    page.centers for page in pages if page.centers is not None
+                ),
+            },
+            "page_details": [asdict(page) for page in pages],
+        }
+
+    def write_json(self, path: Path) -> None:
+        atomic_write(path, json.dumps(self.report(), indent=2))
+
+    def write_prometheus(self, path: Path) -> None:
+        # The textfile collector may read at any time, so never leave a partial file.
+        atomic_write(path, prometheus_text(self.report()))
+
+
+def summarize(values: Iterable[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    summary = {
+        "count": len(ordered),
+        "sum": sum(ordered),
+        "max": ordered[-1],
+    }
+    for q in _QUANTILES:
+        summary[f"p{round(q * 100)}"] = _quantile(ordered, q)
+    return summary
+
+
+def prometheus_text(report: dict[str, object]) -> str:
+    lines: list[str] = []
+
+    def metric(
+        name: str, kind: str, help: str, samples: Iterable[tuple[str, float]]
+    ) -> None:
+        lines.append(f"# HELP scrape_{name} {help}")
+        lines.append(f"# TYPE scrape_{name} {kind}")
+        lines.extend(f"scrape_{name}{labels} {value:g}" for labels, value in samples)
+
+    def scalar(key: str) -> float:
+        value = report[key]
+        assert isinstance(value, (int, float))
+        return value
+
+    metric(
+        "run_seconds",
+        "gauge",
+        "How long the run took.",
+        [("", scalar("elapsed_seconds"))],
+    )
+    metric("pages_total", "counter", "Pages scraped.", [("", scalar("pages"))])
+    metric(
+        "page_errors_total", "counter", "Pages that failed.", [("", scalar("errors"))]
+    )
+    metric("centers_total", "counter", "Centers extracted.", [("", scalar("centers"))])
+    metric(
+        "requests_total",
+        "counter",
+        "HTTP requests, including retries.",
+        [("", scalar("requests"))],
+    )
+    metric(
+        "retries_total",
+        "counter",
+        "HTTP requests that were retries.",
+        [("", scalar("retries"))],
+    )
+    metric(
+        "response_bytes_total",
+        "counter",
+        "Bytes of HTML received.",
+        [("", scalar("bytes"))],
+    )
+    metric(
+        "cached_pages_total",
+        "counter",
+        "Pages served from the page cache.",
+        [("", scalar("cached"))],
+    )
+    status_codes = report["status_codes"]
+    assert isinstance(status_codes, dict)
+    metric(
+        "responses_total",
+        "counter",
+        "Final HTTP responses, by status code.",
+        [(f'{{code="{code}"}}', count) for code, count in status_codes.items()],
+    )
+    summaries = report["summaries"]
+    assert isinstance(summaries, dict)
+    for key, help in [
+        ("fetch_seconds", "Time to fetch each page, including retries."),
+        (
+            "wait_seconds",
+            "Time each fetch spent waiting on the rate limiter or backoff.",
+        ),
+        ("bytes", "Size of each page's HTML."),
+        ("parse_seconds", "Time to parse each page."),
+        ("checkpoint_seconds", "Time to save each page to its checkpoint."),
+        ("centers", "Centers extracted from each page."),
+    ]:
+        summary = summaries[key]
+        name = f"page_{key}"
+        samples = [
+            (f'{{quantile="{q:g}"}}', summary[f"p{round(q * 100)}"])
+            for q in _QUANTILES
+            if summary["count"]
+        ]
+        samples += [("_sum", summary.get("sum", 0)), ("_count", summary["count"])]
+        metric(name, "summary", help, samples)
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(ordered: list[float], q: float) -> float:
+    # The nearest-rank quantile, so every reported value is one that was observed.
+    return ordered[max(math.ceil(q * len(ordered)) - 1, 0)]
@@ -0,0 +1,70 @@
+import json
+from pathlib import Path
+
+from metrics import FetchStats, PageMetrics, RunMetrics, prometheus_text, summarize
+
+
+def _page(
+    page_number: int, fetch: FetchStats | None, *, centers: int | None = 25
+) -> PageMetrics:
+    return PageMetrics(
+        page_number,
+        f"url{page_number}",
+        fetch,
+        parse_seconds=0.01 * page_number if fetch is not None else None,
+        checkpoint_seconds=0.001,
+        centers=centers,
+        error=None if fetch is not None else "ConnectionError: refused",
+    )
+
+
+def test_summarize() -> None:
+    assert summarize([]) == {"count": 0}
+    summary = summarize(range(100, 0, -1))
+    assert summary["count"] == 100
+    assert summary["sum"] == 5050
+    assert summary["max"] == 100
+    # Nearest-rank, so each quantile is an observed value.
+    assert (summary["p50"], summary["p95"], summary["p99"]) == (50, 95, 99)
+    assert summarize([3.0])["p99"] == 3.0
+
+
+def test_report(tmp_path: Path) -> None:
+    metrics = RunMetrics()
+    metrics.record(_page(1, FetchStats(200, 1, 0.5, 0.1, 1000)))
+    metrics.record(_page(2, FetchStats(200, 3, 2.0, 1.5, 3000)))
+    metrics.record(_page(3, FetchStats(304, 1, 0.2, 0.0, 0)))
+    metrics.record(_page(4, FetchStats(None, 0, 0.001, 0.0, 1000)))
+    metrics.record(_page(5, None, centers=None))
+
+    metrics.write_json(tmp_path / "run.json")
+    report = json.loads((tmp_path / "run.json").read_text())
+    assert report["pages"] == 5
+    assert report["errors"] == 1
+    assert report["centers"] == 100
+    assert report["requests"] == 5
+    assert report["retries"] == 2
+    assert report["bytes"] == 5000
+    assert report["status_codes"] == {"200": 2, "304": 1}
+    assert report["cached"] == 1
+    # Pages served from the page cache don't skew the latencies of requests.
+    assert report["summaries"]["fetch_seconds"]["count"] == 3
+    assert report["summaries"]["fetch_seconds"]["max"] == 2.0
+    assert report["summaries"]["parse_seconds"]["count"] == 4
+    assert report["page_details"][1]["fetch"]["attempts"] == 3
+
+    metrics.write_prometheus(tmp_path / "run.prom")
+    text = (tmp_path / "run.prom").read_text()
+    assert "# TYPE scrape_page_fetch_seconds summary\n" in text
+    assert 'scrape_page_fetch_seconds{quantile="0.99"} 2\n' in text
+    assert "scrape_page_fetch_seconds_count 3\n" in text
+    assert 'scrape_responses_total{code="304"} 1\n' in text
+    assert "scrape_retries_total 2\n" in text
+
+
+def test_prometheus_text_without_pages() -> None:
+    text = prometheus_text(RunMetrics().report())
+    assert "scrape_pages_total 0\n" in text
+    # Summaries of nothing have no quantiles, but still a count.
+    assert "quantile" not in text
+    assert "scrape_page_parse_seconds_count 0\n" in text
@@ -0,0 +1,179 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+
+from atomic_write import atomic_write
+from fetch import Validators
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    html: str
+    validators: Validators
+    expired: bool
+
+
+class PageCache:
+    # An on-disk cache of the raw HTML for each page URL.
+    #
+    # Pages are stored gzipped under `objects/`, named by the SHA-256 of their content, so
+    # identical pages are only stored once. `index.json` maps each URL to its content hash,
+    # when it expires, and when it was last read. Once the blobs exceed `max_bytes`, the
+    # least recently used URLs are evicted.
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        ttl: float = 24 * 60 * 60,
+        max_bytes: int = 256 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._objects_dir = directory / "objects"
+        self._objects_dir.mkdir(parents=True, exist_ok=True)
+        self._index_path = directory / "index.json"
+        self._index: dict[str, dict[str, str | int | float]] = (
+            json.loads(self._index_path.read_text())
+            if self._index_path.exists()
+            else {}
+        )
+        self._dirty = False
+
+    def __enter__(self) -> "PageCache":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.flush()
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._index
+
+    def urls(self) -> list[str]:
+        return list(self._index)
+
+    def get(self, url: str) -> CachedPage | None:
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                return None
+            # Read the blob under the lock, since another thread's `put` may evict it.
+            try:
+                compressed = self._blob_path(str(entry["digest"])).read_bytes()
+            except FileNotFoundError:
+                del self._index[url]
+                self._dirty = True
+                return None
+            now = self._clock()
+            entry["last_access"] = now
+            self._dirty = True
+        return CachedPage(
+            html=gzip.decompress(compressed).decode(),
+            validators=Validators(
+                etag=_optional_str(entry.get("etag")),
+                last_modified=_optional_str(entry.get("last_modified")),
+            ),
+            expired=now >= float(entry["expires_at"]),
+        )
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        *,
+        validators: Validators = Validators(),
+        ttl: float | None = None,
+    ) -> None:
+        encoded = html.encode()
+        digest = hashlib.sha256(encoded).hexdigest()
+        blob = self._blob_path(digest)
+        compressed = None if blob.exists() else gzip.compress(encoded)
+        now = self._clock()
+        with self._lock:
+            # Written under the lock, so that another thread can't delete the blob as
+            # unused before the index points at it.
+            if not blob.exists():
+                atomic_write(blob, compressed or gzip.compress(encoded))
+            previous = self._index.get(url)
+            self._index[url] = {
+                "digest": digest,
+                "size": blob.stat().st_size,
+                "expires_at": now + (self.ttl if ttl is None else ttl),
+                "last_access": now,
+                **validators.to_json(),
+            }
+            if previous is not None:
+                self._delete_if_unused(str(previous["digest"]))
+            self._evict()
+            # Saved by `flush`, rather than rewriting the whole index for every page.
+            self._dirty = True
+
+    def touch(self, url: str, *, ttl: float | None = None) -> None:
+        # Extend the TTL of a page that the server confirmed is unchanged.
+        with self._lock:
+            entry = self._index.get(url)
+            if entry is None:
+                return
+            now = self._clock()
+            entry["expires_at"] = now + (self.ttl if ttl is None else ttl)
+            entry["last_access"] = now
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def total_bytes(self) -> int:
+        return sum(self._blob_sizes().values())
+
+    def _blob_sizes(self) -> dict[str, int]:
+        return {str(e["digest"]): int(e["size"]) for e in self._index.values()}
+
+    def _evict(self) -> None:
+        blob_sizes = self._blob_sizes()
+        total = sum(blob_sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_last_access = sorted(
+            self._index, key=lambda u: self._index[u]["last_access"]
+        )
+        for url in by_last_access:
+            if total <= self.max_bytes:
+                break
+            digest = str(self._index.pop(url)["digest"])
+            if self._delete_if_unused(digest):
+                total -= blob_sizes[digest]
+
+    def _delete_if_unused(self, digest: str) -> bool:
+        # Other URLs may still point at the same content.
+        if any(e["digest"] == digest for e in self._index.values()):
+            return False
+        self._blob_path(digest).unlink(missing_ok=True)
+        return True
+
+    def _save_index(self) -> None:
+        atomic_write(self._index_path, json.dumps(self._index))
+        self._dirty = False
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._objects_dir / f"{digest}.html.gz"
+
+
+def _optional_str(value: str | int | float | None) -> str | None:
+    return None if value is None else str(value)
@@ -0,0 +1,103 @@
+import gzip
+import os
+from pathlib import Path
+
+from fetch import Validators
+from page_cache import PageCache
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_round_trip_is_compressed_and_persisted(tmp_path: Path) -> None:
+    html = "<p class='entryName'>96th Street Sangha</p>" * 100
+    validators = Validators(etag='"abc"')
+    with PageCache(tmp_path) as cache:
+        cache.put("http://x/?offset=0", html, validators=validators)
+
+    [blob] = (tmp_path / "objects").iterdir()
+    assert blob.stat().st_size < len(html)
+    assert gzip.decompress(blob.read_bytes()).decode() == html
+
+    cached = PageCache(tmp_path).get("http://x/?offset=0")
+    assert cached is not None
+    assert cached.html == html
+    assert cached.validators == validators
+    assert not cached.expired
+
+
+def test_index_is_saved_on_flush(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("http://x/?offset=0", "<html></html>")
+    assert PageCache(tmp_path).urls() == []
+    cache.flush()
+    assert PageCache(tmp_path).urls() == ["http://x/?offset=0"]
+
+
+def test_identical_pages_share_storage(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("http://x/?offset=0", "<html></html>")
+    cache.put("http://x/?offset=25", "<html></html>")
+    assert len(list((tmp_path / "objects").iterdir())) == 1
+
+
+def test_replaced_pages_are_deleted(tmp_path: Path) -> None:
+    cache = PageCache(tmp_path)
+    cache.put("http://x/?offset=0", "<html></html>")
+    cache.put("http://x/?offset=25", "<html></html>")
+    for i in range(5):
+        cache.put("http://x/?offset=0", f"<html>{i}</html>")
+    # The first page is still used by the second URL.
+    assert len(list((tmp_path / "objects").iterdir())) == 2
+    assert cache.total_bytes() == sum(
+        blob.stat().st_size for blob in (tmp_path / "objects").iterdir()
+    )
+
+
+def test_ttl(tmp_path: Path) -> None:
+    clock = _Clock()
+    cache = PageCache(tmp_path, ttl=60, clock=clock)
+    cache.put("a", "old")
+    cache.put("b", "short-lived", ttl=10)
+
+    def is_expired(url: str) -> bool:
+        cached = cache.get(url)
+        assert cached is not None
+        return cached.expired
+
+    clock.now += 30
+    assert not is_expired("a")
+    assert is_expired("b")
+
+    clock.now += 40
+    # Expired pages are still returned, e.g. for `--offline`, but flagged.
+    assert is_expired("a")
+    cache.touch("a")
+    assert not is_expired("a")
+
+
+def test_evicts_least_recently_used(tmp_path: Path) -> None:
+    clock = _Clock()
+    cache = PageCache(tmp_path, clock=clock)
+    cache.put("a", os.urandom(1000).hex())
+    page_size = cache.total_bytes()
+    # Leave some slack, since random pages don't compress to exactly the same size.
+    cache.max_bytes = 2 * page_size + 100
+
+    clock.now += 1
+    cache.put("b", os.urandom(1000).hex())
+    clock.now += 1
+    # Reading `a` makes `b` the least recently used page.
+    assert cache.get("a") is not None
+    clock.now += 1
+    cache.put("c", os.urandom(1000).hex())
+
+    assert sorted(cache.urls()) == ["a", "c"]
+    assert cache.get("b") is None
+    assert len(list((tmp_path / "objects").iterdir())) == 2
+    assert cache.total_bytes() <= cache.max_bytes
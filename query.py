@@ -0,0 +1,238 @@
+import argparse
+import json
+import re
+import sys
+import time
+from argparse import ArgumentParser
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from address import address_fields
+from atomic_write import atomic_write
+from center import Center
+from center_io import iter_centers, write_centers
+
+# Answers queries like "Zen centers in Chicago, IL" from inverted indexes, rather than
+# scanning every center.
+#
+# Each indexed field maps a term to the sorted ids of the centers that have it, where a
+# center's id is its position in the source file. `name`, `tradition` and `affiliation`
+# are indexed by word, so `--tradition zen` matches "Mahayana, Rinzai Zen". `state`,
+# `city` and `zip` come from the structured address fields, and match whole values.
+#
+# The index is saved next to the source file, along with the source's size and mtime, and
+# is only rebuilt when the source changes. In memory, the centers are kept as compact
+# `Center`s, and only turned back into dicts when they are returned.
+
+FIELDS = ("state", "city", "zip", "tradition", "affiliation", "name")
+
+_INDEX_VERSION = 2
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+class CenterIndex:
+    def __init__(
+        self,
+        centers: list[Center],
+        postings: dict[str, dict[str, list[int]]],
+    ) -> None:
+        self.centers = centers
+        self._postings = postings
+
+    @classmethod
+    def build(cls, centers: Iterable[Mapping[str, str | int]]) -> "CenterIndex":
+        compact = []
+        postings: dict[str, dict[str, list[int]]] = {field: {} for field in FIELDS}
+        for center_id, center in enumerate(centers):
+            compact.append(Center.from_dict(center))
+            for field, terms in _center_terms(center).items():
+                for term in terms:
+                    postings[field].setdefault(term, []).append(center_id)
+        return cls(compact, postings)
+
+    @classmethod
+    def load(cls, source: Path, index_path: Path | None = None) -> "CenterIndex":
+        # Load the saved index for `source`, building and saving it first if it is missing
+        # or out of date.
+        index_path = index_path or default_index_path(source)
+        source_fingerprint = fingerprint(source)
+        try:
+            saved = json.loads(index_path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            saved = None
+        if (
+            saved is not None
+            and saved.get("version") == _INDEX_VERSION
+            and saved.get("source") == source_fingerprint
+        ):
+            centers = [Center.from_dict(center) for center in saved["centers"]]
+            return cls(centers, saved["postings"])
+        index = cls.build(iter_centers(source))
+        index.save(index_path, source_fingerprint=source_fingerprint)
+        return index
+
+    def save(self, path: Path, *, source_fingerprint: dict[str, int]) -> None:
+        data = {
+            "version": _INDEX_VERSION,
+            "source": source_fingerprint,
+            "centers": [center.to_dict() for center in self.centers],
+            "postings": self._postings,
+        }
+        atomic_write(path, json.dumps(data))
+
+    def query(
+        self,
+        *,
+        state: str | None = None,
+        city: str | None = None,
+        zip: str | None = None,
+        tradition: str | None = None,
+        affiliation: str | None = None,
+        name: str | None = None,
+    ) -> list[dict[str, str | int]]:
+        # Every given field must match, and for the word-indexed fields, every word. The
+        # centers are returned in their original order.
+        ids = self._matching_ids(
+            state=state,
+            city=city,
+            zip=zip,
+            tradition=tradition,
+            affiliation=affiliation,
+            name=name,
+        )
+        if ids is None:
+            return [center.to_dict() for center in self.centers]
+        return [self.centers[center_id].to_dict() for center_id in sorted(ids)]
+
+    def query_any(self, *queries: Mapping[str, str]) -> list[dict[str, str | int]]:
+        # The centers that match any of `queries`, each given as the keyword arguments to
+        # `query`, in their original order.
+        ids: set[int] = set()
+        for filters in queries:
+            matching = self._matching_ids(**filters)
+            if matching is None:
+                return [center.to_dict() for center in self.centers]
+            ids |= matching
+        return [self.centers[center_id].to_dict() for center_id in sorted(ids)]
+
+    def _matching_ids(
+        self,
+        *,
+        state: str | None = None,
+        city: str | None = None,
+        zip: str | None = None,
+        tradition: str | None = None,
+        affiliation: str | None = None,
+        name: str | None = None,
+    ) -> set[int] | None:
+        # `None` if nothing was asked for, so that every center matches.
+        wanted = {
+            "state": [state.upper()] if state else [],
+            "city": [normalize_city(city)] if city else [],
+            "zip": [zip] if zip else [],
+            "tradition": words(tradition or ""),
+            "affiliation": words(affiliation or ""),
+            "name": words(name or ""),
+        }
+        posting_lists = [
+            self._postings[field].get(term, [])
+            for field, terms in wanted.items()
+            for term in terms
+        ]
+        if not posting_lists:
+            return None
+        # Intersect the shortest lists first, so that the working set shrinks quickly.
+        posting_lists.sort(key=len)
+        ids = set(posting_lists[0])
+        for posting_list in posting_lists[1:]:
+            if not ids:
+                break
+            ids.intersection_update(posting_list)
+        return ids
+
+
+def default_index_path(source: Path) -> Path:
+    return source.with_name(f"{source.stem}.index.json")
+
+
+def _center_terms(center: Mapping[str, str | int]) -> dict[str, list[str]]:
+    address = address_fields(center)
+    terms = {
+        "state": [str(address["state"])] if "state" in address else [],
+        "city": [normalize_city(str(address["city"]))] if "city" in address else [],
+        "zip": [str(address["zip"])] if "zip" in address else [],
+    }
+    terms["tradition"] = words(str(center.get("Tradition", "")))
+    terms["affiliation"] = words(str(center.get("Affiliation", "")))
+    terms["name"] = words(str(center["name"]))
+    return terms
+
+
+def words(text: str) -> list[str]:
+    return list(dict.fromkeys(word.casefold() for word in _WORD.findall(text)))
+
+
+def normalize_city(city: str) -> str:
+    return " ".join(city.replace(".", " ").split()).casefold()
+
+
+def fingerprint(source: Path) -> dict[str, int]:
+    stat = source.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    start = time.perf_counter()
+    index = CenterIndex.load(Path(args.input))
+    loaded = time.perf_counter()
+    centers = index.query(
+        state=args.state,
+        city=args.city,
+        zip=args.zip,
+        tradition=args.tradition,
+        affiliation=args.affiliation,
+        name=args.name,
+    )
+    queried = time.perf_counter()
+    if args.output:
+        write_centers(Path(args.output), centers)
+    else:
+        for center in centers:
+            print(json.dumps(center))
+    print(
+        f"{len(centers)} centers, loaded the index in {(loaded - start) * 1000:.1f} ms "
+        f"and queried it in {(queried - loaded) * 1000:.3f} ms",
+        file=sys.stderr,
+    )
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`. The index is saved next to it, and rebuilt whenever it changes.",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write the matching centers to this `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet` file, rather than printing them as JSON Lines.",
+    )
+    parser.add_argument("--state", help="A two letter state code, e.g. `IL`.")
+    parser.add_argument("--city", help="The whole city name, e.g. `New York`.")
+    parser.add_argument("--zip", help="A five digit ZIP code.")
+    parser.add_argument(
+        "--tradition", help="Words that must all appear in the tradition."
+    )
+    parser.add_argument(
+        "--affiliation", help="Words that must all appear in the affiliation."
+    )
+    parser.add_argument("--name", help="Words that must all appear in the name.")
+    return parser
+
+
+if __name__ == "__main__":
+    main()
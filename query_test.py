@@ -0,0 +1,90 @@
+import json
+import os
+from pathlib import Path
+
+from center_io import write_centers
+from query import CenterIndex, default_index_path
+
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": "Chicago Zen Community",
+        "page": 12,
+        "Address": "Chicago IL",
+        "Tradition": "Mahayana, Rinzai Zen",
+        "Affiliation": "The Korinji Foundation",
+    },
+    {
+        "name": "Harmony Zen Center",
+        "page": 25,
+        "Address": "4635 North Racine Avenue, 2nd Floor, Chicago, IL 60640",
+        "Tradition": "Mahayana, Rinzai/Soto Zen",
+        "Affiliation": "Buddhist Temple of Chicago",
+    },
+    {
+        "name": "Evanston Meditation Center",
+        "page": 30,
+        "Address": "1703 Orrington Avenue, Evanston IL 60201",
+        "Tradition": "Theravada, Vipassana",
+    },
+    {
+        # "Chi" and "IL" appear inside words, but this isn't in Illinois.
+        "name": "Chinese Buddhist Association of Philadelphia",
+        "page": 40,
+        "Address": "1209 Arch Street, Philadelphia, PA 19107",
+        "Tradition": "Mahayana, Chan",
+    },
+    {"name": "Rigpa Online", "page": 50},
+]
+
+
+def test_query() -> None:
+    index = CenterIndex.build(_CENTERS)
+
+    def names(**kwargs: str) -> list[str | int]:
+        return [center["name"] for center in index.query(**kwargs)]
+
+    assert names(state="il") == [
+        "Chicago Zen Community",
+        "Harmony Zen Center",
+        "Evanston Meditation Center",
+    ]
+    assert names(state="IL", city="Chicago", tradition="Zen") == [
+        "Chicago Zen Community",
+        "Harmony Zen Center",
+    ]
+    assert names(tradition="soto zen") == ["Harmony Zen Center"]
+    assert names(zip="60201") == ["Evanston Meditation Center"]
+    assert names(affiliation="temple") == ["Harmony Zen Center"]
+    assert names(name="chi") == []
+    assert names(name="rigpa") == ["Rigpa Online"]
+    assert names(state="IL", tradition="chan") == []
+    assert len(names()) == len(_CENTERS)
+
+
+def test_query_any() -> None:
+    # No address, but Chicago in the name.
+    index = CenterIndex.build([*_CENTERS, {"name": "Rigpa Chicago", "page": 51}])
+    assert [
+        center["name"]
+        for center in index.query_any({"state": "IL"}, {"name": "chicago"})
+    ] == [
+        "Chicago Zen Community",
+        "Harmony Zen Center",
+        "Evanston Meditation Center",
+        "Rigpa Chicago",
+    ]
+    assert index.query_any({"state": "PA"}, {}) == index.query()
+
+
+def test_saved_index_is_rebuilt_when_source_changes(tmp_path: Path) -> None:
+    source = tmp_path / "centers.jsonl"
+    write_centers(source, _CENTERS[:2])
+    assert len(CenterIndex.load(source).query(state="IL")) == 2
+    saved = json.loads(default_index_path(source).read_text())
+    assert saved["postings"]["city"] == {"chicago": [0, 1]}
+
+    write_centers(source, _CENTERS)
+    # Make sure the mtime changes, even on filesystems with coarse timestamps.
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert len(CenterIndex.load(source).query(state="IL")) == 3
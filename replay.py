@@ -0,0 +1,261 @@
+import argparse
+import hashlib
+import random
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from collections import Counter
+from collections.abc import Mapping
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from corpus import iter_corpus, render_page
+from page_cache import PageCache
+from scrape import ENTRIES_PER_PAGE
+
+# Serves a stand-in for the buddhanet.info directory on localhost, so that the whole crawl,
+# `scrape.main` included, can be tested and benchmarked without the network:
+#
+#   pants run replay.py -- --latency-ms 200 --error-rate 0.05
+#   pants run scrape.py -- --base-url 'http://127.0.0.1:8001/wbd/country.php?country_id=2'
+#
+# Each page is replayed from the page cache if a real scrape recorded it there, and else
+# regenerated from `buddhist_centers.json` by `corpus.py`, with the same pager links as the
+# real pages. Past the last page, pages are empty, as on the real site.
+#
+# To behave like a real server under load, every response can be delayed by
+# `latency_ms` plus up to `jitter_ms`, a fraction `error_rate` of requests fail with a
+# `503`, and requests beyond `throttle_per_second` are refused with a `429` and a
+# `Retry-After`. Pages carry an `ETag`, and a matching `If-None-Match` gets a `304`.
+# The random choices are seeded, so a run can be repeated.
+
+DIRECTORY_PATH = "/wbd/country.php"
+
+
+@dataclass(frozen=True)
+class ReplayConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    # `None` for no limit. Bursts of up to a second's worth of requests are allowed.
+    throttle_per_second: float | None = None
+    retry_after_seconds: int = 1
+    seed: int = 0
+
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        pages: Mapping[int, str],
+        config: ReplayConfig = ReplayConfig(),
+    ) -> None:
+        super().__init__(address, _Handler)
+        self.config = config
+        self._pages = {page_number: _page(html) for page_number, html in pages.items()}
+        self._empty_page = _page(render_page([]))
+        self._lock = threading.Lock()
+        self._random = random.Random(config.seed)
+        self._statuses: Counter[int] = Counter()
+        self._tokens = config.throttle_per_second or 0.0
+        self._refilled = time.monotonic()
+
+    @property
+    def base_url(self) -> str:
+        # What to pass to `scrape.py --base-url`.
+        return f"http://127.0.0.1:{self.server_port}{DIRECTORY_PATH}?country_id=2"
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def stats(self) -> dict[str, int]:
+        # How many responses were sent with each status code.
+        with self._lock:
+            return {str(status): n for status, n in sorted(self._statuses.items())}
+
+    def respond(
+        self, path: str, if_none_match: str | None = None
+    ) -> tuple[HTTPStatus, bytes, dict[str, str]]:
+        status, body, headers = self._respond(path, if_none_match)
+        with self._lock:
+            self._statuses[status] += 1
+        return status, body, headers
+
+    def _respond(
+        self, path: str, if_none_match: str | None
+    ) -> tuple[HTTPStatus, bytes, dict[str, str]]:
+        # Refused requests are answered right away, like a proxy in front of the server.
+        if not self._take_token():
+            return (
+                HTTPStatus.TOO_MANY_REQUESTS,
+                b"",
+                {"Retry-After": str(self.config.retry_after_seconds)},
+            )
+        with self._lock:
+            delay = self.config.latency_ms + self._random.uniform(
+                0, self.config.jitter_ms
+            )
+            fail = self._random.random() < self.config.error_rate
+        time.sleep(delay / 1000)
+        if fail:
+            return HTTPStatus.SERVICE_UNAVAILABLE, b"", {}
+        url = urlsplit(path)
+        if url.path != DIRECTORY_PATH:
+            return HTTPStatus.NOT_FOUND, b"", {}
+        try:
+            offset = int(parse_qs(url.query).get("offset", ["0"])[0])
+        except ValueError:
+            return HTTPStatus.BAD_REQUEST, b"", {}
+        body, etag = self._pages.get(offset // ENTRIES_PER_PAGE + 1, self._empty_page)
+        if if_none_match == etag:
+            return HTTPStatus.NOT_MODIFIED, b"", {"ETag": etag}
+        return (
+            HTTPStatus.OK,
+            body,
+            {"ETag": etag, "Content-Type": "text/html; charset=utf-8"},
+        )
+
+    def _take_token(self) -> bool:
+        # A token bucket that refills at `throttle_per_second`.
+        rate = self.config.throttle_per_second
+        if rate is None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                max(rate, 1.0), self._tokens + (now - self._refilled) * rate
+            )
+            self._refilled = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Otherwise each response waits 40 ms for the client to acknowledge its headers.
+    disable_nagle_algorithm = True
+    server: ReplayServer
+
+    def do_GET(self) -> None:
+        status, body, headers = self.server.respond(
+            self.path, self.headers.get("If-None-Match")
+        )
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def load_pages(source: Path, *, recorded: Path | None = None) -> dict[int, str]:
+    # The pages that `recorded`, a page cache, has, and the rest regenerated from `source`.
+    if recorded is None:
+        return dict(iter_corpus(source))
+    with PageCache(recorded) as cache:
+        return dict(iter_corpus(source, cache=cache))
+
+
+def _page(html: str) -> tuple[bytes, str]:
+    body = html.encode()
+    return body, f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def create_replay_server(args: argparse.Namespace, *, port: int) -> ReplayServer:
+    pages = load_pages(
+        Path(args.input),
+        recorded=Path(args.recorded_pages) if args.recorded_pages else None,
+    )
+    config = ReplayConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_per_second=args.throttle_per_second or None,
+        seed=args.seed,
+    )
+    return ReplayServer(("127.0.0.1", port), pages, config)
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    server = create_replay_server(args, port=args.port)
+    print(
+        f"Replaying {server.page_count} pages. Scrape them with:\n"
+        f"  pants run scrape.py -- --base-url '{server.base_url}' --cache-dir ''",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Responses by status: {server.stats()}", file=sys.stderr)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument("--port", type=int, default=8001)
+    add_replay_arguments(parser)
+    return parser
+
+
+def add_replay_arguments(parser: argparse.ArgumentParser) -> None:
+    # Shared with `bench_crawl.py`, so named not to clash with `scrape.py`'s arguments.
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The `.json` centers to regenerate the pages from.",
+    )
+    parser.add_argument(
+        "--recorded-pages",
+        help="A page cache, e.g. `.page_cache`, whose pages are replayed as they were "
+        "recorded, rather than regenerated.",
+    )
+    parser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=0.0,
+        help="How long the server takes to answer each request.",
+    )
+    parser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=0.0,
+        help="Up to how much longer, at random, each request takes.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="The fraction of requests that fail with a `503`, e.g. `0.05`.",
+    )
+    parser.add_argument(
+        "--throttle-per-second",
+        type=float,
+        default=0.0,
+        help="Refuse requests beyond this rate with a `429` and `Retry-After`. Use 0 "
+        "for no limit.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seeds the latency jitter and which requests fail.",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import json
+import sys
+import threading
+from collections.abc import Iterator
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import requests
+
+import scrape
+from center_io import iter_centers, write_centers
+from fetch import Fetcher
+from replay import ReplayConfig, ReplayServer, load_pages
+from scrape import discover_page_count, page_url, parse_page
+
+# Three pages, the last one short, with a name that isn't ASCII.
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": f"Chùa {page}-{i}",
+        "page": page,
+        "Address": f"{i} Main Street, Chicago, IL 60640",
+        "Tradition": "Mahayana, Zen",
+        "street": f"{i} Main Street",
+        "city": "Chicago",
+        "state": "IL",
+        "zip": "60640",
+    }
+    for page, count in [(1, 25), (2, 25), (3, 3)]
+    for i in range(count)
+]
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    source = tmp_path / "source.json"
+    write_centers(source, _CENTERS)
+    return source
+
+
+def _serve(source: Path, config: ReplayConfig = ReplayConfig()) -> ReplayServer:
+    server = ReplayServer(("127.0.0.1", 0), load_pages(source), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def server(source: Path) -> Iterator[ReplayServer]:
+    server = _serve(source)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_replays_pages(server: ReplayServer) -> None:
+    first = requests.get(page_url(1, base_url=server.base_url))
+    assert first.status_code == HTTPStatus.OK
+    assert discover_page_count(first.text) == 3
+    assert parse_page(first.text, page_number=1) == _CENTERS[:25]
+    last = requests.get(page_url(3, base_url=server.base_url))
+    assert parse_page(last.text, page_number=3) == _CENTERS[50:]
+    # Past the last page, pages are empty.
+    past = requests.get(page_url(4, base_url=server.base_url))
+    assert past.status_code == HTTPStatus.OK
+    assert parse_page(past.text, page_number=4) == []
+
+    etag = first.headers["ETag"]
+    revalidated = requests.get(
+        page_url(1, base_url=server.base_url), headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED
+    assert requests.get(server.base_url.replace("country", "nowhere")).status_code == (
+        HTTPStatus.NOT_FOUND
+    )
+    assert server.stats() == {"200": 3, "304": 1, "404": 1}
+
+
+def test_errors_and_throttling(source: Path) -> None:
+    failing = _serve(source, ReplayConfig(error_rate=1.0))
+    throttled = _serve(source, ReplayConfig(throttle_per_second=2))
+    try:
+        assert requests.get(failing.base_url).status_code == (
+            HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        statuses = [requests.get(throttled.base_url).status_code for _ in range(5)]
+        # Up to a second's worth of requests are let through at once.
+        assert statuses[:2] == [HTTPStatus.OK] * 2
+        assert HTTPStatus.TOO_MANY_REQUESTS in statuses
+        refused = requests.get(throttled.base_url)
+        assert refused.headers["Retry-After"] == "1"
+    finally:
+        for server in (failing, throttled):
+            server.shutdown()
+            server.server_close()
+
+
+@pytest.mark.parametrize("parse_workers", ["0", "2"])
+def test_scrape_main_end_to_end(
+    source: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    parse_workers: str,
+) -> None:
+    # Some requests fail, and are retried without waiting.
+    server = _serve(source, ReplayConfig(error_rate=0.5))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Fetcher, "_backoff", lambda self, attempt: 0.0)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "scrape.py",
+            "--base-url",
+            server.base_url,
+            "--cache-dir",
+            "",
+            "--concurrency",
+            "4",
+            "--max-requests-per-second",
+            "0",
+            "--max-retries",
+            "10",
+            "--parse-workers",
+            parse_workers,
+            "--metrics-json",
+            "metrics.json",
+        ],
+    )
+    try:
+        scrape.main()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert list(iter_centers(tmp_path / "buddhist_centers.json")) == _CENTERS
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert report["pages"] == 3
+    assert report["errors"] == 0
+    statuses = server.stats()
+    assert statuses["503"] == report["retries"] > 0
+    assert statuses["200"] == 3
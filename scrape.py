@@ -1,37 +1,396 @@
 import argparse
-import json
+import contextlib
+import functools
+import itertools
+import multiprocessing
+import os
 import re
+import time
 from argparse import ArgumentParser
+from collections import deque
+from collections.abc import Callable, Generator, Iterable, Iterator, Mapping
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import TypeGuard
+from typing import TypeVar
 
-import requests
 from bs4 import BeautifulSoup, NavigableString, PageElement, Tag
 from tqdm import tqdm
 
-_ENTRIES_PER_PAGE = 25
+from address import parse_address
+from center_io import FORMATS, iter_centers, output_path, write_centers
+from changes import Changelog, center_hashes, content_hash, diff_page
+from checkpoint import CheckpointStore, PageRecord
+from entries import (
+    KNOWN_KEY_PATTERN,
+    EntryParagraph,
+    add_notes_and_events,
+    normalize_value_texts,
+    pair_entries,
+)
+from fetch import Fetcher, RateLimiter, Validators
+from metrics import FetchStats, PageMetrics, RunMetrics
+from page_cache import PageCache
+
+ENTRIES_PER_PAGE = 25
+_BASE_URL = "http://www.buddhanet.info/wbd/country.php?country_id=2"
+PARSERS = ("html.parser", "lxml")
+
+# The `offset` in a link's query string, as in `country.php?country_id=2&amp;offset=50`.
+_OFFSET_LINK = re.compile(r"""href=["'][^"']*[?&](?:amp;)?offset=(\d+)""")
+
+# With a single core, a parser process only adds the cost of sending pages to it.
+_DEFAULT_PARSE_WORKERS = cpus if (cpus := os.cpu_count() or 1) > 1 else 0
+
+_T = TypeVar("_T")
+_U = TypeVar("_U")
+
+
+@dataclass(frozen=True)
+class FetchedPage:
+    page_number: int
+    url: str
+    # The raw HTML, or `None` if the server reported that the page has not changed since
+    # `validators` were recorded.
+    html: str | None
+    validators: Validators
+    # Set if the page could not be fetched, in which case `html` is `None`.
+    error: str | None = None
+    # The hash of `html`, if there is any.
+    content_hash: str | None = None
+    # How the page was fetched, unless fetching it failed.
+    fetch_stats: FetchStats | None = field(default=None, compare=False)
+
+
+@dataclass(frozen=True)
+class ScrapedPage:
+    page_number: int
+    url: str
+    # `None` if the server reported that the page has not changed since `validators` were
+    # recorded, in which case the previously saved centers for the page are still current.
+    centers: list[dict[str, str | int]] | None
+    validators: Validators
+    # Set if the page could not be fetched or parsed, in which case `centers` is `None`.
+    error: str | None = None
+    # The hash of the page's HTML, if it was parsed.
+    content_hash: str | None = None
+    # How long the page took, which isn't part of what was scraped.
+    fetch_stats: FetchStats | None = field(default=None, compare=False)
+    parse_seconds: float | None = field(default=None, compare=False)
 
 
 def main() -> None:
-    args = create_parser().parse_args()
-    result = []
-
-    most_recent_saved_page: int | None = None
-    fp = Path("buddhist_centers.json")
-    if args.reuse and fp.exists():
-        result.extend(json.loads(fp.read_text()))
-        if result:
-            most_recent_saved_page = result[-1]["page"]
-
-    for page in tqdm(range(args.to_page), unit="page"):
-        if most_recent_saved_page is not None and page + 1 <= most_recent_saved_page:
-            continue
-        offset = page * _ENTRIES_PER_PAGE
-        url = f"http://www.buddhanet.info/wbd/country.php?country_id=2&offset={offset}"
-        result.extend(scrape_buddhist_centers(url, page_number=page + 1))
+    parser = create_parser()
+    args = parser.parse_args()
+    # Check the flags before the checkpoint is opened, or seeded from the output.
+    if args.refresh and (args.reuse or args.offline):
+        parser.error("`--refresh` can't be combined with `--reuse` or `--offline`.")
+    if args.offline and not args.cache_dir:
+        parser.error("`--offline` requires a `--cache-dir`.")
+    fp = output_path("buddhist_centers", args.format)
+    checkpoints = CheckpointStore(Path(args.checkpoint))
+    # Carry over results from before checkpoints existed.
+    if not checkpoints.records() and fp.exists():
+        _seed_checkpoints(checkpoints, iter_centers(fp), base_url=args.base_url)
+    previous_records = checkpoints.records()
+
+    fetcher = create_fetcher(args)
+    cache = create_cache(args)
+    # Find the last page from the pager on page 1, unless told where to stop.
+    first_page = (
+        _fetch_first_page(
+            fetcher=fetcher,
+            cache=cache,
+            previous_record=previous_records.get(1),
+            refresh=args.refresh,
+            base_url=args.base_url,
+        )
+        if args.to_page is None and not args.offline
+        else None
+    )
+    last_page = args.to_page or _discover_last_page(
+        first_page, cache=cache, base_url=args.base_url
+    )
+    all_page_numbers = range(1, last_page + 1)
+    page_numbers = (
+        checkpoints.pages_to_resume(all_page_numbers)
+        if args.reuse
+        else list(all_page_numbers)
+    )
+    # Only revalidate pages whose centers we still have, since a `304` means reusing them.
+    known_validators = {
+        page_number: record.validators
+        for page_number in page_numbers
+        if (record := previous_records.get(page_number)) is not None
+        and record.has_centers
+    }
+    known_content_hashes = {
+        page_number: record.content_hash
+        for page_number in page_numbers
+        if (record := previous_records.get(page_number)) is not None
+        and record.has_centers
+        and record.content_hash is not None
+    }
+    pages = (
+        parse_cached_pages(
+            page_numbers,
+            cache=cache,
+            base_url=args.base_url,
+            parser=args.parser,
+            parse_workers=args.parse_workers,
+            parse_queue_size=args.parse_queue_size,
+        )
+        if args.offline and cache is not None
+        else scrape_pages(
+            page_numbers,
+            fetcher=fetcher,
+            cache=cache,
+            base_url=args.base_url,
+            concurrency=args.concurrency,
+            validators_by_page=known_validators,
+            parser=args.parser,
+            parse_workers=args.parse_workers,
+            parse_queue_size=args.parse_queue_size,
+            revalidate=args.refresh,
+            content_hashes_by_page=known_content_hashes if args.refresh else None,
+            prefetched={1: first_page} if first_page is not None else None,
+        )
+    )
+    stats = CrawlStats()
+    metrics = create_metrics(args)
+    changelog = Changelog(Path(args.changelog)) if args.refresh else None
+    with (
+        fetcher,
+        cache or contextlib.nullcontext(),
+        checkpoints,
+        changelog or contextlib.nullcontext(),
+    ):
+        scraped_page_numbers = checkpoint_pages(
+            tqdm(pages, total=len(page_numbers), unit="page"),
+            checkpoints=checkpoints,
+            previous_records=previous_records,
+            stats=stats,
+            changelog=changelog,
+            metrics=metrics,
+        )
+        # Stream each page's centers to the output as soon as the page is done, filling in
+        # the pages that weren't scraped this run from their checkpoints.
+        write_centers(
+            fp,
+            centers_in_page_order(
+                all_page_numbers,
+                scraped_page_numbers,
+                scraped=set(page_numbers),
+                checkpoints=checkpoints,
+            ),
+        )
+        checkpoints.compact()
+    if metrics is not None:
+        write_metrics(metrics, args)
+
+    elapsed = time.perf_counter() - stats.start
+    if stats.scraped:
+        print(
+            f"Scraped {stats.scraped} pages in {elapsed:.1f}s "
+            f"({stats.scraped / elapsed:.2f} pages/sec, "
+            f"{stats.not_modified} unchanged since the last run)"
+        )
+    if changelog is not None:
+        counts = ", ".join(f"{n} {kind}" for kind, n in changelog.counts.items())
+        print(f"Centers {counts}. Appended the changes to {changelog.path}.")
+    if stats.failed:
+        print(
+            f"Failed to scrape pages {stats.failed}. Rerun with `--reuse` to retry only "
+            "those pages."
+        )
 
-    output = json.dumps(result, indent=2)
-    fp.write_text(output)
+
+def _fetch_first_page(
+    *,
+    fetcher: Fetcher,
+    cache: PageCache | None,
+    previous_record: PageRecord | None,
+    refresh: bool,
+    base_url: str = _BASE_URL,
+) -> FetchedPage:
+    # Fetched like any other page, so that `scrape_pages` can reuse it.
+    return try_fetch_page(
+        page_url(1, base_url=base_url),
+        page_number=1,
+        fetcher=fetcher,
+        cache=cache,
+        validators=(
+            previous_record.validators
+            if previous_record is not None and previous_record.has_centers
+            else None
+        ),
+        revalidate=refresh,
+    )
+
+
+def _discover_last_page(
+    first_page: FetchedPage | None,
+    *,
+    cache: PageCache | None,
+    base_url: str = _BASE_URL,
+) -> int:
+    html = first_page.html if first_page is not None else None
+    # The page may be unchanged since the last run, or we may be offline.
+    if html is None and cache is not None:
+        cached = cache.get(page_url(1, base_url=base_url))
+        html = cached.html if cached is not None else None
+    # Without a pager, fall back to a generous guess. The crawl still stops at the first
+    # page without any centers. At the time of writing, there were only 2650 centers, so
+    # conservatively go up to 3000.
+    return (discover_page_count(html) if html else None) or 3000 // ENTRIES_PER_PAGE
+
+
+def create_fetcher(args: argparse.Namespace) -> Fetcher:
+    return Fetcher(
+        timeout=args.timeout,
+        max_retries=args.max_retries,
+        pool_size=args.concurrency,
+        rate_limiter=RateLimiter(args.max_requests_per_second),
+    )
+
+
+def create_cache(args: argparse.Namespace) -> PageCache | None:
+    if not args.cache_dir:
+        return None
+    return PageCache(
+        Path(args.cache_dir),
+        ttl=args.cache_ttl_hours * 60 * 60,
+        max_bytes=args.cache_max_mb * 1024 * 1024,
+    )
+
+
+@dataclass
+class CrawlStats:
+    start: float = field(default_factory=time.perf_counter)
+    scraped: int = 0
+    not_modified: int = 0
+    failed: list[int] = field(default_factory=list)
+
+
+def checkpoint_pages(
+    pages: Iterable[ScrapedPage],
+    *,
+    checkpoints: CheckpointStore,
+    previous_records: Mapping[int, PageRecord],
+    stats: CrawlStats,
+    changelog: Changelog | None = None,
+    metrics: RunMetrics | None = None,
+) -> Iterator[int]:
+    # Saves each page to `checkpoints`, and any changes to its centers to `changelog`, and
+    # then yields its page number.
+    for page in pages:
+        start = time.perf_counter()
+        centers = _checkpoint_page(
+            page,
+            checkpoints=checkpoints,
+            previous=previous_records.get(page.page_number),
+            stats=stats,
+            changelog=changelog,
+        )
+        if metrics is not None:
+            metrics.record(
+                PageMetrics(
+                    page.page_number,
+                    page.url,
+                    page.fetch_stats,
+                    page.parse_seconds,
+                    checkpoint_seconds=time.perf_counter() - start,
+                    centers=centers,
+                    error=page.error,
+                )
+            )
+        yield page.page_number
+
+
+def _checkpoint_page(
+    page: ScrapedPage,
+    *,
+    checkpoints: CheckpointStore,
+    previous: PageRecord | None,
+    stats: CrawlStats,
+    changelog: Changelog | None,
+) -> int | None:
+    # Returns how many centers the page has, or `None` if it failed.
+    stats.scraped += 1
+    if page.error is not None:
+        stats.failed.append(page.page_number)
+        checkpoints.record_failure(page.page_number, page.url, page.error)
+        return None
+    # The previous centers stay in the checkpoint's file, and are only read back when
+    # they are needed.
+    if page.centers is None:
+        stats.not_modified += 1
+        assert previous is not None
+        saved = checkpoints.read_saved(previous)
+        assert saved is not None
+        checkpoints.record_page(
+            page.page_number,
+            page.url,
+            saved.centers,
+            page.validators,
+            content_hash=previous.content_hash,
+            center_hashes=saved.center_hashes,
+        )
+        return len(saved.centers)
+    hashes = center_hashes(page.centers)
+    if changelog is not None:
+        old_hashes: Mapping[str, str] = {}
+        saved = checkpoints.read_saved(previous) if previous is not None else None
+        if saved is not None:
+            old_hashes = saved.center_hashes or center_hashes(saved.centers)
+        changelog.record(diff_page(page.page_number, old_hashes, page.centers, hashes))
+    checkpoints.record_page(
+        page.page_number,
+        page.url,
+        page.centers,
+        page.validators,
+        content_hash=page.content_hash,
+        center_hashes=hashes,
+    )
+    return len(page.centers)
+
+
+def centers_in_page_order(
+    all_page_numbers: Iterable[int],
+    scraped_page_numbers: Iterator[int],
+    *,
+    scraped: set[int],
+    checkpoints: CheckpointStore,
+) -> Iterator[dict[str, str | int]]:
+    # `scraped_page_numbers` yields the pages in `scraped` in ascending order, as each is
+    # checkpointed, although it may skip some, e.g. pages missing from the cache with
+    # `--offline`. Every other page is already in `checkpoints`.
+    last_scraped = 0
+    for page_number in all_page_numbers:
+        if page_number in scraped:
+            while last_scraped < page_number:
+                done = next(scraped_page_numbers, None)
+                if done is None:
+                    break
+                last_scraped = done
+        yield from checkpoints.centers([page_number])
+
+
+def _seed_checkpoints(
+    checkpoints: CheckpointStore,
+    centers: Iterable[dict[str, str | int]],
+    *,
+    base_url: str = _BASE_URL,
+) -> None:
+    # The saved centers are in page order, so only one page is held in memory at a time.
+    for page_number, page_centers in itertools.groupby(centers, lambda c: c["page"]):
+        assert isinstance(page_number, int)
+        checkpoints.record_page(
+            page_number,
+            page_url(page_number, base_url=base_url),
+            list(page_centers),
+            Validators(),
+        )
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -39,218 +398,594 @@ def create_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--to-page",
         type=int,
-        # At the time of writing, there were only 2650 centers. So conservatively go up to 3000.
-        default=3000 // _ENTRIES_PER_PAGE,
-        help="Parse up to and including this page.",
+        help="Parse up to and including this page. Defaults to the last page, as linked "
+        "from the pager on page 1.",
     )
     parser.add_argument(
         "--reuse",
         action="store_true",
         default=False,
-        help="If true, reuse results already saved to JSON. Only scrape missing pages.",
+        help="If true, reuse the pages already saved to the checkpoint file. Only scrape "
+        "pages that are missing or that failed last time.",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        default=False,
+        help="Fetch every page again, even if it is cached, but only parse the pages "
+        "whose HTML changed since they were last scraped. Appends the centers that were "
+        "added, removed or modified to `--changelog`.",
+    )
+    parser.add_argument(
+        "--changelog",
+        default="buddhist_centers.changelog.jsonl",
+        help="Where `--refresh` appends one line per changed center.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="`json` writes a pretty-printed array to `buddhist_centers.json`. `jsonl` "
+        "streams one center per line to `buddhist_centers.jsonl` as pages complete. "
+        "`sqlite` stores each page in `buddhist_centers.sqlite`, with indexed columns. "
+        "`parquet` writes typed columns to `buddhist_centers.parquet`, for analysis.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default="buddhist_centers.checkpoint.jsonl",
+        help="Where to save each page as soon as it is scraped. `buddhist_centers.json` "
+        "is assembled from this file at the end of the run.",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=_BASE_URL,
+        help="The directory to scrape, without an `offset`. Point this at `replay.py` "
+        "to crawl regenerated or recorded pages without the network.",
+    )
+    add_fetch_arguments(parser)
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        default=False,
+        help="Re-parse the pages in the cache without using the network, e.g. after "
+        "changing how values are normalized. Pages missing from the cache are skipped.",
     )
     return parser
 
 
-def scrape_buddhist_centers(
-    url: str, *, page_number: int
+def add_fetch_arguments(parser: argparse.ArgumentParser) -> None:
+    # The arguments for how pages are fetched and parsed, shared with `crawl.py`.
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="How many pages to fetch at the same time.",
+    )
+    parser.add_argument(
+        "--max-requests-per-second",
+        type=float,
+        default=5.0,
+        help="Cap on requests per second sent to any single host. Use 0 for no cap.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Seconds to wait on a single request before retrying it.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=4,
+        help="How many times to retry a page after a timeout, connection error or 5xx.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=".page_cache",
+        help="Where to cache the raw HTML of each page. Pass an empty string to disable.",
+    )
+    parser.add_argument(
+        "--cache-ttl-hours",
+        type=float,
+        default=24.0,
+        help="How long a cached page is used before it is fetched again.",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=256,
+        help="Evict the least recently used pages once the cache is larger than this.",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=PARSERS,
+        default="html.parser",
+        help="How to parse pages. `lxml` is faster and gives the same results, but "
+        "requires lxml to be installed.",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=_DEFAULT_PARSE_WORKERS,
+        help="How many processes parse pages, separately from the threads that fetch "
+        "them. Use 0 to parse each page on the thread that fetched it. Defaults to the "
+        "number of cores.",
+    )
+    parser.add_argument(
+        "--parse-queue-size",
+        type=int,
+        help="How many fetched pages may wait to be parsed before fetching pauses. "
+        "Defaults to twice `--parse-workers`.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Where to write a JSON report of the run: each page's fetch latency, "
+        "bytes, HTTP status, retries, parse time and centers, with p50/p95/p99 "
+        "summaries.",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        help="Where to write the run's summaries as a Prometheus textfile, e.g. for "
+        "node_exporter's textfile collector.",
+    )
+
+
+def create_metrics(args: argparse.Namespace) -> RunMetrics | None:
+    # Only collect metrics if they'll be written somewhere.
+    if args.metrics_json or args.metrics_prom:
+        return RunMetrics()
+    return None
+
+
+def write_metrics(metrics: RunMetrics, args: argparse.Namespace) -> None:
+    if args.metrics_json:
+        metrics.write_json(Path(args.metrics_json))
+    if args.metrics_prom:
+        metrics.write_prometheus(Path(args.metrics_prom))
+
+
+def page_url(page_number: int, *, base_url: str = _BASE_URL) -> str:
+    offset = (page_number - 1) * ENTRIES_PER_PAGE
+    return f"{base_url}&offset={offset}"
+
+
+def discover_page_count(html: str) -> int | None:
+    # The pagination links on a page point at the other pages' offsets, so the largest
+    # offset is the last page. `None` if the page has no pagination links, e.g. because
+    # there is only one page.
+    offsets = [int(offset) for offset in _OFFSET_LINK.findall(html)]
+    if not offsets:
+        return None
+    return max(offsets) // ENTRIES_PER_PAGE + 1
+
+
+def scrape_pages(
+    page_numbers: Iterable[int],
+    *,
+    fetcher: Fetcher,
+    cache: PageCache | None = None,
+    base_url: str = _BASE_URL,
+    concurrency: int = 1,
+    validators_by_page: Mapping[int, Validators] | None = None,
+    parser: str = "html.parser",
+    parse_workers: int = 0,
+    parse_queue_size: int | None = None,
+    revalidate: bool = False,
+    content_hashes_by_page: Mapping[int, str] | None = None,
+    prefetched: Mapping[int, FetchedPage] | None = None,
+) -> Iterator[ScrapedPage]:
+    # Up to `concurrency` pages are fetched at once. Results are still yielded in the
+    # order of `page_numbers`, so a slow page holds back the pages after it rather than
+    # reordering the output.
+    #
+    # With `parse_workers`, pages are parsed in that many processes, so that parsing isn't
+    # limited to one core by the GIL. Otherwise each page is parsed on the thread that
+    # fetched it.
+    #
+    # A page whose HTML hashes to its entry in `content_hashes_by_page` isn't parsed, and
+    # is reported as unchanged, like a `304`. The pages in `prefetched` aren't fetched
+    # again.
+    #
+    # The directory has ended once a page has no centers, so that is the last page
+    # yielded, and the pages still waiting to be fetched after it are cancelled.
+    def fetch(page_number: int) -> FetchedPage:
+        page = (prefetched or {}).get(page_number) or try_fetch_page(
+            page_url(page_number, base_url=base_url),
+            page_number=page_number,
+            fetcher=fetcher,
+            cache=cache,
+            validators=(validators_by_page or {}).get(page_number),
+            revalidate=revalidate,
+        )
+        known_hash = (content_hashes_by_page or {}).get(page_number)
+        if page.content_hash is not None and page.content_hash == known_hash:
+            return replace(page, html=None)
+        return page
+
+    max_in_flight = max(concurrency, 1)
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        if parse_workers > 0:
+            fetched = map_in_order(
+                executor, fetch, page_numbers, max_in_flight=max_in_flight
+            )
+            with contextlib.closing(fetched):
+                scraped = _parse_pages(
+                    fetched,
+                    parser=parser,
+                    parse_workers=parse_workers,
+                    parse_queue_size=parse_queue_size,
+                )
+                with contextlib.closing(scraped):
+                    yield from _until_empty(scraped)
+            return
+
+        def scrape(page_number: int) -> ScrapedPage:
+            return parse_fetched_page(fetch(page_number), parser=parser)
+
+        scraped = map_in_order(
+            executor, scrape, page_numbers, max_in_flight=max_in_flight
+        )
+        with contextlib.closing(scraped):
+            yield from _until_empty(scraped)
+
+
+def _until_empty(pages: Iterable[ScrapedPage]) -> Iterator[ScrapedPage]:
+    # Yields pages up to and including the first that has no centers, as opposed to
+    # centers that are unknown because the page failed or is unchanged.
+    for page in pages:
+        yield page
+        if page.centers == []:
+            return
+
+
+def try_fetch_page(
+    url: str,
+    *,
+    page_number: int,
+    fetcher: Fetcher,
+    cache: PageCache | None = None,
+    validators: Validators | None = None,
+    revalidate: bool = False,
+) -> FetchedPage:
+    # Like `fetch_page`, but a failure is returned rather than raised.
+    try:
+        return fetch_page(
+            url,
+            page_number=page_number,
+            fetcher=fetcher,
+            cache=cache,
+            validators=validators,
+            revalidate=revalidate,
+        )
+    # One bad page shouldn't stop the rest of the crawl. The failure is recorded so it can
+    # be retried.
+    except Exception as e:
+        return FetchedPage(page_number, url, None, Validators(), error=_error(e))
+
+
+def fetch_page(
+    url: str,
+    *,
+    page_number: int,
+    fetcher: Fetcher,
+    cache: PageCache | None = None,
+    validators: Validators | None = None,
+    revalidate: bool = False,
+) -> FetchedPage:
+    # With `revalidate`, even a cached page that hasn't expired is fetched again.
+    start = time.perf_counter()
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None and not cached.expired and not revalidate:
+        stats = FetchStats(
+            status_code=None,
+            attempts=0,
+            seconds=time.perf_counter() - start,
+            wait_seconds=0.0,
+            bytes=len(cached.html.encode()),
+        )
+        return _fetched_page(page_number, url, cached.html, cached.validators, stats)
+
+    # A `304` for `validators` means that the caller's saved centers are still current. If
+    # there are none, but the page is still cached, revalidate the cached copy instead.
+    cached_html: str | None = None
+    if validators is None and cached is not None:
+        validators = cached.validators
+        cached_html = cached.html
+    response = fetcher.fetch(url, validators=validators)
+    stats = FetchStats(
+        status_code=response.status_code,
+        attempts=response.attempts,
+        seconds=response.seconds,
+        wait_seconds=response.wait_seconds,
+        bytes=response.bytes,
+    )
+    if response.text is None:
+        if cache is not None:
+            cache.touch(url)
+        return _fetched_page(page_number, url, cached_html, response.validators, stats)
+
+    if cache is not None:
+        cache.put(url, response.text, validators=response.validators)
+    return _fetched_page(page_number, url, response.text, response.validators, stats)
+
+
+def _fetched_page(
+    page_number: int,
+    url: str,
+    html: str | None,
+    validators: Validators,
+    fetch_stats: FetchStats | None = None,
+) -> FetchedPage:
+    return FetchedPage(
+        page_number,
+        url,
+        html,
+        validators,
+        content_hash=content_hash(html) if html is not None else None,
+        fetch_stats=fetch_stats,
+    )
+
+
+def parse_fetched_page(page: FetchedPage, *, parser: str) -> ScrapedPage:
+    # This runs in the parser processes, so it must be a top-level function.
+    scraped = ScrapedPage(
+        page.page_number,
+        page.url,
+        None,
+        page.validators,
+        error=page.error,
+        fetch_stats=page.fetch_stats,
+    )
+    if page.error is not None or page.html is None:
+        return scraped
+    start = time.perf_counter()
+    try:
+        centers = parse_page(page.html, page_number=page.page_number, parser=parser)
+    # Likewise, unexpected markup on one page shouldn't stop the crawl.
+    except Exception as e:
+        return replace(
+            scraped, error=_error(e), parse_seconds=time.perf_counter() - start
+        )
+    return replace(
+        scraped,
+        centers=centers,
+        content_hash=page.content_hash,
+        parse_seconds=time.perf_counter() - start,
+    )
+
+
+def parse_cached_pages(
+    page_numbers: Iterable[int],
+    *,
+    cache: PageCache,
+    base_url: str = _BASE_URL,
+    parser: str = "html.parser",
+    parse_workers: int = 0,
+    parse_queue_size: int | None = None,
+) -> Iterator[ScrapedPage]:
+    def read_cache() -> Iterator[FetchedPage]:
+        for page_number in page_numbers:
+            url = page_url(page_number, base_url=base_url)
+            cached = cache.get(url)
+            if cached is not None:
+                yield _fetched_page(page_number, url, cached.html, cached.validators)
+
+    yield from _parse_pages(
+        read_cache(),
+        parser=parser,
+        parse_workers=parse_workers,
+        parse_queue_size=parse_queue_size,
+    )
+
+
+def _parse_pages(
+    pages: Iterable[FetchedPage],
+    *,
+    parser: str,
+    parse_workers: int,
+    parse_queue_size: int | None,
+) -> Generator[ScrapedPage, None, None]:
+    if parse_workers <= 0:
+        for page in pages:
+            yield parse_fetched_page(page, parser=parser)
+        return
+    # Workers are spawned rather than forked, since forking while the fetching threads
+    # hold locks can deadlock the children.
+    with ProcessPoolExecutor(
+        max_workers=parse_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        yield from map_in_order(
+            executor,
+            functools.partial(parse_fetched_page, parser=parser),
+            pages,
+            max_in_flight=parse_queue_size or 2 * parse_workers,
+        )
+
+
+def map_in_order(
+    executor: Executor,
+    function: Callable[[_T], _U],
+    items: Iterable[_T],
+    *,
+    max_in_flight: int,
+) -> Generator[_U, None, None]:
+    # Like `executor.map`, but only takes the next item from `items` once fewer than
+    # `max_in_flight` results are pending. When `items` is itself a pipeline stage, this is
+    # what applies backpressure to it, so that a slow stage doesn't let raw pages pile up.
+    #
+    # If the caller stops early, the items that haven't started yet are cancelled.
+    pending: deque[Future[_U]] = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _error(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def parse_page(
+    html: str, *, page_number: int, parser: str = "html.parser"
 ) -> list[dict[str, str | int]]:
-    headers = {
-        # Necessary to avoid a 403.
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0"
-    }
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    entry_names = soup.find_all("p", class_="entryName")
-    entry_details = soup.find_all("p", class_="entryDetail")
-    return [
-        extract_center_info(name, details, page_number=page_number)
-        for name, details in zip(entry_names, entry_details, strict=True)
-    ]
-
-
-_KNOWN_KEY_NAMES = frozenset(
-    [
-        "Abbot",
-        "Address",
-        "Affiliation",
-        "Community Dharma Leader",
-        "Community Dharma Leaders",
-        "Contact",
-        "Contacts",
-        "Contact person",
-        "Contact and Teacher",
-        "Deshi",
-        "Director",
-        "Directors",
-        "E-mail",
-        "Executive Director",
-        "Founder",
-        "Founders",
-        "Founder Teacher",
-        "Founder Teachers",
-        "Group Coordinator",
-        "Group Coordinators",
-        "Guiding Teacher",
-        "Guiding Teachers",
-        "Lama-in-residence",
-        "Notes and Events",
-        "Main Contact",
-        "Main Contacts",
-        "Phone",
-        "Practice Leader",
-        "Practice Leaders",
-        "Resident Teacher",
-        "Resident Teachers",
-        "Rev.",
-        "Roshi",
-        "Senior Facilitator",
-        "Senior Facilitators",
-        "Spiritual Advisor",
-        "Spiritual Advisors",
-        "Spiritual Director",
-        "Spiritual Directors",
-        "Spiritual Director and Teacher",
-        "Teacher",
-        "Teachers",
-        "Tradition",
-        "Website",
-        "Venerable",
-    ]
-)
+    # A page is checkpointed and sent between processes whole, so the crawl collects its
+    # centers. `iter_page_centers` is the lazy version.
+    return list(iter_page_centers(html, page_number=page_number, parser=parser))
+
+
+def iter_page_centers(
+    html: str, *, page_number: int, parser: str = "html.parser"
+) -> Iterator[dict[str, str | int]]:
+    # Walks the page once, yielding each center as soon as its entry has been read.
+    #
+    # `html.parser` is the reference implementation. `lxml` is much faster and produces the
+    # same centers, but is an optional dependency.
+    centers: Iterator[dict[str, str | int]]
+    if parser == "lxml":
+        import lxml_parser
+
+        centers = lxml_parser.iter_page_centers(html, page_number=page_number)
+    elif parser == "html.parser":
+        soup = BeautifulSoup(html, "html.parser")
+        centers = (
+            extract_center_info(
+                name.tag,
+                details.tag,
+                page_number=page_number,
+                strongs=details.strongs,
+                entry_descs=details.entry_descs,
+            )
+            for name, details in pair_entries(_iter_entry_paragraphs(soup))
+        )
+    else:
+        raise ValueError(f"Unknown parser `{parser}`, expected one of {PARSERS}.")
+    for center in centers:
+        _add_address_fields(center)
+        yield center
+
+
+def _iter_entry_paragraphs(
+    soup: BeautifulSoup,
+) -> Iterator[tuple[str, EntryParagraph[Tag]]]:
+    # Walks the page once, in document order. Each `entryName` is yielded as soon as it is
+    # reached, and each `entryDetail` once its entry ends, at the next `<hr>` or `entryName`
+    # among its siblings, with what `extract_center_info` needs collected along the way.
+    details: EntryParagraph[Tag] | None = None
+    for element in soup.descendants:
+        if not isinstance(element, Tag):
+            continue
+        if details is not None:
+            if element.parent is details.tag.parent:
+                if element.name == "hr" or element.get("class") == ["entryName"]:
+                    yield "entryDetail", details
+                    details = None
+                elif element.get_text(strip=True):
+                    details.entry_descs.append(element)
+            elif element.name == "strong" and any(
+                parent is details.tag for parent in element.parents
+            ):
+                details.strongs.append(element)
+        if element.name == "p":
+            classes = element.get_attribute_list("class")
+            if "entryName" in classes:
+                yield "entryName", EntryParagraph(element)
+            if "entryDetail" in classes:
+                # Details without an `<hr>` after them end where the next ones start.
+                if details is not None:
+                    yield "entryDetail", details
+                details = EntryParagraph(element)
+    if details is not None:
+        yield "entryDetail", details
+
+
+def _add_address_fields(center: dict[str, str | int]) -> None:
+    # Also split the address into `street`, `city`, `state` and `zip`, so that regional
+    # extracts can look them up exactly. Like `name` and `page`, these keys are lowercase
+    # because they aren't on the page.
+    address = center.get("Address")
+    if isinstance(address, str):
+        center.update(parse_address(address))
 
 
 def extract_center_info(
-    name_tag: Tag, details_tag: Tag, *, page_number: int
+    name_tag: Tag,
+    details_tag: Tag,
+    *,
+    page_number: int,
+    strongs: Iterable[Tag] | None = None,
+    entry_descs: Iterable[Tag] | None = None,
 ) -> dict[str, str | int]:
+    # `strongs` and `entry_descs` are collected by `_iter_entry_paragraphs` while it walks
+    # the page. Without them, they are looked up around `details_tag`.
     result: dict[str, str | int] = {"name": name_tag.text.strip(), "page": page_number}
 
     # Algorithm: Every key is a strong element in the form `Key:`, followed by a value,
     # and ending in a `<br>` or `None` because the details have ended. So, process each
     # strong-element one-at-a-time to fill in the details.
-    for strong_element in details_tag.find_all(["strong"]):
-        key_and_value_elements = _determine_key_and_value_elements(strong_element)
-        if not key_and_value_elements:
+    if strongs is None:
+        strongs = details_tag.find_all("strong")
+    for strong_element in strongs:
+        key_and_value_texts = _determine_key_and_value_texts(strong_element)
+        if not key_and_value_texts:
             continue
-        key, value_elements = key_and_value_elements
-        val = _normalize_value(value_elements, key=key)
+        key, value_texts = key_and_value_texts
+        val = normalize_value_texts(value_texts, key=key)
         # Sometimes there are duplicate keys; if so, combine.
         result[key] = f"{result[key]}, {val}" if key in result else val
 
     # Also check if there is a `<p className="entryDesc">` after, which is used for
     # "Notes and Events".
-    _maybe_add_entry_desc(details_tag, result)
+    if entry_descs is None:
+        entry_descs = _find_entry_desc(details_tag)
+    add_notes_and_events(result, [tag.get_text(strip=True) for tag in entry_descs])
     return result
 
 
-def _determine_key_and_value_elements(
+def _determine_key_and_value_texts(
     strong_element: Tag,
-) -> tuple[str, list[Tag | NavigableString]] | None:
+) -> tuple[str, list[str]] | None:
+    # Collects the text of the key's value in a single walk over the `<strong>`'s
+    # siblings, up to the `<br>`, rather than collecting the sibling elements first.
+    strong_text = strong_element.text
     # `Find on:` is broken and not useful.
-    if strong_element.text == "Find on:":
+    if strong_text == "Find on:":
         return None
 
     # Strong elements can be included in the value for a key. We can skip those here because
     # they will already be handled by looking at the key's `next_sibling`.
-    if not any(re.match(rf"{k}\s*:", strong_element.text) for k in _KNOWN_KEY_NAMES):
+    if not KNOWN_KEY_PATTERN.match(strong_text):
         return None
 
-    key, key_value_text = strong_element.text.split(":", maxsplit=1)
-    key = key.strip()
-    value_elements: list[Tag | NavigableString] = [NavigableString(key_value_text)]
-
-    def is_valid_element(element: PageElement) -> TypeGuard[Tag | NavigableString]:
-        return isinstance(element, (Tag, NavigableString))
-
+    key, _, key_value_text = strong_text.partition(":")
+    value_texts = [key_value_text]
     current_value = strong_element.next_sibling
-    while (
-        current_value is not None
-        and is_valid_element(current_value)
-        and current_value.name != "br"
+    while current_value is not None and not (
+        isinstance(current_value, Tag) and current_value.name == "br"
     ):
-        if not is_valid_element(current_value):
-            raise AssertionError(
-                f"Unexpected element as sibling to the key `{key}`: "
-                f"{current_value} (type {type(current_value)})"
-            )
-        value_elements.append(current_value)
+        value_texts.append(_value_text(current_value))
         current_value = current_value.next_sibling
-
-    return key, value_elements
-
-
-def _normalize_value(value_elements: list[Tag | NavigableString], *, key: str) -> str:
-    text_elements = []
-    for v in value_elements:
-        if isinstance(v, Tag) and v.name == "a":
-            # This shouldn't actually happen, but for some reason `Hawk Mountain Sangha` is failing
-            # by saying there is no `href`, even though there is!
-            if "href" not in v:
-                txt = v.text
-            else:
-                href = v["href"]
-                assert isinstance(href, str)
-                txt = href.removeprefix("mailto:")
-        else:
-            txt = v.text
-        text_elements.append(txt)
-
-    text = " ".join(text_elements).strip()
-    if key == "Address":
-        text = _normalize_address(text)
-
-    # Remove extra whitespace and `\xa0` characters in the middle of the string.
-    text = re.sub(r"\s*\xa0\s*|\s{2,}", " ", text)
-    return text
-
-
-def _normalize_address(value: str) -> str:
-    # Remove 'Mailing:' and everything after it. `re.DOTALL` is because there are sometimes
-    # newlines after the `Mailing:`.
-    value = re.sub(r"\s*Mailing:.*$", "", value, flags=re.DOTALL)
-
-    # Replace `\r\n` and `\n` with `, `.
-    value = re.sub(r"(\r\n|\n)+", ", ", value)
-
-    # Remove 'Physical:' if it's at the beginning of the address
-    value = re.sub(r"^\s*Physical:\s*", "", value)
-
-    # Remove trailing whitespace, '\xa0', and 2-letter state code
-    value = re.sub(r"\s*\xa0\s*[A-Z]{2}$", "", value)
-
-    # Replace whitespace, '\xa0', and a little more whitespace followed by text. This
-    # sometimes separates the street from the city and state. Replace with `, `.
-    value = re.sub(r"\s*\xa0\s+(?=\S)", ", ", value)
-
-    # Some previous rules can result in occurrences like `,,`. Ensure it's only ever one comma.
-    value = re.sub(r",+", ",", value)
-
-    # Finally, replace multiple blank spaces with only one. Note that this happens at the end
-    # because the other replacements are more precise.
-    value = re.sub(r"\s+", " ", value)
-    return value
-
-
-def _maybe_add_entry_desc(details_tag: Tag, result: dict[str, str | int]) -> None:
-    entry_desc = _find_entry_desc(details_tag)
-    if not entry_desc:
-        return
-
-    if "Notes and Events" not in result:
-        raise AssertionError(
-            f"entryDesc found for the center {result['name']}, but there was no "
-            "`Notes and Events` key."
-        )
-    if notes := result["Notes and Events"] != "":
-        raise AssertionError(
-            f"entryDesc found for the center {result['name']}, but the 'Notes and Events' key has "
-            f"its own text already: {notes}"
-        )
-
-    result["Notes and Events"] = "\n\n".join(
-        tag.get_text(strip=True).replace("\n", "") for tag in entry_desc
-    )
+    return key.strip(), value_texts
+
+
+def _value_text(value_element: PageElement) -> str:
+    # Most siblings are plain text, which is already the value's text. Other strings, like
+    # comments, have no text.
+    if type(value_element) is NavigableString:
+        return value_element
+    if not (isinstance(value_element, Tag) and value_element.name == "a"):
+        return value_element.text
+    href = value_element.get("href")
+    # This shouldn't actually happen, but for some reason `Hawk Mountain Sangha` has an `<a>`
+    # without an `href`.
+    if not isinstance(href, str):
+        return value_element.text
+    return href.removeprefix("mailto:")
 
 
 def _find_entry_desc(details_tag: Tag) -> list[Tag]:
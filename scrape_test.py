@@ -1,7 +1,31 @@
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import pytest
 from bs4 import BeautifulSoup, Tag
 
-from scrape import extract_center_info
+import scrape
+from changes import Changelog, center_hashes
+from checkpoint import CheckpointStore, SavedPage
+from fetch import Fetcher, RateLimiter, Validators
+from page_cache import PageCache
+from replay import ReplayConfig, ReplayServer
+from scrape import (
+    CrawlStats,
+    ScrapedPage,
+    checkpoint_pages,
+    discover_page_count,
+    extract_center_info,
+    iter_page_centers,
+    map_in_order,
+    parse_cached_pages,
+    parse_page,
+    scrape_pages,
+)
 
 
 def create_tags(name: str, details_html: str) -> tuple[Tag, Tag]:
@@ -312,3 +336,320 @@ Mailing: P.O. Box 60062
         "E-mail": "alaskabuddhistcenter@gmail.com",
         "Website": "http://www.alaskabuddhistcenter.org/",
     }
+
+
+_CANNED_PAGE_COUNT = 12
+# Simulates the round-trip to buddhanet.info so that concurrency has something to overlap.
+_CANNED_PAGE_LATENCY_MS = 50
+
+
+def _canned_page(offset: int) -> str:
+    entries = "\n".join(f"""<p class="entryName">Center {offset + i}</p>
+<p class="entryDetail">
+<strong>Tradition:</strong> Tradition {offset + i}<br>
+</p>
+<hr>""" for i in range(2))
+    return f"<html><body>{entries}</body></html>"
+
+
+@pytest.fixture
+def canned_server() -> Iterator[ReplayServer]:
+    # Like the real directory, the pages past the end have no entries.
+    pages = {
+        page_number: _canned_page((page_number - 1) * 25)
+        for page_number in range(1, _CANNED_PAGE_COUNT + 1)
+    }
+    server = ReplayServer(
+        ("127.0.0.1", 0), pages, ReplayConfig(latency_ms=_CANNED_PAGE_LATENCY_MS)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def canned_directory(canned_server: ReplayServer) -> str:
+    return canned_server.base_url
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_scrape_pages_preserves_page_order(
+    canned_directory: str, concurrency: int
+) -> None:
+    page_numbers = range(1, _CANNED_PAGE_COUNT + 1)
+    start = time.perf_counter()
+    with Fetcher(pool_size=concurrency) as fetcher:
+        pages = [
+            page.centers
+            for page in scrape_pages(
+                page_numbers,
+                fetcher=fetcher,
+                base_url=canned_directory,
+                concurrency=concurrency,
+            )
+        ]
+    elapsed = time.perf_counter() - start
+    print(f"concurrency={concurrency}: {len(pages) / elapsed:.1f} pages/sec")
+
+    assert all(centers is not None for centers in pages)
+    assert [[center["page"] for center in centers or []] for centers in pages] == [
+        [page_number, page_number] for page_number in page_numbers
+    ]
+    assert [center["name"] for centers in pages for center in centers or []] == [
+        f"Center {(page_number - 1) * 25 + i}"
+        for page_number in page_numbers
+        for i in range(2)
+    ]
+
+
+def test_scrape_pages_respects_rate_limit(canned_directory: str) -> None:
+    max_per_second = 40.0
+    start = time.perf_counter()
+    with Fetcher(rate_limiter=RateLimiter(max_per_second)) as fetcher:
+        pages = list(
+            scrape_pages(
+                range(1, _CANNED_PAGE_COUNT + 1),
+                fetcher=fetcher,
+                base_url=canned_directory,
+                concurrency=_CANNED_PAGE_COUNT,
+            )
+        )
+    elapsed = time.perf_counter() - start
+    assert len(pages) == _CANNED_PAGE_COUNT
+    # Even with a worker per page, requests must be spaced out by the limiter.
+    assert elapsed >= (_CANNED_PAGE_COUNT - 1) / max_per_second
+
+
+def test_offline_reparses_cached_pages(canned_directory: str, tmp_path: Path) -> None:
+    page_numbers = range(1, 4)
+    with Fetcher() as fetcher, PageCache(tmp_path) as cache:
+        online = list(
+            scrape_pages(
+                page_numbers, fetcher=fetcher, cache=cache, base_url=canned_directory
+            )
+        )
+    assert len(PageCache(tmp_path).urls()) == len(page_numbers)
+
+    offline = list(
+        parse_cached_pages(
+            [*page_numbers, 99], cache=PageCache(tmp_path), base_url=canned_directory
+        )
+    )
+    # Page 99 was never fetched, so it is skipped.
+    assert [page.centers for page in offline] == [page.centers for page in online]
+
+
+def test_parse_workers_give_the_same_pages(
+    canned_directory: str, tmp_path: Path
+) -> None:
+    page_numbers = range(1, _CANNED_PAGE_COUNT + 1)
+    with Fetcher() as fetcher, PageCache(tmp_path) as cache:
+        in_process = list(
+            scrape_pages(
+                page_numbers, fetcher=fetcher, cache=cache, base_url=canned_directory
+            )
+        )
+        in_workers = list(
+            scrape_pages(
+                page_numbers,
+                fetcher=fetcher,
+                base_url=canned_directory,
+                concurrency=4,
+                parse_workers=2,
+                parse_queue_size=1,
+            )
+        )
+    assert in_workers == in_process
+    offline = list(
+        parse_cached_pages(
+            page_numbers,
+            cache=PageCache(tmp_path),
+            base_url=canned_directory,
+            parse_workers=2,
+        )
+    )
+    assert offline == in_process
+
+
+def test_refresh_skips_parsing_unchanged_pages(
+    canned_directory: str, tmp_path: Path
+) -> None:
+    page_numbers = range(1, 4)
+    with Fetcher() as fetcher, PageCache(tmp_path) as cache:
+        first = list(
+            scrape_pages(
+                page_numbers, fetcher=fetcher, cache=cache, base_url=canned_directory
+            )
+        )
+        hashes = {page.page_number: page.content_hash for page in first}
+        assert all(hashes.values())
+        # Page 2 changed since it was last scraped.
+        hashes[2] = "stale"
+        refreshed = list(
+            scrape_pages(
+                page_numbers,
+                fetcher=fetcher,
+                cache=cache,
+                base_url=canned_directory,
+                revalidate=True,
+                content_hashes_by_page={k: v for k, v in hashes.items() if v},
+            )
+        )
+    assert [page.centers is not None for page in refreshed] == [False, True, False]
+    assert refreshed[1] == first[1]
+
+
+@pytest.mark.parametrize(
+    "flags",
+    [
+        ["--refresh", "--reuse"],
+        ["--refresh", "--offline"],
+        ["--offline", "--cache-dir", ""],
+    ],
+)
+def test_invalid_flags_are_rejected_before_the_checkpoint(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path, flags: list[str]
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    checkpoint = tmp_path / "checkpoint.jsonl"
+    monkeypatch.setattr(
+        sys, "argv", ["scrape.py", "--checkpoint", str(checkpoint), *flags]
+    )
+    with pytest.raises(SystemExit):
+        scrape.main()
+    assert not checkpoint.exists()
+
+
+def test_checkpoint_pages_logs_changes(tmp_path: Path) -> None:
+    old: list[dict[str, str | int]] = [{"name": "A", "page": 1}]
+    with CheckpointStore(tmp_path / "checkpoint.jsonl") as checkpoints:
+        for page_number in (1, 2):
+            checkpoints.record_page(
+                page_number,
+                f"url{page_number}",
+                [{**old[0], "page": page_number}],
+                Validators(),
+                content_hash=f"hash{page_number}",
+            )
+        new: list[dict[str, str | int]] = [
+            {"name": "A", "page": 2, "Phone": "1"},
+            {"name": "B", "page": 2},
+        ]
+        pages = [
+            ScrapedPage(1, "url1", None, Validators()),
+            ScrapedPage(2, "url2", new, Validators(), content_hash="new hash"),
+        ]
+        with Changelog(tmp_path / "changelog.jsonl") as changelog:
+            list(
+                checkpoint_pages(
+                    pages,
+                    checkpoints=checkpoints,
+                    previous_records=checkpoints.records(),
+                    stats=CrawlStats(),
+                    changelog=changelog,
+                )
+            )
+        records = checkpoints.records()
+
+    assert changelog.counts == {"added": 1, "removed": 0, "modified": 1}
+    assert records[1].content_hash == "hash1"
+    assert checkpoints.read_saved(records[1]) == SavedPage([{"name": "A", "page": 1}])
+    assert records[2].content_hash == "new hash"
+    assert checkpoints.read_saved(records[2]) == SavedPage(new, center_hashes(new))
+
+
+def test_map_in_order_applies_backpressure() -> None:
+    taken: list[int] = []
+
+    def items() -> Iterator[int]:
+        for i in range(20):
+            taken.append(i)
+            yield i
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = map_in_order(executor, lambda i: i * i, items(), max_in_flight=3)
+        for i, result in enumerate(results):
+            assert result == i * i
+            # The item just consumed, plus at most 3 more in flight.
+            assert len(taken) <= i + 1 + 3
+
+
+def test_scrape_pages_records_failures() -> None:
+    # Nothing is listening on this port.
+    with Fetcher(max_retries=0, timeout=1) as fetcher:
+        [page] = scrape_pages(
+            [1], fetcher=fetcher, base_url="http://127.0.0.1:9/wbd/country.php?x=1"
+        )
+    assert page.centers is None
+    assert page.error is not None and page.error.startswith("ConnectionError")
+
+
+def test_discover_page_count() -> None:
+    links = "".join(
+        f'<a href="country.php?country_id=2&amp;offset={offset}">{offset}</a>'
+        for offset in (0, 25, 2975)
+    )
+    assert discover_page_count(f"<p>{links}</p>") == 120
+    assert discover_page_count("<p>No other pages</p>") is None
+
+
+@pytest.mark.parametrize("parse_workers", [0, 2])
+def test_scrape_pages_stops_at_the_first_empty_page(
+    canned_server: ReplayServer, parse_workers: int
+) -> None:
+    concurrency = 4
+    with Fetcher(pool_size=concurrency) as fetcher:
+        pages = list(
+            scrape_pages(
+                range(1, 1000),
+                fetcher=fetcher,
+                base_url=canned_server.base_url,
+                concurrency=concurrency,
+                parse_workers=parse_workers,
+            )
+        )
+    assert [page.page_number for page in pages] == list(
+        range(1, _CANNED_PAGE_COUNT + 2)
+    )
+    assert pages[-1].centers == []
+    # Only the pages already in flight when the end was found are fetched past it.
+    extra = sum(canned_server.stats().values()) - len(pages)
+    assert 0 <= extra <= concurrency + (2 * parse_workers)
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_iter_page_centers_yields_each_center_as_it_is_read(parser: str) -> None:
+    # The page is cut off after the second name, which only fails once it is reached.
+    html = _canned_page(0).replace(
+        "</body>", '<p class="entryName">Truncated</p></body>'
+    )
+    centers = iter_page_centers(html, page_number=1, parser=parser)
+    assert next(centers)["name"] == "Center 0"
+    assert next(centers)["name"] == "Center 1"
+    with pytest.raises(ValueError):
+        next(centers)
+
+
+@pytest.mark.parametrize("parser", ["html.parser", "lxml"])
+def test_parse_page_walks_the_page_once(
+    parser: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Each entry's description is collected by the walk over the page, rather than by
+    # walking the siblings after each entry's details again.
+    module = pytest.importorskip("lxml_parser") if parser == "lxml" else scrape
+    monkeypatch.setattr(module, "_find_entry_desc", None)
+    html = """<html><body>
+<p class="entryName">A</p>
+<p class="entryDetail"><strong>Notes and Events:</strong></p>
+<p class="entryDesc">First</p>
+<p></p>
+<p class="entryDesc">Second</p>
+<hr>
+<p class="entryName">B</p>
+<p class="entryDetail"><strong>Phone:</strong> 1<br></p>
+</body></html>"""
+    assert parse_page(html, page_number=1, parser=parser) == [
+        {"name": "A", "page": 1, "Notes and Events": "First\n\nSecond"},
+        {"name": "B", "page": 1, "Phone": "1"},
+    ]
@@ -0,0 +1,303 @@
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from argparse import ArgumentParser
+from collections import OrderedDict
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from query import FIELDS, CenterIndex, fingerprint
+
+# Serves queries over the scraped centers as JSON, from an index that is loaded once, so
+# a new question is a request rather than a new script and another pass over the file:
+#
+#   GET /centers?state=IL&city=Chicago&tradition=zen&limit=10&offset=0
+#   GET /health
+#
+# `/centers` takes the same filters as `query.py`, and returns `total`, the number of
+# matching centers, along with the `centers` from `offset` to `offset + limit`.
+#
+# Responses are cached by their normalized query, so a repeated query is a dict lookup,
+# and carry an `ETag` from a hash of their body, so a client that sends it back in
+# `If-None-Match` gets an empty `304 Not Modified` if nothing changed.
+#
+# The source's size and mtime are checked at most every `check_interval` seconds. When
+# they change, the request that notices reloads the index, while the others keep being
+# answered from the old one, and then the cache is cleared. If the new file can't be
+# loaded, the old index keeps being served.
+
+_PARAMS = frozenset({*FIELDS, "limit", "offset"})
+
+
+@dataclass(frozen=True)
+class Response:
+    status: HTTPStatus
+    body: bytes
+    etag: str | None = None
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    index: CenterIndex
+    fingerprint: dict[str, int]
+    # Increases with every reload, so that responses cached from an older index never hit.
+    generation: int
+
+
+class CenterService:
+    def __init__(
+        self,
+        source: Path,
+        *,
+        index_path: Path | None = None,
+        cache_size: int = 1024,
+        check_interval: float = 1.0,
+    ) -> None:
+        self.source = source
+        self.index_path = index_path
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._cache: OrderedDict[tuple[object, ...], Response] = OrderedDict()
+        self._snapshot = self._load(generation=0)
+        self._failed_fingerprint: dict[str, int] | None = None
+        self._next_check = time.monotonic() + check_interval
+
+    def get(self, path: str, query: str = "") -> Response:
+        self._maybe_reload()
+        if path == "/health":
+            return _json_response(self.health())
+        if path != "/centers":
+            return _error(HTTPStatus.NOT_FOUND, f"No such path `{path}`.")
+        params = parse_qs(query, keep_blank_values=True)
+        for name, values in params.items():
+            if name not in _PARAMS:
+                return _error(
+                    HTTPStatus.BAD_REQUEST,
+                    f"Unknown parameter `{name}`, expected some of {sorted(_PARAMS)}.",
+                )
+            if len(values) > 1:
+                return _error(
+                    HTTPStatus.BAD_REQUEST, f"Parameter `{name}` was given twice."
+                )
+        snapshot = self._snapshot
+        key = (snapshot.generation, *sorted((k, v[0]) for k, v in params.items()))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+        response = _query(snapshot.index, {k: v[0] for k, v in params.items()})
+        if self.cache_size > 0 and response.status == HTTPStatus.OK:
+            with self._lock:
+                self._cache[key] = response
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+    def health(self) -> dict[str, object]:
+        snapshot = self._snapshot
+        with self._lock:
+            return {
+                "centers": len(snapshot.index.centers),
+                "source": snapshot.fingerprint,
+                "generation": snapshot.generation,
+                "reloads": self.reloads,
+                "cache": {
+                    "size": len(self._cache),
+                    "hits": self.hits,
+                    "misses": self.misses,
+                },
+            }
+
+    def reload_if_changed(self) -> bool:
+        # Returns whether the index was reloaded. If another request is already reloading
+        # it, returns right away, so that this one is answered from the old index.
+        try:
+            current = fingerprint(self.source)
+        except FileNotFoundError:
+            return False
+        if current in (self._snapshot.fingerprint, self._failed_fingerprint):
+            return False
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        try:
+            try:
+                snapshot = self._load(generation=self._snapshot.generation + 1)
+            except (OSError, ValueError) as e:
+                print(f"Keeping the old index: {self.source}: {e}", file=sys.stderr)
+                self._failed_fingerprint = current
+                return False
+            with self._lock:
+                self._snapshot = snapshot
+                self._cache.clear()
+                self.reloads += 1
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        self.reload_if_changed()
+
+    def _load(self, *, generation: int) -> _Snapshot:
+        # Take the fingerprint first: if the source changes while it is being indexed,
+        # the next check sees a different fingerprint and loads it again.
+        source_fingerprint = fingerprint(self.source)
+        index = CenterIndex.load(self.source, self.index_path)
+        return _Snapshot(index, source_fingerprint, generation)
+
+
+class CenterServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: CenterService) -> None:
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Keep connections open between requests.
+    protocol_version = "HTTP/1.1"
+    # The headers and body are sent separately, and Nagle's algorithm would hold the body
+    # back until the client acknowledged the headers, which takes it 40 ms.
+    disable_nagle_algorithm = True
+    server: CenterServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        response = self.server.service.get(url.path, url.query)
+        if response.etag is not None and _etag_matches(
+            self.headers.get("If-None-Match"), response.etag
+        ):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", response.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(response.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response.body)))
+        if response.etag is not None:
+            self.send_header("ETag", response.etag)
+            # The data changes whenever the source is rescraped, so always revalidate.
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        # Logging every request to stderr would cost more than answering it from the cache.
+        pass
+
+
+def create_server(service: CenterService, host: str, port: int) -> CenterServer:
+    # Port `0` picks a free port, which is then `server.server_address[1]`.
+    return CenterServer((host, port), service)
+
+
+def _query(index: CenterIndex, params: dict[str, str]) -> Response:
+    try:
+        limit = int(params.pop("limit")) if "limit" in params else None
+        offset = int(params.pop("offset", "0"))
+    except ValueError:
+        return _error(HTTPStatus.BAD_REQUEST, "`limit` and `offset` must be integers.")
+    if offset < 0 or (limit is not None and limit < 0):
+        return _error(HTTPStatus.BAD_REQUEST, "`limit` and `offset` can't be negative.")
+    # An empty filter, e.g. `?city=`, matches everything, as it does in `query.py`.
+    centers = index.query(**params)
+    end = None if limit is None else offset + limit
+    body = {"total": len(centers), "centers": centers[offset:end]}
+    return _json_response(body, etag=True)
+
+
+def _json_response(data: object, *, etag: bool = False) -> Response:
+    body = json.dumps(data).encode()
+    return Response(HTTPStatus.OK, body, _etag(body) if etag else None)
+
+
+def _error(status: HTTPStatus, message: str) -> Response:
+    return Response(status, json.dumps({"error": message}).encode())
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    # A weak comparison, as `If-None-Match` calls for, so `W/"..."` matches too.
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+def main() -> None:
+    args = create_parser().parse_args()
+    start = time.perf_counter()
+    service = CenterService(
+        Path(args.input),
+        cache_size=args.cache_size,
+        check_interval=args.check_interval,
+    )
+    server = create_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(
+        f"Serving {service.health()['centers']} centers on "
+        f"http://{host!s}:{port}, loaded in {(time.perf_counter() - start) * 1000:.0f} "
+        "ms",
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--input",
+        default="buddhist_centers.json",
+        help="The scraped centers, either `.json`, `.jsonl`, `.sqlite` or "
+        "`.parquet`. It is reloaded whenever it changes.",
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="The address to listen on. Only this machine, by default.",
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1024,
+        help="How many responses to cache. `0` turns the cache off.",
+    )
+    parser.add_argument(
+        "--check-interval",
+        type=float,
+        default=1.0,
+        help="How often, in seconds, to check whether `--input` changed.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    main()
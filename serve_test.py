@@ -0,0 +1,165 @@
+import http.client
+import json
+import os
+import threading
+from collections.abc import Iterator
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+
+from center_io import write_centers
+from serve import CenterServer, CenterService, create_server
+
+_CENTERS: list[dict[str, str | int]] = [
+    {
+        "name": "Chicago Zen Community",
+        "page": 12,
+        "Address": "Chicago IL",
+        "Tradition": "Mahayana, Rinzai Zen",
+    },
+    {
+        "name": "Harmony Zen Center",
+        "page": 25,
+        "Address": "4635 North Racine Avenue, 2nd Floor, Chicago, IL 60640",
+        "Tradition": "Mahayana, Rinzai/Soto Zen",
+    },
+    {
+        "name": "Evanston Meditation Center",
+        "page": 30,
+        "Address": "1703 Orrington Avenue, Evanston IL 60201",
+        "Tradition": "Theravada, Vipassana",
+    },
+    {"name": "Rigpa Online", "page": 50},
+]
+
+
+@pytest.fixture
+def source(tmp_path: Path) -> Path:
+    source = tmp_path / "centers.json"
+    write_centers(source, _CENTERS)
+    return source
+
+
+@pytest.fixture
+def server(source: Path) -> Iterator[CenterServer]:
+    server = create_server(CenterService(source), "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _json(service: CenterService, path: str, query: str = "") -> object:
+    return json.loads(service.get(path, query).body)
+
+
+def _rewrite(source: Path, centers: list[dict[str, str | int]]) -> None:
+    mtime_ns = source.stat().st_mtime_ns
+    write_centers(source, centers)
+    # Make sure the mtime changes, however coarse the filesystem's timestamps are.
+    os.utime(source, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+
+
+def test_query(source: Path) -> None:
+    service = CenterService(source)
+    assert _json(service, "/centers", "state=il&tradition=zen") == {
+        "total": 2,
+        "centers": _CENTERS[:2],
+    }
+    assert _json(service, "/centers", "city=chicago&limit=1&offset=1") == {
+        "total": 2,
+        "centers": _CENTERS[1:2],
+    }
+    assert _json(service, "/centers") == {"total": 4, "centers": _CENTERS}
+
+    for path, query, status in [
+        ("/nowhere", "", HTTPStatus.NOT_FOUND),
+        ("/centers", "country=US", HTTPStatus.BAD_REQUEST),
+        ("/centers", "state=IL&state=WI", HTTPStatus.BAD_REQUEST),
+        ("/centers", "limit=ten", HTTPStatus.BAD_REQUEST),
+        ("/centers", "offset=-1", HTTPStatus.BAD_REQUEST),
+    ]:
+        response = service.get(path, query)
+        assert response.status == status, query
+        assert "error" in json.loads(response.body)
+
+
+def test_cache(source: Path) -> None:
+    service = CenterService(source, cache_size=2)
+    first = service.get("/centers", "state=IL&city=Chicago")
+    # The same query in another order, which is normalized to the same key.
+    assert service.get("/centers", "city=Chicago&state=IL") is first
+    assert (service.hits, service.misses) == (1, 1)
+
+    service.get("/centers", "state=IL")
+    service.get("/centers", "tradition=zen")
+    # The least recently used response was evicted.
+    assert service.get("/centers", "state=IL&city=Chicago") is not first
+    assert (service.hits, service.misses) == (1, 4)
+
+    uncached = CenterService(source, cache_size=0)
+    uncached.get("/centers", "state=IL")
+    uncached.get("/centers", "state=IL")
+    assert uncached.health()["cache"] == {"size": 0, "hits": 0, "misses": 2}
+
+
+def test_reload(source: Path) -> None:
+    service = CenterService(source, check_interval=0)
+    before = service.get("/centers", "state=IL")
+    assert not service.reload_if_changed()
+
+    _rewrite(source, _CENTERS[1:])
+    after = service.get("/centers", "state=IL")
+    assert json.loads(after.body)["total"] == 2
+    assert after.etag != before.etag
+    assert service.health()["reloads"] == 1
+
+    # A file that can't be loaded leaves the old index in place.
+    mtime_ns = source.stat().st_mtime_ns
+    source.write_text("[{")
+    os.utime(source, ns=(mtime_ns + 10**9, mtime_ns + 10**9))
+    assert service.get("/centers", "state=IL").body == after.body
+    assert service.health()["reloads"] == 1
+
+
+def test_reload_is_throttled(source: Path) -> None:
+    service = CenterService(source, check_interval=3600)
+    _rewrite(source, _CENTERS[1:])
+    assert json.loads(service.get("/centers").body)["total"] == len(_CENTERS)
+    assert service.reload_if_changed()
+    assert json.loads(service.get("/centers").body)["total"] == len(_CENTERS) - 1
+
+
+def test_http(server: CenterServer) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+    conn.request("GET", "/centers?tradition=zen")
+    response = conn.getresponse()
+    assert response.status == HTTPStatus.OK
+    assert response.getheader("Content-Type") == "application/json"
+    etag = response.getheader("ETag")
+    assert etag is not None
+    assert json.loads(response.read())["total"] == 2
+
+    # The connection is kept open, and a matching `If-None-Match` gets no body.
+    conn.request("GET", "/centers?tradition=zen", headers={"If-None-Match": etag})
+    response = conn.getresponse()
+    assert response.status == HTTPStatus.NOT_MODIFIED
+    assert response.read() == b""
+
+    conn.request("GET", "/centers?tradition=zen", headers={"If-None-Match": '"x"'})
+    response = conn.getresponse()
+    assert response.status == HTTPStatus.OK
+    response.read()
+
+    conn.request("GET", "/health")
+    response = conn.getresponse()
+    assert json.loads(response.read())["centers"] == len(_CENTERS)
+
+    conn.request("GET", "/centers?nope=1")
+    response = conn.getresponse()
+    assert response.status == HTTPStatus.BAD_REQUEST
+    assert response.getheader("ETag") is None
+    response.read()
+    conn.close()